@@ -5,9 +5,13 @@ Comprehensive RDAP Gateway Analysis
 import pandas as pd
 import json
 from collections import defaultdict, Counter
-from urllib.parse import urlparse
+import sys
+from pathlib import Path
 import re
 
+sys.path.insert(0, str(Path(__file__).resolve().parent / "scripts"))
+from url_normalizer import normalize_host_series
+
 def identify_gateway_provider(rdap_url):
     """Identify gateway provider from RDAP URL patterns"""
     if pd.isna(rdap_url) or rdap_url.strip() == '':
@@ -127,7 +131,7 @@ def analyze_rdap_gateways():
     
     # Find potential unknown gateways
     # Extract domains from RDAP URLs
-    df['RDAP_Domain'] = df[rdap_url_col].apply(lambda x: urlparse(x).netloc.lower() if pd.notna(x) else None)
+    df['RDAP_Domain'] = normalize_host_series(df[rdap_url_col])
     
     # Count domain occurrences
     domain_counts = df['RDAP_Domain'].value_counts()
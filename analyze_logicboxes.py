@@ -1,18 +1,22 @@
 import pandas as pd
 import numpy as np
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent / "scripts"))
+from membership_rules import LOGICBOXES_RULES, MembershipRuleEngine
+from rollup_cube import RollupCube
 
 # Read the Excel file
 df = pd.read_excel('data/Rdap lookups.xlsx')
 
-# Get all LogicBoxes users
-key_systems = df[df['Name'].str.contains('key-systems|key systems', case=False, na=False)]
-logicboxes_direct = df[df['Name'].str.contains('logicboxes', case=False, na=False)]
-bigrock = df[df['Name'].str.contains('bigrock', case=False, na=False)]
-netistrar = df[df['Name'].str.contains('netistrar', case=False, na=False)]
-rrpproxy_users = df[df['rdap_url'] == 'rdap.rrpproxy.net']
-rdapserver_users = df[df['rdap_url'] == 'rdapserver.net']
+# Get all LogicBoxes users (name and RDAP host rules, evaluated in one pass per column)
+membership = MembershipRuleEngine(LOGICBOXES_RULES).evaluate(df)
+all_logicboxes = df[membership['union']]
 
-all_logicboxes = pd.concat([key_systems, logicboxes_direct, bigrock, netistrar, rrpproxy_users, rdapserver_users]).drop_duplicates()
+# Counts and domain totals by RDAP host and category, from one rollup
+cube = RollupCube.build(all_logicboxes, columns={'category': 'Category', 'rdap_host': 'rdap_url'},
+                        domain_column='Domain count')
 
 # Sort by domain count (descending) for top registrars
 logicboxes_sorted = all_logicboxes.sort_values('Domain count', ascending=False, na_position='last')
@@ -35,17 +39,27 @@ print('=== SUMMARY STATISTICS ===')
 print(f'Total LogicBoxes Gateway Users: {len(all_logicboxes)}')
 print(f'Users with domain count data: {len(all_logicboxes[pd.notna(all_logicboxes["Domain count"])])}')
 
+print('\nMatches by membership rule:')
+for rule, hits in membership['hit_counts'].items():
+    print(f'  {rule}: {hits} registrars')
+
+overlaps = membership['overlaps']
+for i, rule_a in enumerate(overlaps.index):
+    for rule_b in overlaps.columns[i + 1:]:
+        if overlaps.loc[rule_a, rule_b]:
+            print(f'  {rule_a} & {rule_b}: {overlaps.loc[rule_a, rule_b]} registrars')
+
 # Calculate total domains
 domains_with_data = all_logicboxes[pd.notna(all_logicboxes['Domain count'])]
 total_domains = domains_with_data['Domain count'].sum()
 print(f'Total domains under LogicBoxes gateway: {total_domains:,.0f}')
 
 print(f'\nBreakdown by RDAP service:')
-rdap_breakdown = all_logicboxes['rdap_url'].value_counts()
-for rdap, count in rdap_breakdown.items():
-    domains_for_this_rdap = all_logicboxes[all_logicboxes['rdap_url'] == rdap]['Domain count'].sum()
-    if pd.notna(domains_for_this_rdap):
-        print(f'  {rdap}: {count} registrars ({domains_for_this_rdap:,.0f} total domains)')
+rdap_breakdown = cube.slice(['rdap_host']).dropna(subset=['rdap_host'])
+rdap_breakdown = rdap_breakdown.sort_values('registrars', ascending=False, kind='stable')
+for rdap, count, with_domains, domains in rdap_breakdown.itertuples(index=False):
+    if with_domains:
+        print(f'  {rdap}: {count} registrars ({domains:,.0f} total domains)')
     else:
         print(f'  {rdap}: {count} registrars (domain data not available)')
 
@@ -56,7 +70,7 @@ print('2. rdap.rrpproxy.net - Key-Systems gateway service')
 print('3. rdap.netistrar.com - Netistrar service')
 
 print('\n=== GATEWAY CATEGORIES ===')
-gateway_count = len(all_logicboxes[all_logicboxes['Category'] == 'GATEWAY'])
+gateway_count = cube.cell(category='GATEWAY')['registrars']
 print(f'Registrars explicitly marked as GATEWAY: {gateway_count}')
 
 # Show all gateway registrars
@@ -5,9 +5,13 @@ Analyze RDAP lookups to identify registrars using gateway solutions
 import csv
 import json
 from collections import defaultdict, Counter
-from urllib.parse import urlparse
+import sys
+from pathlib import Path
 import re
 
+sys.path.insert(0, str(Path(__file__).resolve().parent / "scripts"))
+from url_normalizer import normalize_host
+
 def read_excel_as_csv():
     """Read Excel file by converting to CSV first"""
     import subprocess
@@ -103,8 +107,7 @@ def identify_gateway_provider(rdap_url):
     # Additional pattern matching for common gateway indicators
     # Look for repeated domains that might indicate gateway providers
     try:
-        parsed = urlparse(rdap_url)
-        domain = parsed.netloc.lower()
+        domain = normalize_host(rdap_url) or ''
         
         # Check for other potential gateway patterns
         if 'whois' in domain and 'registrar' in domain:
@@ -181,8 +184,7 @@ def analyze_rdap_data():
             
             # Extract domain from URL
             try:
-                parsed = urlparse(rdap_url)
-                domain = parsed.netloc.lower()
+                domain = normalize_host(rdap_url)
                 if domain:
                     domain_counter[domain] += 1
             except:
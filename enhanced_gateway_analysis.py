@@ -4,10 +4,14 @@ Enhanced RDAP Gateway Analysis - Looking for all gateway providers
 """
 import pandas as pd
 import json
-from collections import defaultdict, Counter
-from urllib.parse import urlparse
+import sys
+from pathlib import Path
 import re
 
+sys.path.insert(0, str(Path(__file__).resolve().parent / "scripts"))
+from url_normalizer import normalize_host_series
+from public_suffix import DEFAULT_PSL_FILE, PublicSuffixList
+
 def identify_gateway_provider(rdap_url):
     """Identify gateway provider from RDAP URL patterns"""
     if pd.isna(rdap_url) or rdap_url.strip() == '':
@@ -93,7 +97,7 @@ def analyze_comprehensive_gateways():
     print(f"Total rows with RDAP URLs: {len(df)}")
     
     # Extract domains from RDAP URLs
-    df['rdap_domain'] = df['rdap_url'].apply(lambda x: urlparse(x).netloc.lower())
+    df['rdap_domain'] = normalize_host_series(df['rdap_url'])
     
     # Add gateway provider column
     df['gateway_provider'] = df['rdap_url'].apply(identify_gateway_provider)
@@ -170,24 +174,24 @@ def analyze_comprehensive_gateways():
     print("ADDITIONAL GATEWAY PATTERN ANALYSIS")
     print("="*80)
     
-    # Look for common subdomain patterns
-    rdap_patterns = Counter()
-    for url in df['rdap_url'].unique():
-        try:
-            parsed = urlparse(url)
-            domain_parts = parsed.netloc.split('.')
-            if len(domain_parts) >= 2:
-                base_domain = '.'.join(domain_parts[-2:])
-                rdap_patterns[base_domain] += 1
-        except:
-            continue
+    # Group hosts by registrable domain (handles co.uk, com.au, com.tr, ...);
+    # without the downloaded list, fall back to the last two labels
+    if DEFAULT_PSL_FILE.exists():
+        df['base_domain'] = PublicSuffixList().registrable_domain_series(df['rdap_domain'])
+    else:
+        print(f"\nPublic Suffix List not found at {DEFAULT_PSL_FILE}; grouping by the last two labels")
+        print("Run `python scripts/public_suffix.py --fetch` to group by registrable domain")
+        df['base_domain'] = df['rdap_domain'].str.split('.').str[-2:].str.join('.')
+    base_domain_stats = df.groupby('base_domain').agg(
+        url_count=('rdap_url', 'nunique'),
+        total_domains=('Domain count', 'sum')
+    ).sort_values('url_count', ascending=False, kind='stable')
+    rdap_patterns = base_domain_stats['url_count']
     
     print("\nMost common base domains in RDAP URLs:")
-    for domain, count in rdap_patterns.most_common(20):
-        if count > 2:
-            domain_df = df[df['rdap_url'].str.contains(domain, na=False)]
-            total_domains = domain_df['Domain count'].sum()
-            print(f"  {domain}: {count} URLs, {int(total_domains):,} domains")
+    for domain, row in base_domain_stats.head(20).iterrows():
+        if row['url_count'] > 2:
+            print(f"  {domain}: {row['url_count']} URLs, {int(row['total_domains']):,} domains")
     
     # Summary
     total_domains_all = df['Domain count'].sum()
@@ -209,7 +213,7 @@ def analyze_comprehensive_gateways():
     results = {
         'known_gateway_providers': gateway_summary,
         'potential_gateways': [],
-        'rdap_domain_patterns': dict(rdap_patterns.most_common(50)),
+        'rdap_domain_patterns': {domain: int(count) for domain, count in rdap_patterns.head(50).items()},
         'summary': {
             'total_domains_with_rdap': int(total_domains_all),
             'total_domains_known_gateways': total_domains_gateways,
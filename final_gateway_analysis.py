@@ -5,9 +5,13 @@ Final Comprehensive RDAP Gateway Analysis
 import pandas as pd
 import json
 from collections import defaultdict, Counter
-from urllib.parse import urlparse
+import sys
+from pathlib import Path
 import re
 
+sys.path.insert(0, str(Path(__file__).resolve().parent / "scripts"))
+from url_normalizer import normalize_host_series
+
 def identify_gateway_provider(rdap_url):
     """Identify gateway provider from RDAP URL patterns"""
     if pd.isna(rdap_url) or rdap_url.strip() == '':
@@ -92,7 +96,7 @@ def find_potential_gateways(df):
     """Find potential gateway providers based on URL patterns"""
     
     # Extract domain from RDAP URLs
-    df['rdap_domain'] = df['rdap_url'].apply(lambda x: urlparse(x.strip()).netloc.lower() if pd.notna(x) else None)
+    df['rdap_domain'] = normalize_host_series(df['rdap_url'])
     
     # Count how many registrars use each domain
     domain_stats = df.groupby('rdap_domain').agg({
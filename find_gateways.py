@@ -1,15 +1,17 @@
 #!/usr/bin/env python3
 import pandas as pd
-from urllib.parse import urlparse
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent / "scripts"))
+from url_normalizer import normalize_host_series
 
 # Read data
 df = pd.read_excel('data/Rdap lookups.xlsx')
 df['Domain count'] = pd.to_numeric(df['Domain count'], errors='coerce').fillna(0)
 
 # Extract RDAP domains
-df['RDAP_Domain'] = df['rdap_url'].apply(
-    lambda x: urlparse(str(x)).netloc.lower() if pd.notna(x) else None
-)
+df['RDAP_Domain'] = normalize_host_series(df['rdap_url'])
 
 # Find domains used by multiple registrars
 rdap_counts = df.groupby('RDAP_Domain').agg({
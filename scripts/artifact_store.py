@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+"""
+Canonical Registrar Artifact Store
+
+Each registrar table of a run (gateway registrars, the RDAP registrar list,
+the LogicBoxes enrichment stages) is written once as a Parquet file under
+data/canonical/. The legacy JSON and CSV files other scripts and the
+dashboard read are declared views of those tables: a view is rewritten only
+when its table changed since the view was last written, and only when
+something asks for it. Downstream steps read the columns they need straight
+from the memory-mapped Parquet file instead of re-parsing JSON.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from json_stream import write_records
+
+# Resolved from the repository root, since callers run from different directories
+REPO_ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_STORE_DIR = REPO_ROOT / "data" / "canonical"
+
+# Canonical tables and the legacy file each is bootstrapped from when missing
+TABLES = {
+    'gateway_registrars': {'source': "all_gateway_registrars.csv"},
+    'core_gateway_registrars': {'source': "all_gateway_registrars.json"},
+    'logicboxes_registrars': {'source': "data/processed/logicboxes_registrars_enriched.json"},
+    'logicboxes_registrars_v2': {'source': "data/processed/logicboxes_registrars_enriched_v2.json"},
+}
+
+# Legacy files derived from the canonical tables (paths relative to REPO_ROOT)
+VIEWS = {
+    "all_gateway_registrars.csv": {'table': 'gateway_registrars', 'format': 'csv'},
+    "all_gateway_registrars.json": {'table': 'core_gateway_registrars', 'format': 'json'},
+    "public/data/processed/all_gateway_registrars.json": {'table': 'core_gateway_registrars', 'format': 'json'},
+    "data/processed/logicboxes_registrars_enriched.json": {'table': 'logicboxes_registrars', 'format': 'json'},
+    "data/processed/logicboxes_registrars_enriched.csv": {'table': 'logicboxes_registrars', 'format': 'csv'},
+    "data/processed/logicboxes_registrars_enriched_v2.json": {'table': 'logicboxes_registrars_v2', 'format': 'json'},
+    "data/processed/logicboxes_registrars_enriched_v2.csv": {'table': 'logicboxes_registrars_v2', 'format': 'csv'},
+    "public/data/processed/logicboxes_registrars_enriched_v2.json": {'table': 'logicboxes_registrars_v2', 'format': 'json'},
+}
+
+
+class SourceConflictError(RuntimeError):
+    """A legacy source file was edited while its table holds changes not yet written to it."""
+
+
+def _atomic_write(path: Path, write):
+    """Write through a temporary file so readers never see a partial file."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.tmp")
+    write(tmp)
+    os.replace(tmp, path)
+
+
+def _uniform_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """Store mixed-type object columns (e.g. an IP that Excel turned into a number) as strings."""
+    df = df.copy()
+    for column in df.columns[df.dtypes == object]:
+        values = df[column].dropna()
+        if values.map(type).nunique() > 1:
+            df[column] = df[column].map(lambda value: value if value is None or value != value else str(value))
+    return df
+
+
+def _file_state(path: Path) -> Dict:
+    stat = path.stat()
+    return {'sha256': hashlib.sha256(path.read_bytes()).hexdigest(),
+            'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+
+def _json_value(value):
+    """Arrow/pandas scalar as a plain JSON value (NaN becomes null)."""
+    if isinstance(value, float) and value != value:
+        return None
+    return value
+
+
+class ArtifactStore:
+    """Canonical Parquet tables with lazily materialised legacy views."""
+
+    def __init__(self, store_dir: Path = DEFAULT_STORE_DIR, root: Path = REPO_ROOT):
+        self.store_dir = Path(store_dir)
+        self.root = Path(root)
+        self.manifest_file = self.store_dir / "manifest.json"
+        self.manifest = self._load_manifest()
+
+    def _load_manifest(self) -> Dict:
+        if self.manifest_file.exists():
+            with open(self.manifest_file, 'r', encoding='utf-8') as f:
+                return {'files': {}, **json.load(f)}
+        return {'tables': {}, 'views': {}, 'files': {}}
+
+    def _save_manifest(self):
+        def write(tmp: Path):
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(self.manifest, f, indent=2)
+        _atomic_write(self.manifest_file, write)
+
+    def table_file(self, name: str) -> Path:
+        return self.store_dir / f"{name}.parquet"
+
+    def has(self, name: str) -> bool:
+        return name in self.manifest['tables'] and self.table_file(name).exists()
+
+    def is_outdated(self, name: str, sources: List[str]) -> bool:
+        """Whether a derived table is missing or older than any of its source tables."""
+        if not self.has(name):
+            return True
+        written_at = self.manifest['tables'][name]['written_at']
+        return any(self.manifest['tables'].get(source, {}).get('written_at', '') > written_at
+                   for source in sources)
+
+    def write(self, name: str, data, source: str = 'run') -> Dict:
+        """
+        Write a canonical table from a DataFrame or list of records, unless
+        it is identical to the stored one.
+
+        Returns:
+            The table's manifest entry
+        """
+        df = data if isinstance(data, pd.DataFrame) else pd.DataFrame(list(data))
+        table = pa.Table.from_pandas(_uniform_columns(df), preserve_index=False)
+        buffer = pa.BufferOutputStream()
+        pq.write_table(table, buffer)
+        content = buffer.getvalue().to_pybytes()
+        digest = hashlib.sha256(content).hexdigest()
+
+        # An unchanged table keeps its file, manifest entry and current views
+        current = self.manifest['tables'].get(name)
+        if current and current['sha256'] == digest and self.table_file(name).exists():
+            return current
+
+        def write(tmp: Path):
+            with open(tmp, 'wb') as f:
+                f.write(content)
+        _atomic_write(self.table_file(name), write)
+
+        entry = {
+            'rows': table.num_rows,
+            'columns': table.column_names,
+            'sha256': digest,
+            'source': source,
+            'written_at': datetime.now().isoformat(),
+        }
+        self.manifest['tables'][name] = entry
+        self._save_manifest()
+        return entry
+
+    def _record_file(self, view: str):
+        """Remember a legacy file's content as written or imported by the store."""
+        self.manifest['files'][view] = _file_state(self.root / view)
+
+    def file_changed(self, view: str) -> bool:
+        """Whether a legacy file was edited outside the store since it was last written or imported."""
+        path = self.root / view
+        if not path.exists():
+            return False
+        recorded = self.manifest['files'].get(view)
+        if recorded is None:
+            # Not tracked yet (older manifest): a source file last known to
+            # match its table is re-checked by importing, a no-op if unchanged
+            table = VIEWS.get(view, {}).get('table')
+            return (TABLES.get(table, {}).get('source') == view and self.has(table)
+                    and self.manifest['views'].get(view) == self.manifest['tables'][table]['sha256'])
+        stat = path.stat()
+        if stat.st_size == recorded['size'] and stat.st_mtime_ns == recorded['mtime_ns']:
+            return False
+        return _file_state(path)['sha256'] != recorded['sha256']
+
+    def sync(self, name: str):
+        """
+        Import a table from its legacy file if the table is missing or the
+        file was replaced since it was imported or written.
+
+        Raises:
+            SourceConflictError: The file changed while the table holds
+                changes not yet written back to it
+        """
+        if not self.has(name):
+            self.import_legacy(name)
+            return
+        source = TABLES.get(name, {}).get('source')
+        if source is None or not self.file_changed(source):
+            return
+        if self.manifest['views'].get(source) != self.manifest['tables'][name]['sha256']:
+            raise SourceConflictError(
+                f"{source} was edited, but table {name} has changes not yet written to it; "
+                f"re-import it (artifact_store.py import {name}) or overwrite the file "
+                f"(artifact_store.py views --table {name} --force)")
+        self.import_legacy(name)
+
+    def read(self, name: str, columns: Optional[List[str]] = None) -> pa.Table:
+        """Memory-mapped Arrow table, (re-)imported first if its legacy file is newer (see ``sync``)."""
+        self.sync(name)
+        return pq.read_table(self.table_file(name), columns=columns, memory_map=True)
+
+    def frame(self, name: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        return self.read(name, columns).to_pandas()
+
+    def iter_records(self, name: str, batch_size: int = 1000) -> Iterator[Dict]:
+        """Table rows as dictionaries with nulls as None, converted one batch at a time."""
+        for batch in self.read(name).to_batches(max_chunksize=batch_size):
+            for row in batch.to_pylist():
+                yield {key: _json_value(value) for key, value in row.items()}
+
+    def records(self, name: str) -> List[Dict]:
+        """Table rows as dictionaries with nulls as None."""
+        return list(self.iter_records(name))
+
+    def import_legacy(self, name: str, path: Optional[str] = None) -> Dict:
+        """Load a table from its legacy JSON/CSV file."""
+        path = self.root / (path or TABLES[name]['source'])
+        if path.suffix == '.json':
+            with open(path, 'r', encoding='utf-8') as f:
+                df = pd.DataFrame(json.load(f))
+        else:
+            df = pd.read_csv(path)
+        source = str(path.relative_to(self.root))
+        entry = self.write(name, df, source=f"import:{source}")
+        # The file the table came from is already current as its view
+        if source in VIEWS:
+            self.manifest['views'][source] = entry['sha256']
+        self._record_file(source)
+        self._save_manifest()
+        return entry
+
+    def is_stale(self, view: str) -> bool:
+        """Whether a view is missing, behind its table, or was edited outside the store."""
+        table = VIEWS[view]['table']
+        return (not (self.root / view).exists()
+                or self.manifest['views'].get(view) != self.manifest['tables'].get(table, {}).get('sha256')
+                or self.file_changed(view))
+
+    def materialise(self, view: str, force: bool = False) -> Path:
+        """Write a legacy view if its table changed since it was last written."""
+        spec = VIEWS[view]
+        path = self.root / view
+        # An edited source file is an input: import it rather than overwrite it
+        if not force and TABLES.get(spec['table'], {}).get('source') == view:
+            self.sync(spec['table'])
+        if not force and not self.is_stale(view):
+            return path
+
+        if spec['format'] == 'csv':
+            df = self.frame(spec['table'])
+            _atomic_write(path, lambda tmp: df.to_csv(tmp, index=False))
+        else:
+            # Streamed from the memory-mapped table; the record list is never built
+            write_records(path, self.iter_records(spec['table']), indent=2)
+
+        self.manifest['views'][view] = self.manifest['tables'][spec['table']]['sha256']
+        self._record_file(view)
+        self._save_manifest()
+        return path
+
+    def materialise_views(self, table: Optional[str] = None, force: bool = False) -> List[Path]:
+        """Refresh the stale views of one table (or all tables)."""
+        return [
+            self.materialise(view, force) for view, spec in VIEWS.items()
+            if table is None or spec['table'] == table
+        ]
+
+
+def main():
+    """Inspect the canonical store or refresh legacy views."""
+    parser = argparse.ArgumentParser(description="Canonical registrar artifact store")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    load = subparsers.add_parser('import', help="Build canonical tables from the current legacy files")
+    load.add_argument('tables', nargs='*', help="Defaults to every table")
+
+    views = subparsers.add_parser('views', help="Write stale legacy views")
+    views.add_argument('--table', help="Only views of this table")
+    views.add_argument('--force', action='store_true', help="Rewrite views even if current")
+
+    subparsers.add_parser('status', help="Show tables and view freshness")
+
+    args = parser.parse_args()
+    store = ArtifactStore()
+
+    if args.command == 'import':
+        for name in args.tables or TABLES:
+            entry = store.import_legacy(name)
+            print(f"  {name}: {entry['rows']} rows, {len(entry['columns'])} columns ({entry['source']})")
+    elif args.command == 'views':
+        for path in store.materialise_views(args.table, args.force):
+            print(f"  {path.relative_to(store.root)}")
+    else:
+        for name, entry in store.manifest['tables'].items():
+            print(f"  {name}: {entry['rows']} rows, written {entry['written_at']} ({entry['source']})")
+        for view in VIEWS:
+            state = 'edited ' if store.file_changed(view) else 'stale  ' if store.is_stale(view) else 'current'
+            print(f"  {state}  {view}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+Content-Hashed Incremental Publishing
+
+Publishes files into public/data/ by content hash. Every artifact gets an
+immutable copy named after its hash (``name.<hash>.json``) that can be
+cached forever, and optionally keeps its stable name for existing URLs.
+Unchanged artifacts are not rewritten, changed ones are written atomically
+(temporary file + rename), and publish-manifest.json maps each artifact to
+its hashed file and lists what changed in the last publish, so a deploy
+uploads and invalidates only those files. Artifacts a run no longer
+publishes (e.g. the shard of a provider that disappeared) are retired from
+the manifest, and their files are deleted once no kept manifest version
+refers to them.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Set
+
+# Resolved from the repository root, since callers run from different directories
+REPO_ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_PUBLIC_ROOT = REPO_ROOT / "public" / "data"
+MANIFEST_NAME = "publish-manifest.json"
+HASH_LENGTH = 12
+
+
+def atomic_write_bytes(path: Path, data: bytes):
+    """Write through a temporary file so readers never see a partial file."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.tmp")
+    with open(tmp, 'wb') as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def write_if_changed(path: Path, data: bytes) -> bool:
+    """Atomically write ``data`` unless the file already holds exactly it."""
+    path = Path(path)
+    if path.exists() and path.stat().st_size == len(data) and path.read_bytes() == data:
+        return False
+    atomic_write_bytes(path, data)
+    return True
+
+
+def dump_json(data, indent: Optional[int] = 2) -> bytes:
+    """JSON bytes as the pipeline writes them (indented, or compact with indent=None)."""
+    separators = (',', ':') if indent is None else None
+    return json.dumps(data, indent=indent, ensure_ascii=False, separators=separators).encode('utf-8')
+
+
+def hashed_name(name: str, digest: str) -> str:
+    """``dir/page-0001.json.gz`` -> ``dir/page-0001.<hash>.json.gz``"""
+    path = Path(name)
+    stem, _, extensions = path.name.partition('.')
+    return (path.parent / f"{stem}.{digest[:HASH_LENGTH]}.{extensions}").as_posix()
+
+
+class ContentPublisher:
+    """Hash-addressed, skip-if-unchanged writer for the public data tree."""
+
+    def __init__(self, root: Path = DEFAULT_PUBLIC_ROOT, keep_versions: int = 1):
+        """
+        Args:
+            root: Public data directory; artifact names are relative to it
+            keep_versions: Superseded hashed files kept per artifact for
+                clients still holding an older manifest
+        """
+        self.root = Path(root)
+        self.keep_versions = keep_versions
+        self.manifest_file = self.root / MANIFEST_NAME
+        self.manifest = self._load_manifest()
+        self.manifest.setdefault('retired', {})
+        self.changed: List[str] = []
+        self.published: Set[str] = set()
+        self.retired: List[str] = []
+        self.stats = Counter()
+
+    def _load_manifest(self) -> Dict:
+        if self.manifest_file.exists():
+            with open(self.manifest_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        return {'files': {}}
+
+    def publish(self, name: str, data: bytes, stable: bool = True,
+                variants: Optional[Dict[str, bytes]] = None) -> Dict:
+        """
+        Publish one artifact.
+
+        Args:
+            name: Path relative to the public root, e.g. ``processed/x.json``
+            data: File content
+            stable: Also keep the file under its unhashed name
+            variants: Extra suffix -> content (e.g. ``'.gz'``) written next to
+                the hashed file under the same hash
+
+        Returns:
+            The artifact's manifest entry (``file`` is the hashed path)
+        """
+        self.published.add(name)
+        digest = hashlib.sha256(data).hexdigest()
+        variants = variants or {}
+        file = hashed_name(name, digest)
+        previous = self.manifest['files'].get(name)
+        retired = self.manifest['retired'].pop(name, None)
+
+        hashed = {self.root / file: data}
+        hashed.update({self.root / (file + suffix): content for suffix, content in variants.items()})
+        unhashed = {}
+        if stable:
+            unhashed[self.root / name] = data
+            unhashed.update({self.root / (name + suffix): content for suffix, content in variants.items()})
+
+        if previous and previous['sha256'] == digest and set(previous.get('variants', {})) == set(variants) \
+                and all(path.exists() for path in [*hashed, *unhashed]):
+            self.stats['unchanged'] += 1
+            return previous
+
+        # Hashed files are immutable: an existing one already holds this content
+        for path, content in hashed.items():
+            if not path.exists():
+                atomic_write_bytes(path, content)
+        for path, content in unhashed.items():
+            write_if_changed(path, content)
+
+        history = []
+        if previous:
+            history = [old for old in [previous['file']] + previous.get('history', []) if old != file]
+        elif retired:
+            history = [old for old in retired['history'] if old != file]
+        entry = {
+            'file': file,
+            'sha256': digest,
+            'bytes': len(data),
+            'variants': {suffix: len(content) for suffix, content in variants.items()},
+            'stable': stable,
+            'published_at': datetime.now().isoformat(),
+            'history': history,
+        }
+        self.manifest['files'][name] = entry
+        self.changed.append(name)
+        self.stats['changed'] += 1
+        return entry
+
+    def publish_json(self, name: str, data, indent: Optional[int] = 2, stable: bool = True) -> Dict:
+        return self.publish(name, dump_json(data, indent), stable=stable)
+
+    def publish_file(self, source: Path, name: str, stable: bool = True) -> Dict:
+        return self.publish(name, Path(source).read_bytes(), stable=stable)
+
+    def retire_unpublished(self, prefix: str) -> List[str]:
+        """
+        Retire manifest entries under ``prefix`` not published in this run.
+
+        Call once everything under ``prefix`` has been published. A retired
+        artifact's files are kept for ``keep_versions`` more publishes, for
+        clients still holding an older manifest, and then deleted.
+
+        Returns:
+            The retired artifact names
+        """
+        for name in sorted(self.manifest['files']):
+            if name.startswith(prefix) and name not in self.published:
+                entry = self.manifest['files'].pop(name)
+                self.manifest['retired'][name] = {
+                    'history': [entry['file']] + entry.get('history', []),
+                    'variants': entry.get('variants', {}),
+                    'stable': entry.get('stable', False),
+                    'retired_at': datetime.now().isoformat(),
+                    'publishes_left': self.keep_versions,
+                }
+                self.retired.append(name)
+        return self.retired
+
+    def _delete(self, files: List[str], variants: Dict) -> List[str]:
+        removed = []
+        for file in files:
+            for suffix in [''] + list(variants):
+                path = self.root / (file + suffix)
+                if path.exists():
+                    path.unlink()
+                    removed.append(file + suffix)
+        return removed
+
+    def prune(self) -> List[str]:
+        """
+        Delete hashed files superseded more than ``keep_versions`` publishes
+        ago, and the files of artifacts retired that long ago.
+        """
+        removed = []
+        for name, entry in self.manifest['files'].items():
+            removed += self._delete(entry.get('history', [])[self.keep_versions:], entry.get('variants', {}))
+            entry['history'] = entry.get('history', [])[:self.keep_versions]
+
+        for name, entry in list(self.manifest['retired'].items()):
+            if name not in self.retired:
+                entry['publishes_left'] -= 1
+            keep = self.keep_versions if entry['publishes_left'] > 0 else 0
+            removed += self._delete(entry['history'][keep:], entry['variants'])
+            entry['history'] = entry['history'][:keep]
+            if not keep:
+                if entry['stable']:
+                    removed += self._delete([name], entry['variants'])
+                del self.manifest['retired'][name]
+        return removed
+
+    def save(self) -> List[str]:
+        """Write the manifest if anything changed; returns the changed artifact names."""
+        if self.changed or self.retired:
+            self.prune()
+            self.manifest['published_at'] = datetime.now().isoformat()
+            self.manifest['changed'] = sorted(set(self.changed))
+            write_if_changed(self.manifest_file, dump_json(self.manifest))
+        return self.changed
+
+
+def main():
+    """Publish files into the public data tree, or show what the last publish changed."""
+    parser = argparse.ArgumentParser(description="Content-hashed publishing to public/data")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    publish = subparsers.add_parser('publish', help="Publish files (paths relative to the repository root)")
+    publish.add_argument('files', nargs='+')
+    publish.add_argument('--dest', default='processed', help="Directory under public/data")
+
+    subparsers.add_parser('changed', help="List artifacts changed by the last publish")
+
+    args = parser.parse_args()
+    publisher = ContentPublisher()
+
+    if args.command == 'publish':
+        for file in args.files:
+            entry = publisher.publish_file(Path(file), f"{args.dest}/{Path(file).name}")
+            print(f"  {file} -> {entry['file']}")
+        changed = publisher.save()
+        print(f"{len(changed)} changed, {publisher.stats['unchanged']} unchanged")
+    else:
+        for name in publisher.manifest.get('changed', []):
+            print(f"  {name} -> {publisher.manifest['files'][name]['file']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -11,29 +11,20 @@ import json
 from datetime import datetime
 from typing import Dict, List, Optional
 
-# Registry Gateway registrars with domain counts
-REGISTRY_GATEWAY_REGISTRARS = [
-    {"iana_id": 303, "name": "PDR Ltd. d/b/a PublicDomainRegistry.com", "domains": 4845099},
-    {"iana_id": 955, "name": "Launchpad.com Inc.", "domains": 729662},
-    {"iana_id": 1636, "name": "Hostinger, UAB", "domains": 590290},
-    {"iana_id": 1495, "name": "BigRock Solutions Ltd.", "domains": 276454},
-    {"iana_id": 1091, "name": "IHS Telekom, Inc.", "domains": 160821},
-    {"iana_id": 1005, "name": "NetEarth One Inc. d/b/a NetEarth", "domains": 142479},
-    {"iana_id": 609, "name": "Sav.com, LLC", "domains": 135595},
-    {"iana_id": 1586, "name": "MAT BAO CORPORATION", "domains": 134504},
-    {"iana_id": 3806, "name": "Beget LLC", "domains": 103122},
-    {"iana_id": 1600, "name": "Tecnocrática Centro de Datos, S.L.", "domains": 101516},
-    {"iana_id": 1432, "name": "Alpine Domains Inc.", "domains": 81068},
-    {"iana_id": 1534, "name": "Aerotek Bilisim Sanayi ve Ticaret AS", "domains": 80389},
-    {"iana_id": 819, "name": "Reg2C.com Inc.", "domains": 75272},
-    {"iana_id": 1483, "name": "Neubox Internet S.A. de C.V.", "domains": 62661},
-    {"iana_id": 1710, "name": "Nhan Hoa Software Company Ltd.", "domains": 57102},
-    {"iana_id": 1112, "name": "Internet Invest, Ltd. dba Imena.ua", "domains": 47650},
-    {"iana_id": 1913, "name": "DOTSERVE INC.", "domains": 41645},
-    {"iana_id": 1895, "name": "Namespro Solutions Inc.", "domains": 38321},
-    {"iana_id": 1082, "name": "Register4Less, Inc.", "domains": 33943},
-    {"iana_id": 1660, "name": "Domainshype.com, LLC", "domains": 33214}
-]
+from json_stream import write_records
+from reference_store import get_reference_store
+
+def load_registry_gateway_registrars() -> List[Dict]:
+    """
+    Registry Gateway registrars with domain counts, from the reference store
+    
+    Returns:
+        List of registrar dictionaries with iana_id, name, and domains
+    """
+    return [
+        {"iana_id": r["iana_id"], "name": r["name"], "domains": r["domains"]}
+        for r in get_reference_store().list_members("registry_gateway")
+    ]
 
 def fetch_registrar_data(iana_id: int) -> Optional[Dict]:
     """
@@ -144,7 +135,7 @@ def save_results(df: pd.DataFrame):
     
     # Save to JSON
     json_path = "../data/enriched_registrars.json"
-    df.to_json(json_path, orient="records", indent=2)
+    write_records(json_path, (dict(zip(df.columns, row)) for row in df.itertuples(index=False, name=None)), indent=2)
     print(f"✓ Saved to JSON: {json_path}")
     
     # Save summary statistics
@@ -172,11 +163,12 @@ def main():
     print("=" * 50)
     print(f"Service Provider: LogicBoxes")
     print(f"RDAP URL: rdapserver.net")
-    print(f"Registrars to process: {len(REGISTRY_GATEWAY_REGISTRARS)}")
+    registry_gateway_registrars = load_registry_gateway_registrars()
+    print(f"Registrars to process: {len(registry_gateway_registrars)}")
     print("=" * 50 + "\n")
     
     # Enrich data
-    enriched_df = enrich_registrar_data(REGISTRY_GATEWAY_REGISTRARS)
+    enriched_df = enrich_registrar_data(registry_gateway_registrars)
     
     # Display summary
     print("\n" + "=" * 50)
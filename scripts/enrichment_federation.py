@@ -0,0 +1,358 @@
+#!/usr/bin/env python3
+"""
+Registrar Enrichment Federation
+
+Registrar enrichment draws on several sources: the ICANN lookup API, the
+known-registrar reference store and website inference from registrar names.
+The federation queries all of them concurrently for each registrar, each
+behind its own cache and timeout, then merges the answers field by field
+under a declared precedence policy and records which source supplied each
+field. Per-registrar latency is the slowest source, not the sum.
+"""
+
+import asyncio
+import json
+import sys
+import time
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import aiohttp
+import pandas as pd
+
+from enrich_logicboxes_websites import LogicBoxesWebsiteEnricher
+from rdap_bulk_lookup import HostScheduler
+from reference_store import ReferenceStore, get_reference_store
+from registrar_name_index import RegistrarNameIndex
+
+ICANN_API_BASE = "https://lookup.icann.org/api/registrar/"
+ICANN_HEADERS = {
+    'User-Agent': 'rdap-registry-analysis/1.0 (registrar enrichment)'
+}
+
+# Source order per field, most trusted first; '*' applies to unlisted fields
+DEFAULT_PRECEDENCE = {
+    '*': ['icann', 'reference', 'name_pattern'],
+    'website': ['icann', 'reference', 'name_pattern'],
+    'notes': ['reference'],
+}
+
+# website_source tag written for each source that can supply a website
+WEBSITE_SOURCE_TAGS = {
+    'icann': 'icann_api',
+    'reference': 'known_mapping',
+    'name_pattern': 'name_pattern',
+}
+
+MISSING_VALUES = (None, '', 'N/A')
+
+
+def parse_icann_response(data: Dict) -> Dict:
+    """Parse ICANN lookup API response to extract contact information."""
+    parsed = {}
+    fields = {
+        'name': 'website_name', 'url': 'website', 'email': 'email', 'phone': 'phone',
+        'fax': 'fax', 'whoisServer': 'whois_server', 'referralUrl': 'referral_url',
+        'status': 'status'
+    }
+    for key, field in fields.items():
+        if key in data:
+            parsed[field] = data[key]
+
+    address_fields = {
+        'street': 'street', 'city': 'city', 'state': 'state',
+        'postalCode': 'postal_code', 'country': 'country'
+    }
+    address = data.get('address') or {}
+    for key, field in address_fields.items():
+        if key in address:
+            parsed[field] = address[key]
+
+    abuse_contact = data.get('abuseContact') or {}
+    if 'email' in abuse_contact:
+        parsed['abuse_email'] = abuse_contact['email']
+    if 'phone' in abuse_contact:
+        parsed['abuse_phone'] = abuse_contact['phone']
+
+    return parsed
+
+
+class EnrichmentSource:
+    """One enrichment source with a TTL cache and a per-lookup timeout."""
+
+    name = 'source'
+
+    def __init__(self, timeout: float = 10.0, cache_ttl: float = 3600.0):
+        self.timeout = timeout
+        self.cache_ttl = cache_ttl
+        self._cache: Dict[Tuple, Tuple[float, Optional[Dict]]] = {}
+        self.stats = Counter()
+
+    def cache_key(self, registrar: Dict) -> Tuple:
+        return (registrar.get('iana_id'),)
+
+    async def open(self):
+        """Acquire resources (sessions, connections) before a batch."""
+
+    async def close(self):
+        """Release resources after a batch."""
+
+    def prefetch(self, registrars: List[Dict]):
+        """Optionally answer a whole batch up front and fill the cache."""
+
+    def _remember(self, registrar: Dict, data: Optional[Dict]):
+        self._cache[self.cache_key(registrar)] = (time.monotonic() + self.cache_ttl, data)
+
+    async def fetch(self, registrar: Dict) -> Optional[Dict]:
+        """Fields this source knows about ``registrar``, or None."""
+        raise NotImplementedError
+
+    async def lookup(self, registrar: Dict) -> Tuple[str, Optional[Dict], float]:
+        """
+        Cached, time-limited fetch.
+
+        Returns:
+            (status, data, latency) where status is one of cached, ok, empty,
+            timeout or error
+        """
+        start = time.monotonic()
+        cached = self._cache.get(self.cache_key(registrar))
+        if cached is not None and cached[0] > start:
+            self.stats['cached'] += 1
+            return 'cached', cached[1], 0.0
+
+        try:
+            data = await asyncio.wait_for(self.fetch(registrar), self.timeout)
+        except asyncio.TimeoutError:
+            status, data = 'timeout', None
+        except (aiohttp.ClientError, OSError, ValueError) as e:
+            status, data = 'error', None
+            self.stats[f"error:{type(e).__name__}"] += 1
+        else:
+            status = 'ok' if data else 'empty'
+            self._remember(registrar, data)
+
+        self.stats[status] += 1
+        return status, data, time.monotonic() - start
+
+
+class ICANNSource(EnrichmentSource):
+    """Registrar contact data from the ICANN lookup API."""
+
+    name = 'icann'
+
+    def __init__(self, api_base: str = ICANN_API_BASE, rate: float = 2.0, concurrency: int = 4,
+                 timeout: float = 10.0, cache_ttl: float = 86400.0, rate_limiter=None,
+                 max_retries: int = 2):
+        """
+        Args:
+            rate_limiter: Object with ``wait_for_slot``/``back_off`` shared beyond
+                this source (defaults to a per-batch ``HostScheduler``)
+            max_retries: Retries after an HTTP 429, each after backing off
+        """
+        super().__init__(timeout=timeout, cache_ttl=cache_ttl)
+        self.api_base = api_base
+        self.rate = rate
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self.rate_limiter = rate_limiter
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._scheduler: Optional[HostScheduler] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+
+    async def open(self):
+        self._scheduler = self.rate_limiter or HostScheduler(self.api_base, self.concurrency, self.rate)
+        self._slots = asyncio.Semaphore(self.concurrency)
+        connector = aiohttp.TCPConnector(limit=self.concurrency, ttl_dns_cache=300)
+        self._session = aiohttp.ClientSession(connector=connector, headers=ICANN_HEADERS)
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+        self._session = None
+
+    async def fetch(self, registrar: Dict) -> Optional[Dict]:
+        iana_id = registrar.get('iana_id')
+        if iana_id is None or pd.isna(iana_id):
+            return None
+        async with self._slots:
+            for attempt in range(self.max_retries + 1):
+                await self._scheduler.wait_for_slot()
+                async with self._session.get(f"{self.api_base}{int(iana_id)}") as response:
+                    if response.status == 429 and attempt < self.max_retries:
+                        retry_after = response.headers.get('Retry-After', '')
+                        await self._scheduler.back_off(float(retry_after) if retry_after.isdigit() else 2.0 ** attempt)
+                        continue
+                    if response.status == 404:
+                        return None
+                    # A 429 or 5xx says nothing about the registrar: report an
+                    # error, which is neither cached nor counted as empty
+                    response.raise_for_status()
+                    text = await response.text()
+                break
+        if not text.strip():
+            return None
+        return parse_icann_response(json.loads(text))
+
+
+class ReferenceSource(EnrichmentSource):
+    """Curated data from the known-registrar reference store."""
+
+    name = 'reference'
+
+    def __init__(self, store: Optional[ReferenceStore] = None, match_names: bool = True,
+                 min_name_score: float = 0.85, timeout: float = 1.0, cache_ttl: float = 3600.0):
+        """
+        Args:
+            store: Reference store (defaults to the process-wide store)
+            match_names: Fall back to fuzzy name matching when the IANA id has no entry
+            min_name_score: Minimum name-match score for that fallback
+        """
+        super().__init__(timeout=timeout, cache_ttl=cache_ttl)
+        self.store = store or get_reference_store()
+        self.min_name_score = min_name_score
+        self.name_index = RegistrarNameIndex(
+            (record['iana_id'], record['name']) for record in self.store.all() if record['name']
+        ) if match_names else None
+
+    def cache_key(self, registrar: Dict) -> Tuple:
+        return (registrar.get('iana_id'), registrar.get('name'))
+
+    async def fetch(self, registrar: Dict) -> Optional[Dict]:
+        known = self.store.get(registrar.get('iana_id'))
+        if known is None and self.name_index is not None and isinstance(registrar.get('name'), str):
+            match = self.name_index.best_match(registrar['name'], min_score=self.min_name_score)
+            known = self.store.get(match['key']) if match else None
+        if known is None:
+            return None
+        return {field: known[field] for field in ('website', 'whois_server', 'status', 'notes') if known[field]}
+
+
+class NamePatternSource(EnrichmentSource):
+    """Websites inferred from registrar names."""
+
+    name = 'name_pattern'
+
+    def __init__(self, timeout: float = 1.0, cache_ttl: float = 3600.0):
+        super().__init__(timeout=timeout, cache_ttl=cache_ttl)
+
+    def cache_key(self, registrar: Dict) -> Tuple:
+        return (registrar.get('name'),)
+
+    @staticmethod
+    def _row(inferred: Dict) -> Optional[Dict]:
+        if pd.isna(inferred['website']):
+            return None
+        return {
+            'website': inferred['website'],
+            'website_confidence': inferred['website_confidence'],
+            'website_rule': inferred['website_rule'],
+        }
+
+    def prefetch(self, registrars: List[Dict]):
+        """Infer every name in one columnar pass."""
+        names = pd.Series([r.get('name') for r in registrars], dtype=object)
+        inferred = LogicBoxesWebsiteEnricher.infer_websites(names)
+        for registrar, row in zip(registrars, inferred.to_dict('records')):
+            self._remember(registrar, self._row(row))
+
+    async def fetch(self, registrar: Dict) -> Optional[Dict]:
+        inferred = LogicBoxesWebsiteEnricher.infer_websites(pd.Series([registrar.get('name')], dtype=object))
+        return self._row(inferred.to_dict('records')[0])
+
+
+class EnrichmentFederation:
+    """Concurrent fan-out over enrichment sources with a precedence merge."""
+
+    def __init__(self, sources: Optional[List[EnrichmentSource]] = None,
+                 precedence: Optional[Dict[str, List[str]]] = None, concurrency: int = 32):
+        """
+        Args:
+            sources: Sources to query (defaults to ICANN, reference store and name patterns)
+            precedence: Field -> source names, most trusted first ('*' for the default)
+            concurrency: Registrars enriched at once
+        """
+        self.sources = sources if sources is not None else [ICANNSource(), ReferenceSource(), NamePatternSource()]
+        self.precedence = {**DEFAULT_PRECEDENCE, **(precedence or {})}
+        self.concurrency = concurrency
+
+    def merge(self, answers: Dict[str, Optional[Dict]]) -> Tuple[Dict, Dict[str, str]]:
+        """Pick each field from the highest-precedence source that supplied it."""
+        merged: Dict = {}
+        provenance: Dict[str, str] = {}
+        fields = {field for data in answers.values() if data for field in data}
+        for field in sorted(fields):
+            order = self.precedence.get(field, self.precedence['*'])
+            # website_* detail fields follow whichever source won the website
+            if field.startswith('website_') and field != 'website_name' and 'website' in provenance:
+                order = [provenance['website']]
+            for source in order:
+                value = (answers.get(source) or {}).get(field)
+                if value not in MISSING_VALUES:
+                    merged[field] = value
+                    provenance[field] = source
+                    break
+
+        if 'website' in provenance:
+            merged['website_source'] = WEBSITE_SOURCE_TAGS.get(provenance['website'], provenance['website'])
+        return merged, provenance
+
+    async def enrich(self, registrar: Dict) -> Dict:
+        """Query every source for one registrar and merge the answers."""
+        results = await asyncio.gather(*(source.lookup(registrar) for source in self.sources))
+        answers = {}
+        source_status = {}
+        for source, (status, data, latency) in zip(self.sources, results):
+            answers[source.name] = data
+            source_status[source.name] = {'status': status, 'latency_ms': round(latency * 1000, 1)}
+
+        merged, provenance = self.merge(answers)
+        merged['provenance'] = provenance
+        merged['source_status'] = source_status
+        return merged
+
+    async def enrich_many(self, registrars: Iterable[Dict]) -> List[Dict]:
+        """Enrich a batch of registrars, keeping input order."""
+        registrars = list(registrars)
+        slots = asyncio.Semaphore(self.concurrency)
+
+        async def bounded(registrar: Dict) -> Dict:
+            async with slots:
+                return await self.enrich(registrar)
+
+        for source in self.sources:
+            source.prefetch(registrars)
+            await source.open()
+        try:
+            return await asyncio.gather(*(bounded(registrar) for registrar in registrars))
+        finally:
+            for source in self.sources:
+                await source.close()
+
+    def enrich_all(self, registrars: Iterable[Dict]) -> List[Dict]:
+        """Synchronous wrapper around ``enrich_many``."""
+        return asyncio.run(self.enrich_many(registrars))
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        return {source.name: dict(source.stats) for source in self.sources}
+
+
+def main():
+    """Enrich the registrars given by IANA id on the command line."""
+    if len(sys.argv) < 2:
+        print("Usage: python scripts/enrichment_federation.py <iana_id> [...]")
+        sys.exit(1)
+
+    store = get_reference_store()
+    registrars = []
+    for value in sys.argv[1:]:
+        known = store.get(value) or {}
+        registrars.append({'iana_id': int(value), 'name': known.get('name')})
+
+    federation = EnrichmentFederation()
+    for result in federation.enrich_all(registrars):
+        print(json.dumps(result, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,447 @@
+#!/usr/bin/env python3
+"""
+Sharded Multi-Process Registrar Enrichment
+
+Splits registrar enrichment across worker processes on one machine through
+a durable SQLite work queue. Workers lease batches of registrars, keep the
+lease alive with a heartbeat while they run the enrichment federation, and
+append results to their own shard file. Leases of crashed workers expire and
+are handed to other workers. All workers share one ICANN request-rate budget
+through a rate-limit row in the same database, and the shards are merged
+into one output at the end. No broker or server is needed.
+
+The queue is single-host only: it runs SQLite in WAL mode, which needs shared
+memory and does not work over a network filesystem, and lease expiry and the
+rate limit compare each process's wall clock.
+"""
+
+import argparse
+import asyncio
+import csv
+import json
+import multiprocessing
+import os
+import socket
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import pandas as pd
+
+from json_stream import JSONStreamWriter, decode_line, encode_record
+
+DEFAULT_QUEUE_FILE = Path("data/processed/enrichment_queue.db")
+DEFAULT_SHARD_DIR = Path("data/processed/enrichment_shards")
+DEFAULT_OUTPUT_FILE = Path("data/processed/registrars_enriched.json")
+
+# Worker bookkeeping written to shards but not to the merged output
+SHARD_ONLY_COLUMNS = ('batch_id', 'worker', 'finished_at', 'source_status')
+
+QUEUE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS batches (
+    batch_id INTEGER PRIMARY KEY,
+    payload TEXT NOT NULL,
+    state TEXT NOT NULL DEFAULT 'pending',
+    worker TEXT,
+    lease_expires REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    updated_at REAL
+);
+CREATE INDEX IF NOT EXISTS batches_state ON batches (state, lease_expires);
+CREATE TABLE IF NOT EXISTS rate_limits (
+    name TEXT PRIMARY KEY,
+    next_slot REAL NOT NULL
+);
+"""
+
+
+def _connect(db_file: Path) -> sqlite3.Connection:
+    """Open the queue database for use by several processes on this host."""
+    conn = sqlite3.connect(str(db_file), timeout=30, isolation_level=None, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA busy_timeout=30000")
+    return conn
+
+
+class WorkQueue:
+    """Durable batch queue with leases, heartbeats and retry limits."""
+
+    def __init__(self, db_file: Path = DEFAULT_QUEUE_FILE, max_attempts: int = 3):
+        self.db_file = Path(db_file)
+        self.db_file.parent.mkdir(parents=True, exist_ok=True)
+        self.max_attempts = max_attempts
+        self.conn = _connect(self.db_file)
+        self.conn.executescript(QUEUE_SCHEMA)
+
+    def enqueue(self, items: Iterable[Dict], batch_size: int = 25) -> int:
+        """Add items to the queue in batches; returns the number of batches."""
+        batches = []
+        batch: List[Dict] = []
+        for item in items:
+            batch.append(item)
+            if len(batch) == batch_size:
+                batches.append(batch)
+                batch = []
+        if batch:
+            batches.append(batch)
+
+        now = time.time()
+        self.conn.execute("BEGIN IMMEDIATE")
+        self.conn.executemany(
+            "INSERT INTO batches (payload, updated_at) VALUES (?, ?)",
+            [(json.dumps(b, default=str), now) for b in batches]
+        )
+        self.conn.execute("COMMIT")
+        return len(batches)
+
+    def lease(self, worker: str, lease_seconds: float = 60.0) -> Optional[Dict]:
+        """
+        Claim the next pending batch, or one whose lease has expired.
+        Expired leases that used up max_attempts are marked failed.
+
+        Returns:
+            Dictionary with batch_id and items, or None when nothing is leasable
+        """
+        now = time.time()
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            # A worker that crashed on the last allowed attempt leaves nothing to retry
+            self.conn.execute(
+                "UPDATE batches SET state = 'failed', lease_expires = NULL, "
+                "error = COALESCE(error, 'lease expired'), updated_at = ? "
+                "WHERE state = 'leased' AND lease_expires < ? AND attempts >= ?",
+                (now, now, self.max_attempts)
+            )
+            row = self.conn.execute(
+                "SELECT batch_id, payload FROM batches "
+                "WHERE (state = 'pending' OR (state = 'leased' AND lease_expires < ?)) AND attempts < ? "
+                "ORDER BY batch_id LIMIT 1",
+                (now, self.max_attempts)
+            ).fetchone()
+            if row is None:
+                self.conn.execute("COMMIT")
+                return None
+            self.conn.execute(
+                "UPDATE batches SET state = 'leased', worker = ?, lease_expires = ?, "
+                "attempts = attempts + 1, updated_at = ? WHERE batch_id = ?",
+                (worker, now + lease_seconds, now, row['batch_id'])
+            )
+            self.conn.execute("COMMIT")
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        return {'batch_id': row['batch_id'], 'items': json.loads(row['payload'])}
+
+    def heartbeat(self, batch_id: int, worker: str, lease_seconds: float = 60.0) -> bool:
+        """Extend a lease; False means the lease was lost to another worker."""
+        now = time.time()
+        cursor = self.conn.execute(
+            "UPDATE batches SET lease_expires = ?, updated_at = ? "
+            "WHERE batch_id = ? AND worker = ? AND state = 'leased'",
+            (now + lease_seconds, now, batch_id, worker)
+        )
+        return cursor.rowcount == 1
+
+    def complete(self, batch_id: int, worker: str) -> bool:
+        """Mark a leased batch done; False if the lease had been lost."""
+        cursor = self.conn.execute(
+            "UPDATE batches SET state = 'done', lease_expires = NULL, updated_at = ? "
+            "WHERE batch_id = ? AND worker = ? AND state = 'leased'",
+            (time.time(), batch_id, worker)
+        )
+        return cursor.rowcount == 1
+
+    def fail(self, batch_id: int, worker: str, error: str):
+        """Release a batch after an error; it is retried until max_attempts."""
+        self.conn.execute(
+            "UPDATE batches SET state = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, "
+            "lease_expires = NULL, error = ?, updated_at = ? "
+            "WHERE batch_id = ? AND worker = ? AND state = 'leased'",
+            (self.max_attempts, error, time.time(), batch_id, worker)
+        )
+
+    def progress(self) -> Dict[str, int]:
+        """Batch counts by state; expired leases count as 'expired'."""
+        rows = self.conn.execute(
+            "SELECT CASE WHEN state = 'leased' AND lease_expires < ? THEN 'expired' ELSE state END AS state, "
+            "COUNT(*) AS batches FROM batches GROUP BY 1",
+            (time.time(),)
+        ).fetchall()
+        return {row['state']: row['batches'] for row in rows}
+
+    def close(self):
+        self.conn.close()
+
+
+class SharedRateLimiter:
+    """
+    Request-rate cap shared by every process using the same queue database.
+
+    Has the ``wait_for_slot``/``back_off`` interface of ``HostScheduler``, so
+    it can stand in for an enrichment source's per-process limiter.
+    """
+
+    def __init__(self, db_file: Path, name: str, rate: float):
+        self.db_file = Path(db_file)
+        self.name = name
+        self.rate = rate
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _reserve(self, not_before: float = 0.0, interval: Optional[float] = None) -> float:
+        """Atomically take the next slot and return its time."""
+        with self._lock:
+            if self._conn is None:
+                self._conn = _connect(self.db_file)
+                self._conn.executescript(QUEUE_SCHEMA)
+            conn = self._conn
+            now = time.time()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute("SELECT next_slot FROM rate_limits WHERE name = ?", (self.name,)).fetchone()
+                slot = max(now, not_before, row['next_slot'] if row else 0.0)
+                step = 1.0 / self.rate if interval is None else interval
+                conn.execute(
+                    "INSERT OR REPLACE INTO rate_limits (name, next_slot) VALUES (?, ?)",
+                    (self.name, slot + step)
+                )
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            return slot
+
+    async def wait_for_slot(self):
+        """Wait for this process's share of the global rate."""
+        if self.rate <= 0:
+            return
+        slot = await asyncio.to_thread(self._reserve)
+        delay = slot - time.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    async def back_off(self, seconds: float):
+        """Push every process's next slot out, e.g. after an HTTP 429."""
+        await asyncio.to_thread(self._reserve, time.time() + seconds, 0.0)
+
+
+class _Heartbeat(threading.Thread):
+    """Background lease renewal for the batch a worker is processing."""
+
+    def __init__(self, queue: WorkQueue, batch_id: int, worker: str, lease_seconds: float):
+        super().__init__(daemon=True)
+        self.queue = queue
+        self.batch_id = batch_id
+        self.worker = worker
+        self.lease_seconds = lease_seconds
+        self.lost = False
+        self._stopped = threading.Event()
+
+    def run(self):
+        while not self._stopped.wait(self.lease_seconds / 3):
+            if not self.queue.heartbeat(self.batch_id, self.worker, self.lease_seconds):
+                self.lost = True
+                return
+
+    def stop(self):
+        self._stopped.set()
+        self.join()
+
+
+def run_worker(queue_file: Path = DEFAULT_QUEUE_FILE, shard_dir: Path = DEFAULT_SHARD_DIR,
+               worker: Optional[str] = None, lease_seconds: float = 60.0,
+               icann_rate: float = 2.0, icann_api: Optional[str] = None,
+               idle_exit: bool = True) -> int:
+    """
+    Process batches until the queue is drained.
+
+    Returns:
+        Number of batches this worker completed
+    """
+    from enrichment_federation import ICANN_API_BASE, EnrichmentFederation, ICANNSource, NamePatternSource, \
+        ReferenceSource
+
+    worker = worker or f"{socket.gethostname()}-{os.getpid()}"
+    queue = WorkQueue(queue_file)
+    icann = ICANNSource(api_base=icann_api or ICANN_API_BASE, rate=icann_rate,
+                        rate_limiter=SharedRateLimiter(queue_file, 'icann', icann_rate))
+    federation = EnrichmentFederation(sources=[icann, ReferenceSource(), NamePatternSource()])
+
+    shard_dir = Path(shard_dir)
+    shard_dir.mkdir(parents=True, exist_ok=True)
+    shard_file = shard_dir / f"shard-{worker}.ndjson"
+    completed = 0
+
+    with open(shard_file, 'ab') as shard:
+        while True:
+            batch = queue.lease(worker, lease_seconds)
+            if batch is None:
+                if idle_exit and not queue.progress().get('leased'):
+                    break
+                time.sleep(min(5.0, lease_seconds / 3))
+                continue
+
+            heartbeat = _Heartbeat(queue, batch['batch_id'], worker, lease_seconds)
+            heartbeat.start()
+            try:
+                results = federation.enrich_all(batch['items'])
+            except Exception as e:
+                heartbeat.stop()
+                queue.fail(batch['batch_id'], worker, f"{type(e).__name__}: {e}")
+                continue
+            heartbeat.stop()
+
+            if heartbeat.lost:
+                continue  # another worker owns the batch now
+
+            finished_at = time.time()
+            for item, result in zip(batch['items'], results):
+                record = {**item, **result, 'batch_id': batch['batch_id'], 'worker': worker,
+                          'finished_at': finished_at}
+                shard.write(encode_record(record) + b'\n')
+            shard.flush()
+            os.fsync(shard.fileno())
+
+            if queue.complete(batch['batch_id'], worker):
+                completed += 1
+
+    queue.close()
+    return completed
+
+
+def _worker_entry(kwargs: Dict):
+    completed = run_worker(**kwargs)
+    print(f"Worker {os.getpid()} completed {completed} batches")
+
+
+def run_workers(processes: int, **kwargs) -> Dict[str, int]:
+    """Run ``processes`` local workers against the queue and wait for them."""
+    workers = [multiprocessing.Process(target=_worker_entry, args=(kwargs,)) for _ in range(processes)]
+    for process in workers:
+        process.start()
+    for process in workers:
+        process.join()
+    return WorkQueue(kwargs.get('queue_file', DEFAULT_QUEUE_FILE)).progress()
+
+
+def _latest_records(shard_files: List[Path]) -> Tuple[Dict, List[str]]:
+    """
+    One pass over the shards, keeping only where each IANA id's latest
+    record is: iana_id -> (finished_at, shard index, byte offset).
+
+    Returns:
+        That index and the merged records' columns in first-seen order
+    """
+    latest: Dict = {}
+    columns: Dict[str, None] = {}
+    for shard, shard_file in enumerate(shard_files):
+        offset = 0
+        with open(shard_file, 'rb') as f:
+            for line in f:
+                start, offset = offset, offset + len(line)
+                if not line.strip():
+                    continue
+                try:
+                    record = decode_line(line)
+                except ValueError:
+                    continue  # a torn last line from a crashed worker
+                columns.update(dict.fromkeys(record))
+                finished_at = record.get('finished_at') or 0
+                previous = latest.get(record.get('iana_id'))
+                if previous is None or finished_at >= previous[0]:
+                    latest[record.get('iana_id')] = (finished_at, shard, start)
+    return latest, [c for c in columns if c not in SHARD_ONLY_COLUMNS]
+
+
+def merge_shards(shard_dir: Path = DEFAULT_SHARD_DIR, output_file: Path = DEFAULT_OUTPUT_FILE) -> int:
+    """
+    Merge shard files into one JSON output (plus CSV), keeping the latest
+    result per IANA id when a re-leased batch was written twice.
+
+    Only the position of each id's latest record is held in memory; the
+    records themselves are read back one at a time, in IANA id order, and
+    streamed into both outputs.
+
+    Returns:
+        Number of registrars written
+    """
+    shard_files = sorted(Path(shard_dir).glob("shard-*.ndjson"))
+    latest, columns = _latest_records(shard_files)
+    if not latest:
+        return 0
+
+    output_file = Path(output_file)
+    csv_file = output_file.with_suffix('.csv')
+    csv_tmp = csv_file.with_name(f".{csv_file.name}.tmp")
+    handles = [open(shard_file, 'rb') for shard_file in shard_files]
+    try:
+        with JSONStreamWriter(output_file, indent=2) as writer, \
+                open(csv_tmp, 'w', newline='', encoding='utf-8') as csv_out:
+            rows = csv.DictWriter(csv_out, fieldnames=columns, extrasaction='ignore')
+            rows.writeheader()
+            for iana_id in sorted(latest, key=lambda value: (value is None, value)):
+                _, shard, offset = latest[iana_id]
+                handles[shard].seek(offset)
+                record = decode_line(handles[shard].readline())
+                for column in SHARD_ONLY_COLUMNS:
+                    record.pop(column, None)
+                writer.write(record)
+                rows.writerow(record)
+        os.replace(csv_tmp, csv_file)
+    finally:
+        for handle in handles:
+            handle.close()
+        csv_tmp.unlink(missing_ok=True)
+    return len(latest)
+
+
+def main():
+    """Main entry point for the script."""
+    parser = argparse.ArgumentParser(description="Sharded multi-process registrar enrichment")
+    parser.add_argument('--queue', default=str(DEFAULT_QUEUE_FILE))
+    parser.add_argument('--shards', default=str(DEFAULT_SHARD_DIR))
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    enqueue = subparsers.add_parser('enqueue', help="Queue registrars from a CSV for enrichment")
+    enqueue.add_argument('--input', default="all_gateway_registrars.csv")
+    enqueue.add_argument('--batch-size', type=int, default=25)
+
+    work = subparsers.add_parser('work', help="Run worker processes until the queue is drained")
+    work.add_argument('--processes', type=int, default=os.cpu_count() or 1)
+    work.add_argument('--lease', type=float, default=60.0, help="Lease length in seconds")
+    work.add_argument('--icann-rate', type=float, default=2.0, help="ICANN requests per second across all workers")
+    work.add_argument('--icann-api', help="Override the ICANN lookup API base URL")
+
+    subparsers.add_parser('status', help="Show queue progress")
+
+    merge = subparsers.add_parser('merge', help="Merge shard outputs")
+    merge.add_argument('--output', default=str(DEFAULT_OUTPUT_FILE))
+
+    args = parser.parse_args()
+    queue_file, shard_dir = Path(args.queue), Path(args.shards)
+
+    if args.command == 'enqueue':
+        df = pd.read_csv(args.input).dropna(subset=['iana_id'])
+        df['iana_id'] = df['iana_id'].astype(int)
+        columns = [c for c in ('iana_id', 'name', 'domain_count', 'rdap_url', 'gateway_provider') if c in df.columns]
+        items = df[columns].astype(object).where(df[columns].notna(), None).to_dict('records')
+        batches = WorkQueue(queue_file).enqueue(items, args.batch_size)
+        print(f"Queued {len(items)} registrars in {batches} batches to {queue_file}")
+    elif args.command == 'work':
+        print(f"Starting {args.processes} workers on {queue_file}...")
+        progress = run_workers(args.processes, queue_file=queue_file, shard_dir=shard_dir,
+                               lease_seconds=args.lease, icann_rate=args.icann_rate, icann_api=args.icann_api)
+        print(f"Queue: {progress}")
+    elif args.command == 'status':
+        print(f"Queue: {WorkQueue(queue_file).progress()}")
+    else:
+        merged = merge_shards(shard_dir, Path(args.output))
+        print(f"Merged {merged} registrars into {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -7,13 +7,17 @@ them with contact information from the ICANN API.
 """
 
 import pandas as pd
-import requests
 import json
-import time
 import sys
 from pathlib import Path
 from typing import Dict, List, Optional
 
+from artifact_store import ArtifactStore
+from enrichment_federation import EnrichmentFederation, ICANNSource, ReferenceSource
+from membership_rules import LOGICBOXES_RDAP_RULES, MembershipRuleEngine
+from reference_store import get_reference_store
+from rollup_cube import RollupCube
+
 class LogicBoxesDataExtractor:
     """Extract and enrich LogicBoxes registrar data."""
     
@@ -22,17 +26,22 @@ class LogicBoxesDataExtractor:
         self.output_dir = Path("data/processed")
         self.output_dir.mkdir(exist_ok=True)
         
-        # LogicBoxes RDAP URL patterns for identification
-        self.logicboxes_patterns = [
-            'rdapserver.net',
-            'rdap.rrpproxy.net', 
-            'rdap.netistrar.com'
-        ]
+        # LogicBoxes RDAP host rules for identification
+        self.membership_engine = MembershipRuleEngine(LOGICBOXES_RDAP_RULES)
         
         # ICANN API configuration - using correct ICANN lookup API
         self.icann_api_base = "https://lookup.icann.org/api/registrar/"
         self.request_delay = 0.5  # Delay between API requests to respect rate limits
         
+        # ICANN and the known-registrar reference store are queried concurrently
+        # per registrar and merged field by field; name-pattern website guesses
+        # are left to enrich_logicboxes_websites.py, which scores them
+        self.federation = EnrichmentFederation(sources=[
+            ICANNSource(api_base=self.icann_api_base, rate=1.0 / self.request_delay),
+            ReferenceSource(get_reference_store()),
+        ])
+        self.artifacts = ArtifactStore()
+        
     def load_rdap_data(self) -> pd.DataFrame:
         """Load the RDAP lookups Excel file."""
         print("Loading RDAP data from Excel file...")
@@ -48,12 +57,8 @@ class LogicBoxesDataExtractor:
         """Identify registrars using LogicBoxes gateway services."""
         print("Identifying LogicBoxes registrars...")
         
-        # Create boolean mask for LogicBoxes patterns
-        logicboxes_mask = df['rdap_url'].str.contains(
-            '|'.join(self.logicboxes_patterns), 
-            case=False, 
-            na=False
-        )
+        # Create boolean mask for LogicBoxes RDAP hosts
+        logicboxes_mask = self.membership_engine.evaluate(df)['union']
         
         logicboxes_df = df[logicboxes_mask].copy()
         
@@ -89,13 +94,9 @@ class LogicBoxesDataExtractor:
             print(f"Processing limited to first {limit} registrars for testing")
         
         enriched_data = []
-        total_registrars = len(df)
-        
-        for idx, (_, row) in enumerate(df.iterrows(), 1):
-            print(f"Processing {idx}/{total_registrars}: {row['Name']}")
-            
+        for _, row in df.iterrows():
             # Base registrar data
-            registrar_data = {
+            enriched_data.append({
                 'iana_id': row['Iana id'],
                 'name': row['Name'],
                 'domain_count': row.get('Domain count', 0),
@@ -104,162 +105,34 @@ class LogicBoxesDataExtractor:
                 'rdap_service': row['rdap_service'],
                 'category': row.get('Category', ''),
                 'duplicate': row.get('duplicate', ''),
-            }
-            
-            # Attempt to enrich with ICANN data
-            icann_data = self._fetch_icann_data(row['Iana id'])
-            if icann_data:
-                registrar_data.update(icann_data)
-            else:
-                # Use known data for major registrars if ICANN API fails
-                known_data = self._enrich_with_known_data(row['Name'], row['Iana id'])
-                if known_data:
-                    registrar_data.update(known_data)
-                    print(f"  ✓ Applied known enrichment data for {row['Name']}")
-            
-            enriched_data.append(registrar_data)
-            
-            # Rate limiting to respect ICANN API limits
-            time.sleep(self.request_delay)
-        
-        return pd.DataFrame(enriched_data)
-    
-    def _fetch_icann_data(self, iana_id: int) -> Optional[Dict]:
-        """Fetch registrar contact data from ICANN lookup API."""
-        try:
-            url = f"{self.icann_api_base}{iana_id}"
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-            }
-            print(f"  Fetching ICANN data from: {url}")
-            response = requests.get(url, headers=headers, timeout=10)
-            
-            if response.status_code == 200 and response.text.strip():
-                data = response.json()
-                print(f"  ✓ Successfully fetched ICANN data for {iana_id}")
-                return self._parse_icann_response(data)
-            elif response.status_code == 404:
-                print(f"  ICANN data not found for IANA ID {iana_id}")
-                return None
-            else:
-                print(f"  ICANN API error {response.status_code} for IANA ID {iana_id} (empty response)")
-                return None
-                
-        except requests.RequestException as e:
-            print(f"  Network error fetching ICANN data for {iana_id}: {e}")
-            return None
-        except json.JSONDecodeError as e:
-            print(f"  JSON decode error for IANA ID {iana_id}: {e}")
-            return None
-    
-    def _parse_icann_response(self, data: Dict) -> Dict:
-        """Parse ICANN lookup API response to extract contact information."""
-        parsed = {}
-        
-        # Extract basic registrar information
-        if 'name' in data:
-            parsed['website_name'] = data['name']
+            })
         
-        if 'url' in data:
-            parsed['website'] = data['url']
-            
-        if 'email' in data:
-            parsed['email'] = data['email']
-            
-        if 'phone' in data:
-            parsed['phone'] = data['phone']
-            
-        if 'fax' in data:
-            parsed['fax'] = data['fax']
-            
-        if 'whoisServer' in data:
-            parsed['whois_server'] = data['whoisServer']
-            
-        if 'referralUrl' in data:
-            parsed['referral_url'] = data['referralUrl']
-            
-        if 'status' in data:
-            parsed['status'] = data['status']
+        print(f"Querying {len(self.federation.sources)} sources for {len(enriched_data)} registrars...")
+        results = self.federation.enrich_all(enriched_data)
+        for registrar_data, result in zip(enriched_data, results):
+            # Per-field provenance is a dict; the CSV/JSON views keep flat columns
+            result.pop('source_status')
+            result.pop('provenance')
+            registrar_data.update(result)
         
-        # Extract address information
-        address = data.get('address', {})
-        if address:
-            if 'street' in address:
-                parsed['street'] = address['street']
-            if 'city' in address:
-                parsed['city'] = address['city']
-            if 'state' in address:
-                parsed['state'] = address['state']
-            if 'postalCode' in address:
-                parsed['postal_code'] = address['postalCode']
-            if 'country' in address:
-                parsed['country'] = address['country']
+        for source, counts in self.federation.stats().items():
+            print(f"  {source}: " + ', '.join(f"{status} {count}" for status, count in sorted(counts.items())))
         
-        # Extract abuse contact information
-        abuse_contact = data.get('abuseContact', {})
-        if abuse_contact:
-            if 'email' in abuse_contact:
-                parsed['abuse_email'] = abuse_contact['email']
-            if 'phone' in abuse_contact:
-                parsed['abuse_phone'] = abuse_contact['phone']
-        
-        return parsed
-    
-    def _enrich_with_known_data(self, registrar_name: str, iana_id: int) -> Dict:
-        """Enrich with known data for major LogicBoxes registrars."""
-        known_data = {}
-        
-        # Known major LogicBoxes registrars with websites
-        known_registrars = {
-            'PDR Ltd. d/b/a PublicDomainRegistry.com': {
-                'website': 'https://publicdomainregistry.com',
-                'whois_server': 'whois.publicdomainregistry.com',
-                'status': 'Active'
-            },
-            'Key-Systems GmbH': {
-                'website': 'https://www.key-systems.net',
-                'whois_server': 'whois.rrpproxy.net',
-                'status': 'Active'
-            },
-            'Hostinger, UAB': {
-                'website': 'https://www.hostinger.com',
-                'whois_server': 'whois.hostinger.com',
-                'status': 'Active'
-            },
-            'BigRock Solutions Ltd.': {
-                'website': 'https://www.bigrock.com',
-                'whois_server': 'whois.bigrock.com',
-                'status': 'Active'
-            },
-            'Launchpad.com Inc.': {
-                'website': 'https://launchpad.com',
-                'whois_server': 'whois.launchpad.com',
-                'status': 'Active'
-            },
-            'Netistrar Limited': {
-                'website': 'https://www.netistrar.com',
-                'whois_server': 'whois.netistrar.com',
-                'status': 'Active'
-            }
-        }
-        
-        for known_name, data in known_registrars.items():
-            if known_name.lower() in registrar_name.lower() or registrar_name.lower() in known_name.lower():
-                known_data.update(data)
-                break
-        
-        return known_data
+        return pd.DataFrame(enriched_data)
     
     def generate_summary_statistics(self, df: pd.DataFrame) -> Dict:
         """Generate summary statistics for LogicBoxes registrars."""
+        # Totals and distributions are lookups on one rollup of the table
+        cube = RollupCube.build(df)
+        totals = cube.cell()
         stats = {
-            'total_registrars': len(df),
-            'total_domains': df['domain_count'].sum(),
-            'avg_domains_per_registrar': df['domain_count'].mean(),
+            'total_registrars': totals['registrars'],
+            'total_domains': totals['domains'],
+            'avg_domains_per_registrar': totals['domains'] / totals['registrars_with_domains'] if totals['registrars_with_domains'] else 0,
             'median_domains_per_registrar': df['domain_count'].median(),
             'top_10_by_domains': df.nlargest(10, 'domain_count')[['name', 'domain_count']].to_dict('records'),
-            'rdap_service_distribution': df['rdap_service'].value_counts().to_dict(),
-            'countries_with_icann_data': df['country'].value_counts().to_dict() if 'country' in df.columns else {},
+            'rdap_service_distribution': cube.distribution('rdap_service'),
+            'countries_with_icann_data': cube.distribution('country'),
             'enrichment_success_rate': (df['website'].notna().sum() / len(df) * 100) if 'website' in df.columns else 0
         }
         return stats
@@ -268,15 +141,11 @@ class LogicBoxesDataExtractor:
         """Save processed data and statistics to files."""
         print("Saving results...")
         
-        # Save enriched data as JSON
-        json_file = self.output_dir / "logicboxes_registrars_enriched.json"
-        df.to_json(json_file, orient='records', indent=2, default_handler=str)
-        print(f"Saved enriched data to {json_file}")
-        
-        # Save enriched data as CSV
-        csv_file = self.output_dir / "logicboxes_registrars_enriched.csv"
-        df.to_csv(csv_file, index=False)
-        print(f"Saved enriched data to {csv_file}")
+        # Save the canonical table once; the JSON/CSV files are views of it
+        self.artifacts.write('logicboxes_registrars', df, source='extract_logicboxes_data')
+        print(f"Saved enriched data to {self.artifacts.table_file('logicboxes_registrars')}")
+        for view in self.artifacts.materialise_views('logicboxes_registrars'):
+            print(f"Saved enriched data to {view}")
         
         # Save summary statistics
         stats_file = self.output_dir / "logicboxes_summary_stats.json"
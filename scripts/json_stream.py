@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Streaming JSON Writers
+
+Writes registrar records one at a time as NDJSON or as a JSON array (compact
+or indented like ``json.dump(records, indent=2)``), so a large artifact can
+be produced from a generator without building the list, the DataFrame and
+the encoded string in memory at once. Records are encoded with orjson when
+it is installed and with the standard library otherwise. Both produce the
+same bytes, so content hashes do not depend on the backend: records with
+floats that orjson formats differently (``1e20`` for ``1e+20``) are
+re-encoded by the standard library. Files are written through a temporary
+file and renamed into place when the writer closes, so readers never see a
+partial artifact.
+"""
+
+import argparse
+import datetime
+import json
+import math
+import os
+import re
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, Optional
+
+try:
+    import orjson
+except ImportError:  # optional fast encoder; the standard library is the fallback
+    orjson = None
+
+BACKENDS = ['orjson', 'json'] if orjson else ['json']
+DEFAULT_BACKEND = BACKENDS[0]
+FORMATS = ['array', 'ndjson']
+
+# orjson writes floats below 1e-4 or from 1e16 up differently from the
+# standard library (``1e20`` for ``1e+20``, ``0.00001`` for ``1e-05``); its
+# output showing such a number (or a string that looks like one) is re-encoded
+ORJSON_EXPONENT = re.compile(rb'e-?[0-9]')
+ORJSON_SMALL_FLOAT = b'0.0000'
+SCALAR_TYPES = frozenset({str, int, bool, type(None)})
+
+
+def _default(value):
+    """Encode numpy scalars as their Python value and anything else as its string."""
+    if hasattr(value, 'item') and callable(value.item):
+        return value.item()
+    return str(value)
+
+
+def _clean(value):
+    """
+    Numpy scalars become Python values and NaN/infinity become null, at any
+    depth (the standard encoder would write invalid ``NaN``).
+    """
+    if isinstance(value, dict):
+        return {key: item if type(item) in SCALAR_TYPES or type(item) is float and math.isfinite(item)
+                else _clean(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_clean(item) for item in value]
+    if hasattr(value, 'dtype') and hasattr(value, 'item'):
+        value = value.item()
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    return value
+
+
+def encode_record(record, indent: Optional[int] = None, backend: str = DEFAULT_BACKEND) -> bytes:
+    """One record as UTF-8 JSON, compact or indented by 2."""
+    record = _clean(record)
+    if backend == 'orjson':
+        option = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        try:
+            encoded = orjson.dumps(record, default=_default, option=option)
+        except TypeError:  # an integer beyond 64 bits
+            encoded = None
+        if encoded is not None and ORJSON_SMALL_FLOAT not in encoded and not ORJSON_EXPONENT.search(encoded):
+            return encoded
+    separators = (',', ': ') if indent else (',', ':')
+    return json.dumps(record, indent=indent, separators=separators, ensure_ascii=False,
+                      default=_default).encode('utf-8')
+
+
+def decode_line(line):
+    return orjson.loads(line) if orjson else json.loads(line)
+
+
+def iter_ndjson(path: Path) -> Iterator[Dict]:
+    """Records of an NDJSON file, skipping blank lines and a torn last line."""
+    with open(path, 'rb') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield decode_line(line)
+            except ValueError:
+                continue
+
+
+class JSONStreamWriter:
+    """Incremental NDJSON / JSON-array writer; use as a context manager."""
+
+    def __init__(self, path: Path, format: str = 'array', indent: Optional[int] = None,
+                 backend: str = DEFAULT_BACKEND, buffer_size: int = 1 << 20):
+        """
+        Args:
+            path: Output file, replaced atomically on close
+            format: ``'array'`` (one JSON document) or ``'ndjson'`` (one record per line)
+            indent: 2 for the pipeline's indented JSON, None for compact
+            backend: ``'orjson'`` or ``'json'``
+            buffer_size: Write buffer size in bytes
+        """
+        if format not in FORMATS:
+            raise ValueError(f"Unknown format {format!r}; expected one of {FORMATS}")
+        if backend not in BACKENDS:
+            raise ValueError(f"JSON backend {backend!r} is not available; have {BACKENDS}")
+        if indent not in (None, 2):
+            raise ValueError("Only indent=2 or compact output is supported")
+        self.path = Path(path)
+        self.format = format
+        self.indent = indent if format == 'array' else None
+        self.backend = backend
+        self.count = 0
+        self.bytes = 0
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._tmp = self.path.with_name(f".{self.path.name}.tmp")
+        self._file = open(self._tmp, 'wb', buffering=buffer_size)
+
+    def write(self, record) -> int:
+        """Append one record; returns the bytes written (``self.bytes`` is the running total)."""
+        encoded = encode_record(record, self.indent, self.backend)
+        if self.format == 'ndjson':
+            chunk = encoded + b'\n'
+        elif self.indent:
+            chunk = (b',\n  ' if self.count else b'[\n  ') + encoded.replace(b'\n', b'\n  ')
+        else:
+            chunk = (b',' if self.count else b'[') + encoded
+        self._file.write(chunk)
+        self.count += 1
+        self.bytes += len(chunk)
+        return len(chunk)
+
+    def write_all(self, records: Iterable) -> int:
+        """Write every record from an iterable; returns the number written."""
+        for record in records:
+            self.write(record)
+        return self.count
+
+    def close(self):
+        """Finish the document and move it into place."""
+        if self.format == 'array':
+            if not self.count:
+                self._file.write(b'[]')
+            else:
+                self._file.write(b'\n]' if self.indent else b']')
+        self._file.close()
+        os.replace(self._tmp, self.path)
+
+    def abort(self):
+        """Discard the partial file, leaving any previous artifact untouched."""
+        self._file.close()
+        self._tmp.unlink(missing_ok=True)
+
+    def __enter__(self) -> 'JSONStreamWriter':
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+def write_records(path: Path, records: Iterable, format: str = 'array', indent: Optional[int] = None,
+                  backend: str = DEFAULT_BACKEND) -> int:
+    """Stream ``records`` into ``path``; returns the number written."""
+    with JSONStreamWriter(path, format, indent, backend) as writer:
+        return writer.write_all(records)
+
+
+def main():
+    """Convert between NDJSON and JSON arrays without loading the input into a list."""
+    parser = argparse.ArgumentParser(description="Streaming NDJSON / JSON-array conversion")
+    parser.add_argument('input', help="NDJSON file")
+    parser.add_argument('output')
+    parser.add_argument('--format', choices=FORMATS, default='array')
+    parser.add_argument('--indent', type=int, choices=[2])
+    parser.add_argument('--backend', choices=BACKENDS, default=DEFAULT_BACKEND)
+    args = parser.parse_args()
+
+    started = datetime.datetime.now()
+    count = write_records(Path(args.output), iter_ndjson(Path(args.input)), args.format, args.indent, args.backend)
+    elapsed = (datetime.datetime.now() - started).total_seconds()
+    print(f"Wrote {count} records to {args.output} with {args.backend} in {elapsed:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
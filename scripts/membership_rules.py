@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Provider Membership Rule Engine
+
+Evaluates a declarative set of gateway-provider membership rules (name
+regexes, RDAP host suffixes, IANA id lists, categories) against a registrar
+table. Each column is scanned once, over its distinct values, and every rule
+gets a bit in a per-row mask, so the union, per-rule hit counts and rule
+overlaps all come from the same array without concat/dedup steps.
+"""
+
+import re
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from url_normalizer import normalize_host
+
+# Rules that place a registrar in the LogicBoxes gateway group
+LOGICBOXES_RULES = [
+    {'name': 'key_systems_name', 'name_pattern': r'key-systems|key systems'},
+    {'name': 'logicboxes_name', 'name_pattern': r'logicboxes'},
+    {'name': 'bigrock_name', 'name_pattern': r'bigrock'},
+    {'name': 'netistrar_name', 'name_pattern': r'netistrar'},
+    {'name': 'rrpproxy_host', 'host_suffixes': ['rdap.rrpproxy.net']},
+    {'name': 'rdapserver_host', 'host_suffixes': ['rdapserver.net']},
+]
+
+# RDAP services the LogicBoxes extraction script has always recognised
+LOGICBOXES_RDAP_RULES = [
+    {'name': 'rdapserver_host', 'host_suffixes': ['rdapserver.net']},
+    {'name': 'rrpproxy_host', 'host_suffixes': ['rdap.rrpproxy.net']},
+    {'name': 'netistrar_host', 'host_suffixes': ['rdap.netistrar.com']},
+]
+
+# Column names in the RDAP lookups spreadsheet
+EXCEL_COLUMNS = {'name': 'Name', 'host': 'rdap_url', 'iana_id': 'Iana id', 'category': 'Category'}
+
+
+class MembershipRuleEngine:
+    """Single-pass, bitmask-based evaluation of membership rules."""
+
+    def __init__(self, rules: List[Dict], columns: Optional[Dict[str, str]] = None):
+        if len(rules) > 64:
+            raise ValueError("At most 64 rules fit in the per-row bitmask")
+
+        self.rules = rules
+        self.rule_names = [rule['name'] for rule in rules]
+        self.columns = {**EXCEL_COLUMNS, **(columns or {})}
+
+        self._name_patterns = []
+        self._host_suffixes: Dict[str, int] = {}
+        self._iana_ids: Dict[int, int] = {}
+        self._categories: Dict[str, int] = {}
+
+        for bit, rule in enumerate(rules):
+            flag = 1 << bit
+            if rule.get('name_pattern'):
+                self._name_patterns.append((re.compile(rule['name_pattern'], re.I), flag))
+            for suffix in rule.get('host_suffixes', []):
+                key = normalize_host(suffix)
+                self._host_suffixes[key] = self._host_suffixes.get(key, 0) | flag
+            for iana_id in rule.get('iana_ids', []):
+                self._iana_ids[int(iana_id)] = self._iana_ids.get(int(iana_id), 0) | flag
+            for category in rule.get('categories', []):
+                key = category.upper()
+                self._categories[key] = self._categories.get(key, 0) | flag
+
+    def _name_bits(self, value) -> int:
+        if not isinstance(value, str):
+            return 0
+        bits = 0
+        for pattern, flag in self._name_patterns:
+            if pattern.search(value):
+                bits |= flag
+        return bits
+
+    def _host_bits(self, value) -> int:
+        host = normalize_host(value)
+        if host is None:
+            return 0
+        bits = 0
+        labels = host.split('.')
+        for i in range(len(labels)):
+            bits |= self._host_suffixes.get('.'.join(labels[i:]), 0)
+        return bits
+
+    def _iana_bits(self, value) -> int:
+        try:
+            return self._iana_ids.get(int(value), 0)
+        except (TypeError, ValueError):
+            return 0
+
+    def _category_bits(self, value) -> int:
+        return self._categories.get(value.upper(), 0) if isinstance(value, str) else 0
+
+    @staticmethod
+    def _column_bits(values: pd.Series, func) -> np.ndarray:
+        """Evaluate ``func`` once per distinct value and broadcast to rows."""
+        codes, uniques = pd.factorize(values, sort=False)
+        unique_bits = np.array([func(value) for value in uniques] + [0], dtype=np.uint64)
+        return unique_bits[codes]
+
+    def masks(self, df: pd.DataFrame) -> np.ndarray:
+        """Per-row bitmask with bit ``i`` set when rule ``i`` matches."""
+        bits = np.zeros(len(df), dtype=np.uint64)
+        evaluators = [
+            ('name', self._name_patterns, self._name_bits),
+            ('host', self._host_suffixes, self._host_bits),
+            ('iana_id', self._iana_ids, self._iana_bits),
+            ('category', self._categories, self._category_bits),
+        ]
+        for column_key, active, func in evaluators:
+            column = self.columns[column_key]
+            if active and column in df.columns:
+                bits |= self._column_bits(df[column], func)
+        return bits
+
+    def evaluate(self, df: pd.DataFrame) -> Dict:
+        """
+        Evaluate all rules against ``df``.
+
+        Returns:
+            Dictionary with the per-row ``bits``, boolean ``union`` mask,
+            per-rule ``rule_masks`` and ``hit_counts``, and an ``overlaps``
+            DataFrame counting rows matched by each pair of rules
+        """
+        bits = self.masks(df)
+        rule_masks = {
+            name: (bits & np.uint64(1 << bit)) != 0
+            for bit, name in enumerate(self.rule_names)
+        }
+        matrix = np.column_stack([rule_masks[name] for name in self.rule_names]).astype(np.int64) \
+            if self.rule_names else np.zeros((len(df), 0), dtype=np.int64)
+        overlaps = pd.DataFrame(matrix.T @ matrix, index=self.rule_names, columns=self.rule_names)
+
+        return {
+            'bits': bits,
+            'union': bits != 0,
+            'rule_masks': rule_masks,
+            'hit_counts': {name: int(mask.sum()) for name, mask in rule_masks.items()},
+            'overlaps': overlaps
+        }
+
+    def matched_rules(self, bits: int) -> List[str]:
+        """Names of the rules set in a row's bitmask."""
+        return [name for bit, name in enumerate(self.rule_names) if int(bits) & (1 << bit)]
@@ -0,0 +1,341 @@
+#!/usr/bin/env python3
+"""
+Incremental Gateway Provider Aggregates
+
+Keeps the gateway provider summaries (registrar and domain totals per
+provider, gateway vs self-hosted domains, market shares) as delta-updatable
+state in SQLite instead of recomputing them from the full analysis files.
+A reclassification rule ("RDAP Server (Potential Gateway)" is LogicBoxes,
+NameBright is not a gateway) merges one provider row into another and
+re-tags only that provider's registrars; a changed domain count for one
+registrar subtracts its old contribution and adds the new one. Either costs
+O(affected rows). The derived summaries are read from the few provider
+rows and patched into comprehensive_gateway_analysis.json and
+gateway_provider_summary.json.
+
+Provider totals are seeded from the published analysis (which counts from
+the full registry spreadsheet) and the per-registrar index from the
+registrar table, so later per-registrar changes apply as deltas to the
+published totals.
+"""
+
+import argparse
+import json
+import sqlite3
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+# Resolved from the repository root, since callers run from different directories
+REPO_ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_DB_FILE = REPO_ROOT / "data" / "processed" / "provider_aggregates.db"
+
+# The gateway providers the published analysis keeps; every other provider is self-hosted
+CORE_PROVIDERS = ['LogicBoxes', 'RRPProxy/CentralNic', 'Tucows']
+
+# Names the core providers appear under in the raw analysis and registrar table
+PROVIDER_RENAMES = {
+    'RDAP Server (Potential Gateway)': 'LogicBoxes',
+    'RDAP Server': 'LogicBoxes',
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS providers (
+    name TEXT PRIMARY KEY,
+    registrars INTEGER NOT NULL,
+    domains REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS registrars (
+    iana_id INTEGER PRIMARY KEY,
+    provider TEXT,
+    domains REAL
+);
+CREATE INDEX IF NOT EXISTS registrars_provider ON registrars (provider);
+CREATE TABLE IF NOT EXISTS aliases (
+    name TEXT PRIMARY KEY,
+    target TEXT
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+_KEEP = object()  # update_registrar: leave the provider as indexed
+
+
+def core_provider(provider: Optional[str]) -> Optional[str]:
+    """The core gateway provider a provider name is counted as (None: self-hosted)."""
+    provider = PROVIDER_RENAMES.get(provider, provider)
+    return provider if provider in CORE_PROVIDERS else None
+
+
+def core_provider_series(providers: pd.Series) -> pd.Series:
+    """``core_provider`` over a column of provider names."""
+    renamed = providers.replace(PROVIDER_RENAMES)
+    return renamed.where(renamed.isin(CORE_PROVIDERS))
+
+
+def _number(value: float):
+    """Whole numbers as int, as the analysis files write them."""
+    return int(value) if float(value).is_integer() else value
+
+
+class ProviderAggregates:
+    """Per-provider registrar and domain sums with O(affected rows) updates."""
+
+    def __init__(self, db_file: Path = DEFAULT_DB_FILE):
+        self.db_file = Path(db_file)
+        self.db_file.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.db_file))
+        self.conn.row_factory = sqlite3.Row
+        self.conn.executescript(SCHEMA)
+
+    def _meta(self, key: str) -> Optional[str]:
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row['value'] if row else None
+
+    def _set_meta(self, key: str, value: str):
+        self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    @property
+    def seeded(self) -> bool:
+        return self._meta('market_domains') is not None
+
+    @property
+    def market_domains(self) -> float:
+        return float(self._meta('market_domains') or 0)
+
+    def is_seeded_from(self, source: str) -> bool:
+        """Whether the state was seeded from (or last written back to) ``source``."""
+        return self.seeded and self._meta('source') == source
+
+    def set_source(self, source: str):
+        """Record the analysis content the state now matches, e.g. after writing it back."""
+        with self.conn:
+            self._set_meta('source', source)
+
+    def seed(self, analysis: Dict, registrars: pd.DataFrame, source: Optional[str] = None):
+        """
+        Initialise the state from the published analysis and the registrar table.
+
+        Args:
+            analysis: comprehensive_gateway_analysis.json content
+            registrars: Registrar rows (iana_id, gateway_provider, domain_count)
+            source: Identifier of the analysis content (its hash), so a new
+                analysis can be told apart from the one the state came from
+        """
+        with self.conn:
+            for table in ('providers', 'registrars', 'aliases'):
+                self.conn.execute(f"DELETE FROM {table}")
+            self.conn.executemany(
+                "INSERT INTO providers (name, registrars, domains) VALUES (?, ?, ?)",
+                [(name, int(provider['registrar_count']), float(provider['total_domains']))
+                 for name, provider in analysis['gateway_providers'].items()]
+            )
+            rows = registrars.dropna(subset=['iana_id'])
+            domains = pd.to_numeric(rows['domain_count'], errors='coerce')
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO registrars (iana_id, provider, domains) VALUES (?, ?, ?)",
+                [(int(iana_id), self.resolve(provider), None if pd.isna(count) else float(count))
+                 for iana_id, provider, count in zip(rows['iana_id'], rows['gateway_provider'], domains)]
+            )
+            self._set_meta('market_domains', str(float(analysis['dataset_summary']['total_domains'])))
+            self._set_meta('source', source)
+
+    def resolve(self, provider: Optional[str]) -> Optional[str]:
+        """The provider a name is currently counted as (None: self-hosted)."""
+        if provider is None or provider != provider:
+            return None
+        row = self.conn.execute("SELECT target FROM aliases WHERE name = ?", (provider,)).fetchone()
+        return row['target'] if row else provider
+
+    def _add(self, provider: Optional[str], registrars: int, domains: float):
+        if provider is None:
+            return
+        self.conn.execute(
+            "INSERT INTO providers (name, registrars, domains) VALUES (?, ?, ?) "
+            "ON CONFLICT(name) DO UPDATE SET registrars = registrars + excluded.registrars, "
+            "domains = domains + excluded.domains",
+            (provider, registrars, domains)
+        )
+
+    def reclassify(self, provider: str, target: Optional[str]) -> int:
+        """
+        Count ``provider`` as ``target`` from now on (None: not a gateway).
+
+        Returns:
+            Number of indexed registrars re-tagged
+        """
+        target = self.resolve(target)
+        if target == provider:
+            return 0
+        with self.conn:
+            row = self.conn.execute("SELECT registrars, domains FROM providers WHERE name = ?",
+                                    (provider,)).fetchone()
+            if row:
+                self.conn.execute("DELETE FROM providers WHERE name = ?", (provider,))
+                self._add(target, row['registrars'], row['domains'])
+            moved = self.conn.execute("UPDATE registrars SET provider = ? WHERE provider = ?",
+                                      (target, provider)).rowcount
+            # Earlier rules pointing at this provider follow it
+            self.conn.execute("UPDATE aliases SET target = ? WHERE target = ?", (target, provider))
+            self.conn.execute("INSERT OR REPLACE INTO aliases (name, target) VALUES (?, ?)", (provider, target))
+        return moved
+
+    def core_reclassifications(self) -> Dict[str, Optional[str]]:
+        """Rules mapping every tracked non-core provider name to its core provider or None."""
+        names = [row['name'] for row in self.conn.execute(
+            "SELECT name FROM providers UNION SELECT provider FROM registrars WHERE provider IS NOT NULL"
+        )]
+        return {name: core_provider(name) for name in sorted(names) if core_provider(name) != name}
+
+    def update_registrar(self, iana_id: int, domain_count: Optional[float], provider=_KEEP,
+                         previous_count: Optional[float] = None):
+        """
+        Apply one registrar's new domain count (and optionally provider).
+
+        Leaving ``provider`` out keeps the indexed one. Only registrars in the
+        registrar table are indexed, but the market total counts every
+        registrar in the registry spreadsheet, so a registrar not yet indexed
+        needs ``previous_count``: the domains already counted for it as
+        self-hosted (0 for a registrar new to the market).
+
+        Raises:
+            ValueError: The registrar is not indexed and ``previous_count`` is missing
+        """
+        with self.conn:
+            row = self.conn.execute("SELECT provider, domains FROM registrars WHERE iana_id = ?",
+                                    (iana_id,)).fetchone()
+            if row is None and previous_count is None:
+                raise ValueError(f"Registrar {iana_id} is not indexed; pass its previous domain count "
+                                 f"(0 if it is new to the market)")
+            old_provider = row['provider'] if row else None
+            old_domains = (row['domains'] or 0) if row else previous_count
+            new_provider = old_provider if provider is _KEEP else self.resolve(provider)
+            new_domains = domain_count or 0
+
+            self._add(old_provider, -1, -old_domains)
+            self._add(new_provider, 1, new_domains)
+            self.conn.execute(
+                "INSERT OR REPLACE INTO registrars (iana_id, provider, domains) VALUES (?, ?, ?)",
+                (iana_id, new_provider, domain_count)
+            )
+            self._set_meta('market_domains', str(self.market_domains + new_domains - old_domains))
+
+    def provider_totals(self) -> Dict[str, Dict]:
+        """Registrar count, domains and market share per gateway provider, largest first."""
+        market = self.market_domains
+        return {
+            row['name']: {
+                'registrar_count': row['registrars'],
+                'total_domains': row['domains'],
+                'market_share_percent': (row['domains'] / market) * 100,
+            }
+            for row in self.conn.execute("SELECT name, registrars, domains FROM providers ORDER BY domains DESC")
+        }
+
+    def gateway_analysis(self) -> Dict:
+        """Gateway vs self-hosted totals, as in comprehensive_gateway_analysis.json."""
+        market = self.market_domains
+        gateway = self.conn.execute("SELECT COALESCE(SUM(domains), 0) AS domains FROM providers").fetchone()['domains']
+        return {
+            'total_gateway_domains': _number(gateway),
+            'total_self_hosted_domains': _number(market - gateway),
+            'gateway_market_share_percent': (gateway / market) * 100,
+            'self_hosted_market_share_percent': ((market - gateway) / market) * 100,
+        }
+
+    def apply_to_analysis(self, analysis: Dict) -> bool:
+        """
+        Patch the totals of comprehensive_gateway_analysis.json content in place.
+
+        Provider details (RDAP URLs, top registrars) are kept and follow
+        their provider's renames. Returns whether anything changed.
+        """
+        before = json.dumps(analysis, sort_keys=True, default=str)
+        totals = self.provider_totals()
+
+        providers = {}
+        for name, detail in analysis['gateway_providers'].items():
+            target = self.resolve(name)
+            if target in totals and target not in providers:
+                providers[target] = dict(detail)
+                if 'gateway_provider' in detail:
+                    providers[target]['gateway_provider'] = target
+        for name, total in totals.items():
+            entry = providers.setdefault(name, {})
+            entry['registrar_count'] = total['registrar_count']
+            entry['total_domains'] = _number(total['total_domains'])
+            entry['market_share_percent'] = total['market_share_percent']
+        analysis['gateway_providers'] = providers
+        analysis['gateway_analysis'] = self.gateway_analysis()
+
+        # URLs of providers that are no longer gateways are dropped; self-hosted URLs stay
+        urls = []
+        for url in analysis.get('top_rdap_urls', []):
+            if url['is_gateway']:
+                url['gateway_provider'] = self.resolve(url['gateway_provider'])
+                if url['gateway_provider'] is None:
+                    continue
+            urls.append(url)
+        analysis['top_rdap_urls'] = urls
+
+        return json.dumps(analysis, sort_keys=True, default=str) != before
+
+    def provider_summary(self) -> List[Dict]:
+        """gateway_provider_summary.json content."""
+        return [
+            {'gateway_provider': name, 'registrar_count': total['registrar_count'],
+             'total_domains': float(total['total_domains'])}
+            for name, total in self.provider_totals().items()
+        ]
+
+    def close(self):
+        self.conn.close()
+
+
+def main():
+    """Apply reclassifications or registrar count changes and show the totals."""
+    parser = argparse.ArgumentParser(description="Incremental gateway provider aggregates")
+    parser.add_argument('--db', default=str(DEFAULT_DB_FILE))
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    subparsers.add_parser('show', help="Print provider totals")
+
+    reclassify = subparsers.add_parser('reclassify', help="Count one provider as another")
+    reclassify.add_argument('provider')
+    reclassify.add_argument('target', nargs='?', help="Omit to count the provider as self-hosted")
+
+    count = subparsers.add_parser('set-count', help="Apply a registrar's new domain count")
+    count.add_argument('iana_id', type=int)
+    count.add_argument('domain_count', type=float)
+    count.add_argument('--previous', type=float,
+                       help="Previous domain count of a registrar not in the registrar table (0 if new)")
+
+    args = parser.parse_args()
+    aggregates = ProviderAggregates(Path(args.db))
+    if not aggregates.seeded:
+        print("Aggregates are not seeded yet; run update_gateway_analysis.py first")
+        return
+
+    if args.command == 'reclassify':
+        moved = aggregates.reclassify(args.provider, args.target)
+        print(f"Reclassified {args.provider} -> {args.target or 'self-hosted'} ({moved} registrars)")
+    elif args.command == 'set-count':
+        try:
+            aggregates.update_registrar(args.iana_id, args.domain_count, previous_count=args.previous)
+        except ValueError as e:
+            parser.error(str(e))
+        print(f"Updated registrar {args.iana_id}")
+
+    for name, total in aggregates.provider_totals().items():
+        print(f"  {name}: {total['registrar_count']} registrars, {total['total_domains']:,.0f} domains "
+              f"({total['market_share_percent']:.2f}%)")
+    print(f"  Gateway share: {aggregates.gateway_analysis()['gateway_market_share_percent']:.2f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Public Suffix List Trie
+
+Compiles a local copy of the Public Suffix List into a label trie and pickles
+it next to the source for fast startup. Used to group RDAP hosts by their
+registrable domain, so "rdap.example.co.uk" groups under "example.co.uk"
+rather than "co.uk".
+"""
+
+import ipaddress
+import pickle
+import sys
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import pandas as pd
+import requests
+
+from url_normalizer import normalize_host
+
+PSL_URL = "https://publicsuffix.org/list/public_suffix_list.dat"
+DEFAULT_PSL_FILE = Path("data/bootstrap/public_suffix_list.dat")
+
+PRIVATE_SECTION_MARKER = "===BEGIN PRIVATE DOMAINS==="
+
+# Trie node markers; real labels never contain these characters
+TERMINAL = '$'
+EXCEPTION = '!'
+WILDCARD = '*'
+
+
+def _is_ip(host: str) -> bool:
+    """True if ``host`` is an IPv4 or IPv6 literal."""
+    try:
+        ipaddress.ip_address(host)
+        return True
+    except ValueError:
+        return False
+
+
+class PublicSuffixList:
+    """Label trie over Public Suffix List rules."""
+
+    def __init__(self, psl_file: Path = DEFAULT_PSL_FILE, include_private: bool = False,
+                 cache_size: int = 65536):
+        self.psl_file = Path(psl_file)
+        self.include_private = include_private
+        self._trie = self._load()
+
+        self.registrable_domain = lru_cache(maxsize=cache_size)(self._registrable_domain)
+
+    def _load(self) -> Dict:
+        """Load the compiled trie from its pickle, recompiling if the source changed."""
+        source = self.psl_file.stat()
+        fingerprint = (source.st_size, source.st_mtime_ns, self.include_private)
+        cache_file = self.psl_file.with_suffix('.private.pickle' if self.include_private else '.pickle')
+
+        if cache_file.exists():
+            try:
+                with open(cache_file, 'rb') as f:
+                    cached = pickle.load(f)
+                if cached.get('fingerprint') == fingerprint:
+                    return cached['trie']
+            except (pickle.UnpicklingError, EOFError, KeyError, AttributeError):
+                pass
+
+        trie = self._compile()
+        with open(cache_file, 'wb') as f:
+            pickle.dump({'fingerprint': fingerprint, 'trie': trie}, f, protocol=pickle.HIGHEST_PROTOCOL)
+        return trie
+
+    def _compile(self) -> Dict:
+        """Parse the rule file into a trie keyed by reversed labels."""
+        trie: Dict = {}
+        with open(self.psl_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if PRIVATE_SECTION_MARKER in line and not self.include_private:
+                    break
+                if not line or line.startswith('//'):
+                    continue
+
+                rule = line.split()[0]
+                exception = rule.startswith('!')
+                labels = self._to_ascii(rule.lstrip('!')).split('.')
+
+                node = trie
+                for label in reversed(labels):
+                    node = node.setdefault(label, {})
+                node[EXCEPTION if exception else TERMINAL] = True
+        return trie
+
+    @staticmethod
+    def _to_ascii(rule: str) -> str:
+        """Punycode each label so rules match IDNA-normalised hosts."""
+        labels = []
+        for label in rule.lower().split('.'):
+            try:
+                labels.append(label if label == WILDCARD else label.encode('idna').decode('ascii'))
+            except UnicodeError:
+                labels.append(label)
+        return '.'.join(labels)
+
+    def _suffix_length(self, labels: List[str]) -> int:
+        """Number of trailing labels that form the public suffix."""
+        node = self._trie
+        length = 1  # the implicit "*" rule
+        for i, label in enumerate(reversed(labels)):
+            child = node.get(label)
+            if child is not None and child.get(EXCEPTION):
+                return i
+            if WILDCARD in node:
+                length = max(length, i + 1)
+            if child is None:
+                break
+            if child.get(TERMINAL):
+                length = max(length, i + 1)
+            node = child
+        return length
+
+    def _registrable_domain(self, value) -> Optional[str]:
+        """Return the registrable domain (public suffix + one label) of a host or URL."""
+        host = normalize_host(value)
+        if host is None or _is_ip(host):
+            return host
+
+        labels = host.split('.')
+        suffix_length = self._suffix_length(labels)
+        if len(labels) <= suffix_length:
+            return None
+        return '.'.join(labels[-(suffix_length + 1):])
+
+    def public_suffix(self, value) -> Optional[str]:
+        """Return the public suffix of a host or URL."""
+        host = normalize_host(value)
+        if host is None or _is_ip(host):
+            return None
+        labels = host.split('.')
+        return '.'.join(labels[-self._suffix_length(labels):])
+
+    def registrable_domain_series(self, values: pd.Series) -> pd.Series:
+        """Registrable domain for each value in a column, computed once per unique value."""
+        codes, uniques = pd.factorize(values, sort=False)
+        mapped = pd.Series([self.registrable_domain(value) for value in uniques] + [None], dtype=object).take(codes)
+        mapped.index = values.index
+        return mapped
+
+
+def fetch_psl_file(output_file: Path = DEFAULT_PSL_FILE) -> Path:
+    """Download a fresh copy of the Public Suffix List."""
+    output_file = Path(output_file)
+    output_file.parent.mkdir(parents=True, exist_ok=True)
+
+    print(f"Fetching Public Suffix List from {PSL_URL}...")
+    response = requests.get(PSL_URL, timeout=30)
+    response.raise_for_status()
+    output_file.write_bytes(response.content)
+    print(f"Saved Public Suffix List to {output_file}")
+    return output_file
+
+
+def main():
+    """Print the registrable domain of each host given on the command line."""
+    args = sys.argv[1:]
+
+    if args and args[0] == "--fetch":
+        fetch_psl_file()
+        args = args[1:]
+
+    if not DEFAULT_PSL_FILE.exists():
+        print(f"Error: Public Suffix List not found at {DEFAULT_PSL_FILE}")
+        print("Run with --fetch to download it.")
+        sys.exit(1)
+
+    psl = PublicSuffixList()
+    for value in args:
+        print(f"{value}: {psl.registrable_domain(value)} (suffix {psl.public_suffix(value)})")
+
+
+if __name__ == "__main__":
+    main()
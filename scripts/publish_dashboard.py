@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Dashboard Data Bundles
+
+Publishes the registrar tables the dashboard displays as compact JSON
+shards under public/data/bundles/: one shard per page in the dashboard's
+default order (largest registrars first) and one per gateway provider,
+plus a search index over the pages. Shards are content-hashed files written
+through the content publisher, so unchanged shards are not touched. A
+manifest lists every shard with its row count, sizes and hash, so the
+dashboard can paint from the first page shard and fetch the rest afterwards.
+Compression is left to the CDN, which gzip/brotli-encodes JSON responses by
+Accept-Encoding; the manifest records each shard's gzip size as an estimate
+of what it costs to transfer.
+"""
+
+import argparse
+import gzip
+import json
+import re
+from typing import Dict, List
+
+import pandas as pd
+
+from artifact_store import ArtifactStore
+from content_publisher import ContentPublisher, dump_json
+from registrar_records import load_registrar_records
+from search_index import SEARCH_FIELDS, SearchIndex
+
+BUNDLE_PREFIX = "bundles"
+DEFAULT_PAGE_SIZE = 50
+
+# LogicBoxes fields the Registry Gateway users view takes from the enriched
+# table; those in FALLBACK_FIELDS keep the registrar's own value when missing
+ENRICHED_FIELDS = ['website', 'website_source', 'website_confidence', 'notes', 'whois_server', 'status',
+                   'rdap_service']
+FALLBACK_FIELDS = {'website', 'whois_server', 'status', 'rdap_service'}
+
+
+def _slug(value: str) -> str:
+    return re.sub(r'[^a-z0-9]+', '-', str(value).lower()).strip('-') or 'none'
+
+
+def compact_records(df: pd.DataFrame) -> List[Dict]:
+    """Rows as dictionaries without null fields."""
+    return [
+        {key: value for key, value in row.items() if value is not None and value == value}
+        for row in df.to_dict('records')
+    ]
+
+
+def encode_shard(payload) -> bytes:
+    return json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def gateway_users_table(store: ArtifactStore) -> pd.DataFrame:
+    """Core gateway registrars with LogicBoxes enrichment, from the pre-joined registrar records."""
+    columns = store.read('core_gateway_registrars').column_names
+    records = load_registrar_records(store)
+    registrars = records[records['core_gateway']].reset_index(drop=True)
+
+    logicboxes = registrars['gateway_provider'].eq('LogicBoxes') & registrars['enriched']
+    missing = pd.Series(None, index=registrars.index, dtype=object)
+    for field in ENRICHED_FIELDS:
+        value = registrars[field] if field in registrars.columns else missing
+        if field in FALLBACK_FIELDS:
+            value = value.where(value.ne(''))  # an empty enrichment value counts as missing
+        registrars[field] = value.where(logicboxes, None)
+    return registrars[columns + ENRICHED_FIELDS]
+
+
+# search_fields are the fields each table's search box scans (see its component)
+DATASETS = {
+    'registry_gateway_users': {'build': gateway_users_table, 'shard_by': 'gateway_provider',
+                               'search_fields': SEARCH_FIELDS},
+    'logicboxes_registrars': {'build': lambda store: store.frame('logicboxes_registrars_v2'), 'shard_by': None,
+                              'search_fields': ['name', 'iana_id', 'rdap_url', 'website', 'whois_server', 'status',
+                                                'notes', 'website_source']},
+}
+
+
+class DashboardPublisher:
+    """Writes sharded dashboard datasets and their manifest."""
+
+    def __init__(self, publisher: ContentPublisher = None, page_size: int = DEFAULT_PAGE_SIZE,
+                 store: ArtifactStore = None):
+        """
+        Args:
+            publisher: Content publisher for the public data tree; call its
+                ``save()`` after ``publish()`` to record the changes
+        """
+        self.publisher = publisher or ContentPublisher()
+        self.page_size = page_size
+        self.store = store or ArtifactStore()
+
+    def _write_shard(self, name: str, payload, rows: int) -> Dict:
+        """Publish a shard; returns its manifest entry."""
+        data = encode_shard(payload)
+        entry = self.publisher.publish(f"{BUNDLE_PREFIX}/{name}", data, stable=False)
+        return {
+            'file': entry['file'][len(BUNDLE_PREFIX) + 1:],
+            'rows': rows,
+            'bytes': entry['bytes'],
+            'gzip_bytes': len(gzip.compress(data, mtime=0)),
+            'sha256': entry['sha256'],
+        }
+
+    def publish_dataset(self, name: str, df: pd.DataFrame, shard_by: str = None,
+                        search_fields: List[str] = SEARCH_FIELDS) -> Dict:
+        """Shard one dataset by page (default order) and optionally by a column."""
+        # The dashboards' default order: domain count descending, missing counts last
+        order = df['domain_count'].fillna(0).sort_values(ascending=False, kind='stable').index
+        df = df.loc[order].reset_index(drop=True)
+        records = compact_records(df)
+
+        page_records = [records[start:start + self.page_size] for start in range(0, len(records), self.page_size)]
+        pages = [
+            self._write_shard(f"{name}/page-{number:04d}.json", page, len(page))
+            for number, page in enumerate(page_records, start=1)
+        ]
+        groups = {}
+        if shard_by:
+            for value, group in df.groupby(df[shard_by].fillna('none'), sort=True):
+                groups[value] = self._write_shard(f"{name}/{_slug(value)}.json",
+                                                  [records[i] for i in group.index], len(group))
+
+        # Row ids in the search index are positions in the concatenated pages
+        search = self._write_shard(f"{name}/search.json", SearchIndex.build(records, search_fields).to_dict(),
+                                   len(records))
+
+        return {
+            'rows': len(records),
+            'order': 'domain_count desc',
+            'page_size': self.page_size,
+            'pages': pages,
+            'shard_by': shard_by,
+            'shards': groups,
+            'search': search,
+        }
+
+    def publish(self) -> Dict:
+        """
+        Publish every dataset and the bundle manifest (under its stable name),
+        retiring shards that no longer exist (pages past the end, providers
+        that left).
+        """
+        manifest = {'datasets': {}}
+        for name, spec in DATASETS.items():
+            manifest['datasets'][name] = self.publish_dataset(name, spec['build'](self.store), spec['shard_by'],
+                                                              spec['search_fields'])
+        self.publisher.publish(f"{BUNDLE_PREFIX}/manifest.json", dump_json(manifest))
+        self.publisher.retire_unpublished(f"{BUNDLE_PREFIX}/")
+        return manifest
+
+
+def main():
+    """Publish the dashboard bundles and report payload sizes."""
+    parser = argparse.ArgumentParser(description="Publish sharded dashboard data bundles")
+    parser.add_argument('--page-size', type=int, default=DEFAULT_PAGE_SIZE)
+    args = parser.parse_args()
+
+    publisher = ContentPublisher()
+    manifest = DashboardPublisher(publisher, args.page_size).publish()
+    changed = publisher.save()
+
+    for name, dataset in manifest['datasets'].items():
+        first = dataset['pages'][0] if dataset['pages'] else {'bytes': 0, 'gzip_bytes': 0}
+        total = sum(page['bytes'] for page in dataset['pages'])
+        print(f"{name}: {dataset['rows']} rows in {len(dataset['pages'])} pages "
+              f"and {len(dataset['shards'])} provider shards")
+        print(f"  all pages: {total:,} bytes; first page: {first['bytes']:,} bytes "
+              f"({first['gzip_bytes']:,} gzipped)")
+    print(f"\n{len(changed)} files changed, {len(publisher.retired)} retired, "
+          f"{publisher.stats['unchanged']} unchanged (see {publisher.manifest_file})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+RDAP Bootstrap Index
+
+Parses a local copy of the IANA RDAP bootstrap file (dns.json) into a label
+trie that maps TLDs to registry RDAP base URLs, so bulk tooling can route
+domain names without re-reading JSON or scanning the service list.
+"""
+
+import json
+import sys
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import pandas as pd
+import requests
+
+IANA_BOOTSTRAP_URL = "https://data.iana.org/rdap/dns.json"
+DEFAULT_BOOTSTRAP_FILE = Path("data/bootstrap/dns.json")
+
+
+class RDAPBootstrap:
+    """Label trie over the IANA RDAP bootstrap services."""
+
+    # Key under which a trie node stores its RDAP base URLs (never a label)
+    _URLS = object()
+
+    def __init__(self, bootstrap_file: Path = DEFAULT_BOOTSTRAP_FILE, cache_size: int = 65536):
+        self.bootstrap_file = Path(bootstrap_file)
+        self.publication = None
+        self.version = None
+        self._trie: Dict = {}
+        self.entry_count = 0
+
+        self._load()
+
+        # Memoise per instance so reloading a bootstrap file never serves stale routes
+        self.lookup = lru_cache(maxsize=cache_size)(self._lookup)
+
+    def _load(self):
+        """Parse the bootstrap file and build the label trie."""
+        with open(self.bootstrap_file, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+
+        self.publication = data.get('publication')
+        self.version = data.get('version')
+
+        for entries, urls in data.get('services', []):
+            # Prefer HTTPS endpoints, keeping the file's order otherwise
+            base_urls = sorted(
+                (url if url.endswith('/') else url + '/' for url in urls),
+                key=lambda url: not url.startswith('https://')
+            )
+            for entry in entries:
+                self._insert(entry, base_urls)
+
+    def _insert(self, entry: str, base_urls: List[str]):
+        """Insert a bootstrap entry (e.g. "com" or "co.uk") into the trie."""
+        node = self._trie
+        for label in reversed(self._labels(entry)):
+            node = node.setdefault(label, {})
+        node[self._URLS] = base_urls
+        self.entry_count += 1
+
+    @staticmethod
+    def _labels(name: str) -> List[str]:
+        """
+        Split a name into lowercase labels, ignoring a trailing root dot.
+        A malformed name with an empty label (".com", "foo..com") has none.
+        """
+        name = name.strip().lower()
+        name = name[:-1] if name.endswith('.') else name
+        if not name:
+            return []
+        try:
+            name = name.encode('idna').decode('ascii')
+        except UnicodeError:
+            pass
+        labels = name.split('.')
+        return labels if all(labels) else []
+
+    def _lookup(self, name: str) -> Optional[List[str]]:
+        """Return the RDAP base URLs for the longest matching suffix of ``name``."""
+        node = self._trie
+        match = None
+        for label in reversed(self._labels(name)):
+            node = node.get(label)
+            if node is None:
+                break
+            match = node.get(self._URLS, match)
+        return match
+
+    def base_url(self, name: str) -> Optional[str]:
+        """Return the preferred RDAP base URL for ``name``, or None if unrouted."""
+        urls = self.lookup(name)
+        return urls[0] if urls else None
+
+    def domain_url(self, name: str) -> Optional[str]:
+        """Return the registry RDAP domain query URL for ``name``."""
+        base = self.base_url(name)
+        if base is None:
+            return None
+        return f"{base}domain/{'.'.join(self._labels(name))}"
+
+    def lookup_series(self, names: pd.Series) -> pd.Series:
+        """
+        Route a column of domain names to RDAP base URLs.
+
+        Each distinct name is resolved once and the results are broadcast back
+        over the column, so repeated names cost a single dictionary lookup.
+        """
+        codes, uniques = pd.factorize(names, sort=False)
+        resolved = [self.base_url(name) if isinstance(name, str) else None for name in uniques]
+        routed = pd.Series(resolved + [None], dtype=object).take(codes)
+        routed.index = names.index
+        return routed
+
+    def tld_summary(self) -> pd.DataFrame:
+        """Return one row per bootstrap entry with its preferred base URL."""
+        rows = []
+        stack = [([], self._trie)]
+        while stack:
+            labels, node = stack.pop()
+            for label, child in node.items():
+                if label is self._URLS:
+                    rows.append({'entry': '.'.join(reversed(labels)), 'rdap_base_url': child[0]})
+                else:
+                    stack.append((labels + [label], child))
+        return pd.DataFrame(rows).sort_values('entry').reset_index(drop=True)
+
+
+def fetch_bootstrap_file(output_file: Path = DEFAULT_BOOTSTRAP_FILE) -> Path:
+    """Download a fresh copy of the IANA bootstrap file for offline use."""
+    output_file = Path(output_file)
+    output_file.parent.mkdir(parents=True, exist_ok=True)
+
+    print(f"Fetching IANA RDAP bootstrap from {IANA_BOOTSTRAP_URL}...")
+    response = requests.get(IANA_BOOTSTRAP_URL, timeout=30)
+    response.raise_for_status()
+    output_file.write_bytes(response.content)
+    print(f"Saved bootstrap file to {output_file}")
+    return output_file
+
+
+def main():
+    """Route the domain names given on the command line."""
+    args = sys.argv[1:]
+
+    if args and args[0] == "--fetch":
+        fetch_bootstrap_file()
+        args = args[1:]
+
+    if not DEFAULT_BOOTSTRAP_FILE.exists():
+        print(f"Error: bootstrap file not found at {DEFAULT_BOOTSTRAP_FILE}")
+        print("Run with --fetch to download it from IANA.")
+        sys.exit(1)
+
+    bootstrap = RDAPBootstrap()
+    print(f"Loaded {bootstrap.entry_count} bootstrap entries (publication {bootstrap.publication})")
+
+    for name in args:
+        print(f"{name}: {bootstrap.domain_url(name) or 'no RDAP service'}")
+
+
+if __name__ == "__main__":
+    main()
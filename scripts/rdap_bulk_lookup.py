@@ -0,0 +1,356 @@
+#!/usr/bin/env python3
+"""
+Bulk RDAP Domain Lookup
+
+Routes a stream of domain names to their registry RDAP server (via the IANA
+bootstrap index) and then to the registrar RDAP server referenced in the
+registry response. Every RDAP server gets its own queue, worker pool and
+request-rate cap, so a slow server only delays its own domains while the
+rest keep flowing. Parsed results are streamed to an NDJSON file.
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Optional, Tuple
+from urllib.parse import urlparse
+
+import aiohttp
+import ijson
+import pandas as pd
+
+from json_stream import encode_record
+from rdap_bootstrap import DEFAULT_BOOTSTRAP_FILE, RDAPBootstrap
+from rdap_entity_parser import parse_rdap_response
+from url_normalizer import normalize_host_series
+
+RDAP_HEADERS = {
+    'Accept': 'application/rdap+json, application/json',
+    'User-Agent': 'rdap-registry-analysis/1.0 (bulk lookup)'
+}
+
+
+class HostScheduler:
+    """Per-server politeness state: a job queue, worker pool and rate cap."""
+
+    def __init__(self, host: str, concurrency: int, rate: float):
+        self.host = host
+        self.concurrency = concurrency
+        self.rate = rate
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.workers = []
+        self.requests = 0
+        self.errors = 0
+        self._next_slot = 0.0
+
+    async def wait_for_slot(self):
+        """Space requests to this host at most ``rate`` per second, and past any back-off."""
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        slot = max(now, self._next_slot)
+        if self.rate > 0:
+            self._next_slot = slot + 1.0 / self.rate
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+    async def back_off(self, seconds: float):
+        """Push this host's next request slot out, e.g. after an HTTP 429."""
+        loop = asyncio.get_running_loop()
+        self._next_slot = max(self._next_slot, loop.time() + seconds)
+
+
+class BulkRDAPLookup:
+    """Asynchronous bulk RDAP lookups with per-server scheduling."""
+
+    def __init__(self, bootstrap: RDAPBootstrap, output_file: Path,
+                 registrar_hosts: Optional[Dict[int, str]] = None,
+                 per_host_concurrency: int = 4, per_host_rate: float = 5.0,
+                 max_pending: int = 1000, timeout: float = 20.0,
+                 max_retries: int = 2, follow_registrar: bool = True):
+        self.bootstrap = bootstrap
+        self.output_file = Path(output_file)
+        self.registrar_hosts = registrar_hosts or {}
+        self.per_host_concurrency = per_host_concurrency
+        self.per_host_rate = per_host_rate
+        self.max_pending = max_pending
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.max_retries = max_retries
+        self.follow_registrar = follow_registrar
+
+        self.schedulers: Dict[str, HostScheduler] = {}
+        self.stats = Counter()
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._output = None
+        self._pending: Optional[asyncio.Semaphore] = None
+        self._outstanding = 0
+        self._drained: Optional[asyncio.Event] = None
+
+    async def run(self, domains: Iterable[str]) -> Counter:
+        """Look up every domain in ``domains`` and stream results to disk."""
+        self.output_file.parent.mkdir(parents=True, exist_ok=True)
+        self._pending = asyncio.Semaphore(self.max_pending)
+        self._drained = asyncio.Event()
+        self._drained.set()
+
+        connector = aiohttp.TCPConnector(limit=0, limit_per_host=self.per_host_concurrency,
+                                         ttl_dns_cache=300)
+        try:
+            with open(self.output_file, 'wb') as output:
+                self._output = output
+                async with aiohttp.ClientSession(connector=connector, headers=RDAP_HEADERS,
+                                                 timeout=self.timeout) as session:
+                    self._session = session
+                    for domain in domains:
+                        domain = domain.strip().rstrip('.').lower()
+                        if domain:
+                            await self._pending.acquire()
+                            self._submit(domain)
+                    await self._drained.wait()
+        finally:
+            for scheduler in self.schedulers.values():
+                for worker in scheduler.workers:
+                    worker.cancel()
+            self._session = None
+            self._output = None
+
+        return self.stats
+
+    def _submit(self, domain: str):
+        """Start a lookup at the domain's registry RDAP server."""
+        self._outstanding += 1
+        self._drained.clear()
+        self.stats['submitted'] += 1
+
+        record = {
+            'domain': domain,
+            'registry_url': None,
+            'registry_status': None,
+            'registrar_iana_id': None,
+            'registrar_name': None,
+            'registrar_url': None,
+            'registrar_host': None,
+            'registrar_status': None,
+            'registrar_contact': None,
+            'error': None
+        }
+
+        try:
+            record['registry_url'] = self.bootstrap.domain_url(domain)
+        except Exception as e:
+            # A malformed input line fails alone rather than the whole run
+            record['error'] = f"{type(e).__name__}: {e}"
+            self._finish(record)
+            return
+
+        if record['registry_url'] is None:
+            record['error'] = 'No registry RDAP service in bootstrap'
+            self._finish(record)
+        else:
+            self._enqueue('registry', record['registry_url'], record)
+
+    def _enqueue(self, stage: str, url: str, record: Dict):
+        """Queue a fetch on the scheduler for the URL's host."""
+        host = urlparse(url).netloc.lower()
+        scheduler = self.schedulers.get(host)
+        if scheduler is None:
+            scheduler = HostScheduler(host, self.per_host_concurrency, self.per_host_rate)
+            scheduler.workers = [
+                asyncio.create_task(self._worker(scheduler))
+                for _ in range(scheduler.concurrency)
+            ]
+            self.schedulers[host] = scheduler
+        scheduler.queue.put_nowait((stage, url, record))
+
+    async def _worker(self, scheduler: HostScheduler):
+        """Drain one host's queue, respecting its rate cap."""
+        while True:
+            stage, url, record = await scheduler.queue.get()
+            try:
+                if stage == 'registry':
+                    status, data, error = await self._fetch(scheduler, url, json.loads)
+                    self._handle_registry(record, status, data, error)
+                else:
+                    status, data, error = await self._fetch(scheduler, url, parse_rdap_response)
+                    self._handle_registrar(record, status, data, error)
+            except Exception as e:
+                record['error'] = f"{type(e).__name__}: {e}"
+                self._finish(record)
+            finally:
+                scheduler.queue.task_done()
+
+    async def _fetch(self, scheduler: HostScheduler, url: str,
+                     parse: Callable[[bytes], Dict]) -> Tuple[Optional[int], Optional[Dict], Optional[str]]:
+        """GET an RDAP URL, returning (status, parsed body, error)."""
+        for attempt in range(self.max_retries + 1):
+            await scheduler.wait_for_slot()
+            scheduler.requests += 1
+            try:
+                async with self._session.get(url) as response:
+                    if response.status == 429 and attempt < self.max_retries:
+                        retry_after = response.headers.get('Retry-After', '')
+                        await scheduler.back_off(float(retry_after) if retry_after.isdigit() else 2.0 ** attempt)
+                        continue
+                    if response.status != 200:
+                        scheduler.errors += 1
+                        return response.status, None, f"HTTP {response.status}"
+                    return response.status, parse(await response.read()), None
+            except (aiohttp.ClientError, asyncio.TimeoutError, ValueError, ijson.JSONError) as e:
+                if attempt < self.max_retries:
+                    continue
+                scheduler.errors += 1
+                return None, None, f"{type(e).__name__}: {e}" if str(e) else type(e).__name__
+        return None, None, 'Retries exhausted'
+
+    def _handle_registry(self, record: Dict, status: Optional[int], data: Optional[Dict], error: Optional[str]):
+        """Record the registry response and follow on to the registrar server."""
+        record['registry_status'] = status
+        if error:
+            record['error'] = error
+            self._finish(record)
+            return
+
+        iana_id, name = self._parse_registrar_entity(data)
+        record['registrar_iana_id'] = iana_id
+        record['registrar_name'] = name
+        record['registrar_url'] = self._registrar_url(record['domain'], data, iana_id)
+        if record['registrar_url']:
+            record['registrar_host'] = urlparse(record['registrar_url']).netloc.lower()
+
+        if self.follow_registrar and record['registrar_url']:
+            self._enqueue('registrar', record['registrar_url'], record)
+        else:
+            self._finish(record)
+
+    def _handle_registrar(self, record: Dict, status: Optional[int], contact: Optional[Dict], error: Optional[str]):
+        """Record the registrar response and its contact details."""
+        record['registrar_status'] = status
+        record['registrar_contact'] = contact
+        if error:
+            record['error'] = error
+        self._finish(record)
+
+    @staticmethod
+    def _parse_registrar_entity(data: Dict) -> Tuple[Optional[int], Optional[str]]:
+        """Pull the registrar IANA id and name from a registry domain response."""
+        for entity in data.get('entities', []):
+            if 'registrar' not in entity.get('roles', []):
+                continue
+
+            iana_id = None
+            for public_id in entity.get('publicIds', []):
+                if public_id.get('type') == 'IANA Registrar ID':
+                    try:
+                        iana_id = int(public_id.get('identifier'))
+                    except (TypeError, ValueError):
+                        pass
+
+            name = None
+            vcard = entity.get('vcardArray', [None, []])
+            for prop in vcard[1] if len(vcard) > 1 else []:
+                if prop and prop[0] == 'fn':
+                    name = prop[3]
+                    break
+
+            return iana_id, name
+        return None, None
+
+    def _registrar_url(self, domain: str, data: Dict, iana_id: Optional[int]) -> Optional[str]:
+        """Find the registrar RDAP URL, falling back to the known host for the IANA id."""
+        for link in data.get('links', []):
+            href = link.get('href', '')
+            if link.get('rel') == 'related' and '/domain/' in href.lower():
+                return href
+
+        host = self.registrar_hosts.get(iana_id)
+        if host:
+            return f"https://{host}/domain/{domain}"
+        return None
+
+    def _finish(self, record: Dict):
+        """Write a completed record and free its pending slot."""
+        record['fetched_at'] = datetime.now().isoformat()
+        self._output.write(encode_record(record) + b'\n')
+        self._output.flush()
+
+        self.stats['errors' if record['error'] else 'completed'] += 1
+        if record['registrar_host']:
+            self.stats[f"registrar_host:{record['registrar_host']}"] += 1
+
+        self._outstanding -= 1
+        self._pending.release()
+        if self._outstanding == 0:
+            self._drained.set()
+
+
+def load_registrar_hosts(csv_file: Path = Path("all_gateway_registrars.csv")) -> Dict[int, str]:
+    """Map IANA ids to their known registrar RDAP host."""
+    if not Path(csv_file).exists():
+        return {}
+    df = pd.read_csv(csv_file, usecols=['iana_id', 'rdap_url'])
+    df['rdap_host'] = normalize_host_series(df['rdap_url'])
+    df = df.dropna(subset=['iana_id', 'rdap_host'])
+    return dict(zip(df['iana_id'].astype(int), df['rdap_host']))
+
+
+def read_domains(domains_file: Path) -> Iterable[str]:
+    """Stream domain names from a file, one per line."""
+    with open(domains_file, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.split('#', 1)[0].strip()
+            if line:
+                yield line
+
+
+def main():
+    """Main entry point for the script."""
+    parser = argparse.ArgumentParser(description="Bulk RDAP domain lookups")
+    parser.add_argument('domains_file', help="File with one domain name per line")
+    parser.add_argument('--output', default="data/processed/rdap_domain_lookups.ndjson")
+    parser.add_argument('--bootstrap', default=str(DEFAULT_BOOTSTRAP_FILE))
+    parser.add_argument('--concurrency', type=int, default=4, help="Concurrent requests per RDAP server")
+    parser.add_argument('--rate', type=float, default=5.0, help="Requests per second per RDAP server")
+    parser.add_argument('--max-pending', type=int, default=1000)
+    parser.add_argument('--registry-only', action='store_true', help="Skip registrar RDAP lookups")
+    parser.add_argument('--expect-host', help="Report how many domains resolve through this registrar RDAP host")
+    args = parser.parse_args()
+
+    if not Path(args.bootstrap).exists():
+        print(f"Error: bootstrap file not found at {args.bootstrap}")
+        print("Run scripts/rdap_bootstrap.py --fetch first.")
+        sys.exit(1)
+
+    lookup = BulkRDAPLookup(
+        RDAPBootstrap(args.bootstrap),
+        Path(args.output),
+        registrar_hosts=load_registrar_hosts(),
+        per_host_concurrency=args.concurrency,
+        per_host_rate=args.rate,
+        max_pending=args.max_pending,
+        follow_registrar=not args.registry_only
+    )
+    stats = asyncio.run(lookup.run(read_domains(Path(args.domains_file))))
+
+    print("\nLookup Summary:")
+    print(f"Domains submitted: {stats['submitted']}")
+    print(f"Completed: {stats['completed']}")
+    print(f"Errors: {stats['errors']}")
+    print(f"RDAP servers contacted: {len(lookup.schedulers)}")
+
+    print("\nRegistrar RDAP hosts:")
+    hosts = {key.split(':', 1)[1]: count for key, count in stats.items() if key.startswith('registrar_host:')}
+    for host, count in sorted(hosts.items(), key=lambda x: x[1], reverse=True):
+        print(f"  {host}: {count} domains")
+
+    if args.expect_host:
+        matched = hosts.get(args.expect_host.lower(), 0)
+        print(f"\n{matched}/{stats['submitted']} domains resolve through {args.expect_host}")
+
+    print(f"\nResults saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
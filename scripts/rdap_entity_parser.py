@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Streaming RDAP Entity Parser
+
+Extracts registrar and abuse contact details from RDAP domain responses using
+an incremental JSON parser. Only the top-level ``entities`` are materialised;
+notices, events, nameservers and other blocks are skipped as they stream by.
+The output uses the same flat field names as the ICANN lookup enrichment, so
+RDAP can act as a second enrichment source.
+"""
+
+import io
+import json
+import sys
+from pathlib import Path
+from typing import Dict, IO, List, Optional, Union
+
+import ijson
+
+ENTITY_PREFIX = 'entities.item'
+
+# jCard address components, in RFC 6350 order
+ADR_FIELDS = ['po_box', 'extended', 'street', 'city', 'state', 'postal_code', 'country']
+
+
+def parse_rdap_response(source: Union[bytes, str, IO]) -> Dict:
+    """
+    Parse an RDAP domain response into a flat registrar contact record.
+
+    Args:
+        source: Raw response bytes/text or a binary file object
+
+    Returns:
+        Dictionary with the enrichment fields that were present
+    """
+    if isinstance(source, str):
+        source = source.encode('utf-8')
+    if isinstance(source, bytes):
+        source = io.BytesIO(source)
+
+    parsed = {}
+    builder = None
+
+    for prefix, event, value in ijson.parse(source):
+        if builder is not None:
+            builder.event(event, value)
+            if prefix == ENTITY_PREFIX and event == 'end_map':
+                entity = builder.value
+                builder = None
+                if 'registrar' in entity.get('roles', []):
+                    parsed.update(_parse_registrar_entity(entity))
+        elif prefix == ENTITY_PREFIX and event == 'start_map':
+            builder = ijson.ObjectBuilder()
+            builder.event(event, value)
+        elif prefix == 'port43' and event == 'string':
+            parsed['whois_server'] = value
+
+    return parsed
+
+
+def _parse_registrar_entity(entity: Dict) -> Dict:
+    """Flatten a registrar entity and its nested abuse contact."""
+    parsed = {}
+
+    iana_id = _iana_id(entity)
+    if iana_id is not None:
+        parsed['iana_id'] = iana_id
+
+    card = _parse_vcard(entity.get('vcardArray'))
+    for field in ['website_name', 'website', 'email', 'phone', 'fax',
+                  'street', 'city', 'state', 'postal_code', 'country']:
+        if card.get(field):
+            parsed[field] = card[field]
+
+    if entity.get('status'):
+        parsed['status'] = ', '.join(entity['status'])
+
+    for link in entity.get('links', []):
+        if link.get('rel') == 'about' and link.get('href'):
+            parsed['referral_url'] = link['href']
+            break
+
+    for child in entity.get('entities', []):
+        if 'abuse' in child.get('roles', []):
+            abuse_card = _parse_vcard(child.get('vcardArray'))
+            if abuse_card.get('email'):
+                parsed['abuse_email'] = abuse_card['email']
+            if abuse_card.get('phone'):
+                parsed['abuse_phone'] = abuse_card['phone']
+            break
+
+    return parsed
+
+
+def _iana_id(entity: Dict) -> Optional[int]:
+    """Return the IANA Registrar ID from an entity's publicIds."""
+    for public_id in entity.get('publicIds', []):
+        if public_id.get('type') == 'IANA Registrar ID':
+            try:
+                return int(public_id.get('identifier'))
+            except (TypeError, ValueError):
+                return None
+    return None
+
+
+def _parse_vcard(vcard_array: Optional[List]) -> Dict:
+    """Map jCard properties onto flat contact fields."""
+    card = {}
+    if not vcard_array or len(vcard_array) < 2:
+        return card
+
+    for prop in vcard_array[1]:
+        if not isinstance(prop, list) or len(prop) < 4:
+            continue
+        name, params, value = prop[0], prop[1] or {}, prop[3]
+
+        if name == 'fn':
+            card.setdefault('website_name', value)
+        elif name == 'url':
+            card.setdefault('website', value)
+        elif name == 'email':
+            card.setdefault('email', value)
+        elif name == 'tel':
+            types = params.get('type', [])
+            types = [types] if isinstance(types, str) else types
+            key = 'fax' if 'fax' in types else 'phone'
+            card.setdefault(key, _strip_tel(value))
+        elif name == 'adr':
+            card.update(_parse_adr(value, params))
+
+    return card
+
+
+def _strip_tel(value: str) -> str:
+    """Turn a ``tel:`` URI into a plain phone number."""
+    return value[4:] if isinstance(value, str) and value.startswith('tel:') else value
+
+
+def _parse_adr(value, params: Dict) -> Dict:
+    """Flatten a structured jCard address, falling back to its label."""
+    address = {}
+    if isinstance(value, list):
+        for field, component in zip(ADR_FIELDS, value):
+            if isinstance(component, list):
+                component = ', '.join(c for c in component if c)
+            if component and field not in ('po_box', 'extended'):
+                address[field] = component
+
+    if 'street' not in address and params.get('label'):
+        address['street'] = params['label'].replace('\n', ', ')
+    if 'country' not in address and params.get('cc'):
+        address['country'] = params['cc']
+
+    return address
+
+
+def main():
+    """Parse the RDAP response files given on the command line."""
+    if len(sys.argv) < 2:
+        print("Usage: python scripts/rdap_entity_parser.py <response.json> [...]")
+        sys.exit(1)
+
+    for response_file in sys.argv[1:]:
+        with open(Path(response_file), 'rb') as f:
+            record = parse_rdap_response(f)
+        print(json.dumps({'file': response_file, **record}, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
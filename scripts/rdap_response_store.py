@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+"""
+Compact RDAP Response Store
+
+Stores raw RDAP responses keyed by domain in a single SQLite file. Blocks that
+repeat across responses from the same server (notices, links, remarks,
+registrar entities, conformance) are split out into content-addressed
+fragments, leaving a small per-domain delta. Deltas and fragments are
+compressed with a zstd dictionary trained per RDAP host.
+"""
+
+import hashlib
+import json
+import sqlite3
+import sys
+import time
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import zstandard as zstd
+
+DEFAULT_STORE_FILE = Path("data/processed/rdap_responses.db")
+
+# Top-level list members that are stored item by item as shared fragments
+FRAGMENT_LIST_KEYS = ('notices', 'links', 'remarks', 'entities')
+# Top-level blocks that are stored whole as a shared fragment
+FRAGMENT_BLOCK_KEYS = ('rdapConformance',)
+# Only entities in these roles repeat across domains; contacts stay inline
+FRAGMENT_ENTITY_ROLES = {'registrar', 'reseller'}
+FRAGMENT_MARKER = '$frag'
+
+# Dictionary id 0 means plain zstd without a trained dictionary
+NO_DICTIONARY = 0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS dictionaries (
+    dict_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    host TEXT NOT NULL,
+    data BLOB NOT NULL,
+    sample_count INTEGER NOT NULL,
+    created_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_dictionaries_host ON dictionaries (host);
+CREATE TABLE IF NOT EXISTS fragments (
+    hash TEXT PRIMARY KEY,
+    host TEXT NOT NULL,
+    dict_id INTEGER NOT NULL,
+    payload BLOB NOT NULL,
+    raw_size INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS records (
+    domain TEXT PRIMARY KEY,
+    host TEXT NOT NULL,
+    dict_id INTEGER NOT NULL,
+    payload BLOB NOT NULL,
+    raw_size INTEGER NOT NULL,
+    stored_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_records_host ON records (host);
+"""
+
+
+def _encode(value) -> bytes:
+    """Canonical JSON encoding, so identical blocks hash identically."""
+    return json.dumps(value, sort_keys=True, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+
+class RDAPResponseStore:
+    """Deduplicated, dictionary-compressed RDAP response storage."""
+
+    def __init__(self, store_file: Path = DEFAULT_STORE_FILE, level: int = 9,
+                 dict_size: int = 32768, min_training_samples: int = 64,
+                 latency_window: int = 10000):
+        self.store_file = Path(store_file)
+        self.store_file.parent.mkdir(parents=True, exist_ok=True)
+        self.level = level
+        self.dict_size = dict_size
+        self.min_training_samples = min_training_samples
+
+        self.conn = sqlite3.connect(self.store_file)
+        self.conn.executescript(SCHEMA)
+
+        self._host_dicts: Dict[str, int] = {}
+        self._compressors: Dict[int, zstd.ZstdCompressor] = {}
+        self._decompressors: Dict[int, zstd.ZstdDecompressor] = {}
+        self._fragment_cache: Dict[str, object] = {}
+        self._known_fragments = set()
+        self.read_latencies = deque(maxlen=latency_window)
+
+        for host, dict_id in self.conn.execute(
+                "SELECT host, MAX(dict_id) FROM dictionaries GROUP BY host"):
+            self._host_dicts[host] = dict_id
+
+    def close(self):
+        """Close the underlying database."""
+        self.conn.close()
+
+    # Compression
+
+    def _compressor(self, dict_id: int) -> zstd.ZstdCompressor:
+        if dict_id not in self._compressors:
+            dict_data = self._dictionary(dict_id)
+            self._compressors[dict_id] = zstd.ZstdCompressor(level=self.level, dict_data=dict_data)
+        return self._compressors[dict_id]
+
+    def _decompressor(self, dict_id: int) -> zstd.ZstdDecompressor:
+        if dict_id not in self._decompressors:
+            self._decompressors[dict_id] = zstd.ZstdDecompressor(dict_data=self._dictionary(dict_id))
+        return self._decompressors[dict_id]
+
+    def _dictionary(self, dict_id: int) -> Optional[zstd.ZstdCompressionDict]:
+        if dict_id == NO_DICTIONARY:
+            return None
+        row = self.conn.execute("SELECT data FROM dictionaries WHERE dict_id = ?", (dict_id,)).fetchone()
+        return zstd.ZstdCompressionDict(row[0])
+
+    def train_dictionary(self, host: str, samples: List[bytes]) -> int:
+        """Train and register a zstd dictionary for ``host``; returns its id."""
+        try:
+            trained = zstd.train_dictionary(self.dict_size, samples)
+        except zstd.ZstdError as e:
+            print(f"  Dictionary training failed for {host}: {e}")
+            return self._host_dicts.get(host, NO_DICTIONARY)
+
+        cursor = self.conn.execute(
+            "INSERT INTO dictionaries (host, data, sample_count, created_at) VALUES (?, ?, ?, ?)",
+            (host, trained.as_bytes(), len(samples), datetime.now().isoformat())
+        )
+        self._host_dicts[host] = cursor.lastrowid
+        return cursor.lastrowid
+
+    # Splitting
+
+    def _split(self, domain: str, response: Dict) -> Tuple[Dict, Dict[str, bytes]]:
+        """Separate a response into a per-domain delta and shared fragments."""
+        delta = dict(response)
+        fragments = {}
+
+        def to_fragment(value):
+            encoded = _encode(value)
+            digest = hashlib.blake2b(encoded, digest_size=16).hexdigest()
+            fragments[digest] = encoded
+            return {FRAGMENT_MARKER: digest}
+
+        def is_shared(key, item):
+            if not isinstance(item, dict):
+                return False
+            if key == 'entities' and not FRAGMENT_ENTITY_ROLES.intersection(item.get('roles', [])):
+                return False
+            # Anything naming the domain itself (e.g. the self link) stays inline
+            return domain not in _encode(item).decode('utf-8').lower()
+
+        for key in FRAGMENT_LIST_KEYS:
+            items = response.get(key)
+            if isinstance(items, list):
+                delta[key] = [to_fragment(item) if is_shared(key, item) else item for item in items]
+
+        for key in FRAGMENT_BLOCK_KEYS:
+            if key in response:
+                delta[key] = to_fragment(response[key])
+
+        return delta, fragments
+
+    def _resolve(self, value):
+        """Replace fragment markers in a delta with their stored blocks."""
+        if isinstance(value, dict) and len(value) == 1 and FRAGMENT_MARKER in value:
+            return self._fragment(value[FRAGMENT_MARKER])
+        if isinstance(value, list):
+            return [self._resolve(item) for item in value]
+        return value
+
+    def _fragment(self, digest: str):
+        if digest not in self._fragment_cache:
+            dict_id, payload = self.conn.execute(
+                "SELECT dict_id, payload FROM fragments WHERE hash = ?", (digest,)).fetchone()
+            self._fragment_cache[digest] = json.loads(self._decompressor(dict_id).decompress(payload))
+        return self._fragment_cache[digest]
+
+    # Writing and reading
+
+    def put_many(self, host: str, responses: Iterable[Tuple[str, Dict]]) -> int:
+        """
+        Store (domain, response) pairs served by ``host``.
+
+        The first batch large enough for a host trains that host's dictionary.
+        """
+        host = host.lower()
+        prepared = []
+        for domain, response in responses:
+            domain = domain.strip().rstrip('.').lower()
+            delta, fragments = self._split(domain, response)
+            prepared.append((domain, _encode(delta), fragments, len(_encode(response))))
+
+        if host not in self._host_dicts and len(prepared) >= self.min_training_samples:
+            samples = [encoded_delta for _, encoded_delta, _, _ in prepared]
+            samples.extend({f: e for _, _, frags, _ in prepared for f, e in frags.items()}.values())
+            self.train_dictionary(host, samples)
+
+        dict_id = self._host_dicts.get(host, NO_DICTIONARY)
+        compressor = self._compressor(dict_id)
+        stored_at = datetime.now().isoformat()
+
+        with self.conn:
+            for domain, encoded_delta, fragments, raw_size in prepared:
+                for digest, encoded in fragments.items():
+                    if digest in self._known_fragments:
+                        continue
+                    self.conn.execute(
+                        "INSERT OR IGNORE INTO fragments (hash, host, dict_id, payload, raw_size) VALUES (?, ?, ?, ?, ?)",
+                        (digest, host, dict_id, compressor.compress(encoded), len(encoded))
+                    )
+                    self._known_fragments.add(digest)
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO records (domain, host, dict_id, payload, raw_size, stored_at) VALUES (?, ?, ?, ?, ?, ?)",
+                    (domain, host, dict_id, compressor.compress(encoded_delta), raw_size, stored_at)
+                )
+
+        return len(prepared)
+
+    def put(self, domain: str, host: str, response: Dict):
+        """Store a single response."""
+        self.put_many(host, [(domain, response)])
+
+    def get(self, domain: str) -> Optional[Dict]:
+        """Return the full RDAP response stored for ``domain``."""
+        start = time.perf_counter()
+        row = self.conn.execute(
+            "SELECT dict_id, payload FROM records WHERE domain = ?",
+            (domain.strip().rstrip('.').lower(),)
+        ).fetchone()
+        if row is None:
+            return None
+
+        delta = json.loads(self._decompressor(row[0]).decompress(row[1]))
+        response = {key: self._resolve(value) if key in FRAGMENT_LIST_KEYS + FRAGMENT_BLOCK_KEYS else value
+                    for key, value in delta.items()}
+
+        self.read_latencies.append(time.perf_counter() - start)
+        return response
+
+    def __contains__(self, domain: str) -> bool:
+        return self.conn.execute(
+            "SELECT 1 FROM records WHERE domain = ?", (domain.strip().rstrip('.').lower(),)
+        ).fetchone() is not None
+
+    # Metrics
+
+    def metrics(self) -> Dict:
+        """Report compression ratios per host and observed read latencies."""
+        hosts = {}
+        for host, records, raw, stored in self.conn.execute(
+                "SELECT host, COUNT(*), SUM(raw_size), SUM(LENGTH(payload)) FROM records GROUP BY host"):
+            hosts[host] = {'records': records, 'raw_bytes': raw, 'stored_bytes': stored}
+        for host, count, stored in self.conn.execute(
+                "SELECT host, COUNT(*), SUM(LENGTH(payload)) FROM fragments GROUP BY host"):
+            hosts.setdefault(host, {'records': 0, 'raw_bytes': 0, 'stored_bytes': 0})
+            hosts[host]['fragments'] = count
+            hosts[host]['stored_bytes'] += stored
+        for host, stored in self.conn.execute(
+                "SELECT host, SUM(LENGTH(data)) FROM dictionaries GROUP BY host"):
+            hosts.setdefault(host, {'records': 0, 'raw_bytes': 0, 'stored_bytes': 0})
+            hosts[host]['stored_bytes'] += stored
+
+        for stats in hosts.values():
+            stats.setdefault('fragments', 0)
+            stats['compression_ratio'] = stats['raw_bytes'] / stats['stored_bytes'] if stats['stored_bytes'] else 0
+
+        raw_total = sum(s['raw_bytes'] for s in hosts.values())
+        stored_total = sum(s['stored_bytes'] for s in hosts.values())
+
+        latencies = sorted(self.read_latencies)
+
+        def percentile(p):
+            return latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000 if latencies else 0
+
+        return {
+            'records': sum(s['records'] for s in hosts.values()),
+            'raw_bytes': raw_total,
+            'stored_bytes': stored_total,
+            'compression_ratio': raw_total / stored_total if stored_total else 0,
+            'read_latency_ms': {
+                'samples': len(latencies),
+                'p50': percentile(0.50),
+                'p95': percentile(0.95),
+                'p99': percentile(0.99)
+            },
+            'hosts': hosts
+        }
+
+
+def main():
+    """Import a directory of RDAP responses, or look one up by domain."""
+    if len(sys.argv) < 2 or sys.argv[1] not in ('import', 'get', 'stats'):
+        print("Usage:")
+        print("  python scripts/rdap_response_store.py import <host> <dir of domain.json files>")
+        print("  python scripts/rdap_response_store.py get <domain>")
+        print("  python scripts/rdap_response_store.py stats")
+        sys.exit(1)
+
+    store = RDAPResponseStore()
+    command = sys.argv[1]
+
+    if command == 'import':
+        host, response_dir = sys.argv[2], Path(sys.argv[3])
+        files = sorted(response_dir.glob('*.json'))
+        count = store.put_many(host, ((f.stem, json.loads(f.read_text(encoding='utf-8'))) for f in files))
+        print(f"Stored {count} responses for {host}")
+    elif command == 'get':
+        response = store.get(sys.argv[2])
+        if response is None:
+            print(f"No response stored for {sys.argv[2]}")
+            sys.exit(1)
+        print(json.dumps(response, indent=2, ensure_ascii=False))
+    else:
+        # Sample reads so the latency figures reflect this store
+        for (domain,) in store.conn.execute("SELECT domain FROM records ORDER BY RANDOM() LIMIT 1000"):
+            store.get(domain)
+        print(json.dumps(store.metrics(), indent=2))
+
+    store.close()
+
+
+if __name__ == "__main__":
+    main()
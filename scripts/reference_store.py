@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""
+Known-Registrar Reference Store
+
+Hand-curated registrar reference data (known websites, WHOIS servers,
+Registry Gateway membership, operator families) lives in data/reference/known_registrars.json
+and is loaded into an indexed SQLite database: IANA id primary key, an FTS5
+index on names and named registrar lists. The JSON seed is re-imported as a
+new version whenever it changes, and every update keeps the previous row in
+a history table. Enrichment scripts share one store per process through
+``get_reference_store()``.
+"""
+
+import argparse
+import hashlib
+import json
+import sqlite3
+from datetime import datetime
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+# Resolved from the repository root, since callers run from different directories
+REPO_ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_SEED_FILE = REPO_ROOT / "data" / "reference" / "known_registrars.json"
+DEFAULT_DB_FILE = REPO_ROOT / "data" / "reference" / "known_registrars.db"
+
+REGISTRAR_FIELDS = ['iana_id', 'name', 'website', 'whois_server', 'status', 'notes', 'domains']
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS registrars (
+    iana_id INTEGER PRIMARY KEY,
+    name TEXT,
+    website TEXT,
+    whois_server TEXT,
+    status TEXT,
+    notes TEXT,
+    domains INTEGER,
+    version INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS registrar_lists (
+    list TEXT NOT NULL,
+    iana_id INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    PRIMARY KEY (list, iana_id)
+);
+CREATE TABLE IF NOT EXISTS versions (
+    version INTEGER PRIMARY KEY AUTOINCREMENT,
+    applied_at TEXT NOT NULL,
+    source TEXT NOT NULL,
+    changed INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS history (
+    iana_id INTEGER NOT NULL,
+    version INTEGER NOT NULL,
+    record TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS history_iana_id ON history (iana_id);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS registrars_fts USING fts5(
+    name, notes, content='registrars', content_rowid='iana_id'
+);
+"""
+
+
+class ReferenceStore:
+    """SQLite-backed known-registrar reference data."""
+
+    def __init__(self, db_file: Path = DEFAULT_DB_FILE, seed_file: Optional[Path] = DEFAULT_SEED_FILE,
+                 cache_size: int = 4096):
+        self.get = lru_cache(maxsize=cache_size)(self._get)
+
+        self.db_file = Path(db_file)
+        self.db_file.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.db_file))
+        self.conn.row_factory = sqlite3.Row
+        self.conn.executescript(SCHEMA)
+
+        if seed_file is not None and Path(seed_file).exists():
+            self.sync_seed(Path(seed_file))
+
+    def sync_seed(self, seed_file: Path = DEFAULT_SEED_FILE) -> Optional[int]:
+        """Import the JSON seed as a new version if it changed since the last import."""
+        content = Path(seed_file).read_bytes()
+        digest = hashlib.sha256(content).hexdigest()
+        if self._meta('seed_sha256') == digest:
+            return None
+
+        seed = json.loads(content)
+        version = self.update(seed.get('registrars', []), source=f"seed:{Path(seed_file).name}",
+                              lists=seed.get('lists', {}))
+        self._set_meta('seed_sha256', digest)
+        self.conn.commit()
+        return version
+
+    def _meta(self, key: str) -> Optional[str]:
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row['value'] if row else None
+
+    def _set_meta(self, key: str, value: str):
+        self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    @property
+    def version(self) -> int:
+        """Current data version (0 for an empty store)."""
+        row = self.conn.execute("SELECT MAX(version) AS version FROM versions").fetchone()
+        return row['version'] or 0
+
+    def update(self, records: Iterable[Dict], source: str,
+               lists: Optional[Dict[str, List[int]]] = None) -> int:
+        """
+        Upsert registrar records and replace the given lists as one new version.
+
+        Fields missing from a record keep their stored value; unchanged records
+        are not rewritten. The replaced rows are kept in the history table.
+
+        Returns:
+            The new version number
+        """
+        with self.conn:
+            cursor = self.conn.execute(
+                "INSERT INTO versions (applied_at, source, changed) VALUES (?, ?, 0)",
+                (datetime.now().isoformat(), source)
+            )
+            version = cursor.lastrowid
+            changed = 0
+
+            for record in records:
+                iana_id = int(record['iana_id'])
+                current = self._get(iana_id)
+                merged = {field: (current or {}).get(field) for field in REGISTRAR_FIELDS}
+                merged.update({k: v for k, v in record.items() if k in REGISTRAR_FIELDS})
+                merged['iana_id'] = iana_id
+                if current is not None and all(current.get(f) == merged[f] for f in REGISTRAR_FIELDS):
+                    continue
+
+                if current is not None:
+                    self.conn.execute(
+                        "INSERT INTO history (iana_id, version, record) VALUES (?, ?, ?)",
+                        (iana_id, current['version'], json.dumps(current, ensure_ascii=False))
+                    )
+                    self.conn.execute(
+                        "INSERT INTO registrars_fts (registrars_fts, rowid, name, notes) VALUES ('delete', ?, ?, ?)",
+                        (iana_id, current['name'], current['notes'])
+                    )
+                self.conn.execute(
+                    f"INSERT OR REPLACE INTO registrars ({', '.join(REGISTRAR_FIELDS)}, version) "
+                    f"VALUES ({', '.join('?' * len(REGISTRAR_FIELDS))}, ?)",
+                    [merged[field] for field in REGISTRAR_FIELDS] + [version]
+                )
+                self.conn.execute(
+                    "INSERT INTO registrars_fts (rowid, name, notes) VALUES (?, ?, ?)",
+                    (iana_id, merged['name'], merged['notes'])
+                )
+                changed += 1
+
+            for list_name, iana_ids in (lists or {}).items():
+                self.conn.execute("DELETE FROM registrar_lists WHERE list = ?", (list_name,))
+                self.conn.executemany(
+                    "INSERT OR IGNORE INTO registrar_lists (list, iana_id, position) VALUES (?, ?, ?)",
+                    [(list_name, int(iana_id), position) for position, iana_id in enumerate(iana_ids)]
+                )
+                changed += 1
+
+            self.conn.execute("UPDATE versions SET changed = ? WHERE version = ?", (changed, version))
+        self.get.cache_clear()
+        return version
+
+    def _get(self, iana_id) -> Optional[Dict]:
+        """Registrar record by IANA id."""
+        try:
+            iana_id = int(iana_id)
+        except (TypeError, ValueError):
+            return None
+        row = self.conn.execute("SELECT * FROM registrars WHERE iana_id = ?", (iana_id,)).fetchone()
+        return dict(row) if row else None
+
+    def search(self, query: str, limit: int = 10) -> List[Dict]:
+        """Full-text search over registrar names and notes, best matches first."""
+        terms = [term for term in ''.join(c if c.isalnum() else ' ' for c in query).split() if term]
+        if not terms:
+            return []
+        match = ' '.join(f'"{term}"*' for term in terms)
+        rows = self.conn.execute(
+            "SELECT registrars.* FROM registrars_fts "
+            "JOIN registrars ON registrars.iana_id = registrars_fts.rowid "
+            "WHERE registrars_fts MATCH ? ORDER BY rank LIMIT ?",
+            (match, limit)
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    def all(self) -> List[Dict]:
+        """Every registrar record, by IANA id."""
+        return [dict(row) for row in self.conn.execute("SELECT * FROM registrars ORDER BY iana_id")]
+
+    def list_members(self, list_name: str) -> List[Dict]:
+        """Registrar records in a named list, in list order."""
+        rows = self.conn.execute(
+            "SELECT registrars.* FROM registrar_lists "
+            "JOIN registrars ON registrars.iana_id = registrar_lists.iana_id "
+            "WHERE registrar_lists.list = ? ORDER BY registrar_lists.position",
+            (list_name,)
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    def lists(self, prefix: str = '') -> Dict[str, List[int]]:
+        """IANA ids of every named list starting with ``prefix``, in list order."""
+        lists: Dict[str, List[int]] = {}
+        for row in self.conn.execute(
+            "SELECT list, iana_id FROM registrar_lists WHERE substr(list, 1, ?) = ? ORDER BY list, position",
+            (len(prefix), prefix)
+        ):
+            lists.setdefault(row['list'], []).append(row['iana_id'])
+        return lists
+
+    def history(self, iana_id: int) -> List[Dict]:
+        """Previous versions of a registrar record, newest first."""
+        rows = self.conn.execute(
+            "SELECT record FROM history WHERE iana_id = ? ORDER BY version DESC", (int(iana_id),)
+        ).fetchall()
+        return [json.loads(row['record']) for row in rows]
+
+    def versions(self) -> List[Dict]:
+        """Applied versions, newest first."""
+        return [dict(row) for row in self.conn.execute("SELECT * FROM versions ORDER BY version DESC")]
+
+    def close(self):
+        self.conn.close()
+
+
+@lru_cache(maxsize=None)
+def get_reference_store(db_file: Path = DEFAULT_DB_FILE, seed_file: Path = DEFAULT_SEED_FILE) -> ReferenceStore:
+    """The process-wide reference store."""
+    return ReferenceStore(db_file, seed_file)
+
+
+def main():
+    """Query or update the reference store."""
+    parser = argparse.ArgumentParser(description="Known-registrar reference store")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    get = subparsers.add_parser('get', help="Look up a registrar by IANA id")
+    get.add_argument('iana_id', type=int)
+
+    search = subparsers.add_parser('search', help="Search registrar names and notes")
+    search.add_argument('query')
+    search.add_argument('--limit', type=int, default=10)
+
+    members = subparsers.add_parser('list', help="Registrars in a named list")
+    members.add_argument('name')
+
+    load = subparsers.add_parser('import', help="Apply registrar records from a JSON file as a new version")
+    load.add_argument('json_file')
+
+    subparsers.add_parser('versions', help="Show applied versions")
+
+    args = parser.parse_args()
+    store = get_reference_store()
+
+    if args.command == 'get':
+        record = store.get(args.iana_id)
+        if record is None:
+            print(f"No reference record for IANA id {args.iana_id}")
+            return
+        print(json.dumps(record, indent=2, ensure_ascii=False))
+        for previous in store.history(args.iana_id):
+            print(f"  previously (v{previous['version']}): {previous}")
+    elif args.command == 'search':
+        for record in store.search(args.query, args.limit):
+            print(f"  {record['iana_id']:>6}  {record['name']}  {record['website'] or ''}")
+    elif args.command == 'list':
+        for record in store.list_members(args.name):
+            print(f"  {record['iana_id']:>6}  {record['name']}  {record['domains'] or ''}")
+    elif args.command == 'import':
+        with open(args.json_file, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        records = data.get('registrars', data) if isinstance(data, dict) else data
+        lists = data.get('lists') if isinstance(data, dict) else None
+        version = store.update(records, source=f"import:{Path(args.json_file).name}", lists=lists)
+        print(f"Applied version {version}")
+    else:
+        for version in store.versions():
+            print(f"  v{version['version']}  {version['applied_at']}  {version['source']}  "
+                  f"({version['changed']} changes)")
+
+
+if __name__ == "__main__":
+    main()
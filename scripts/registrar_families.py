@@ -0,0 +1,392 @@
+#!/usr/bin/env python3
+"""
+Registrar Family Resolution
+
+Groups registrars that belong to one operator (the Tucows brands,
+PDR/BigRock/Launchpad, ...) into families. Each registrar gets MinHash
+signatures over several signals - normalised name, website domain, contact
+email domain, declared ``duplicate`` parent, known operator and shared
+infrastructure - and LSH banding over those signatures yields candidate
+pairs in near-linear time. Candidates are scored per signal, linked above a
+confidence threshold and collapsed into families with a union-find.
+
+Known operators come from the gateway table (a REGISTRAR or SUBSIDIARY row
+names the provider that runs it) and from the curated ``family:<operator>``
+lists in the reference store, for brands no public data ties together.
+"""
+
+import argparse
+import zlib
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+import pandas as pd
+
+from reference_store import get_reference_store
+from registrar_name_index import name_aliases
+from url_normalizer import normalize_host
+
+DEFAULT_INPUT_FILE = Path("all_gateway_registrars.csv")
+DEFAULT_ENRICHED_FILES = [
+    Path("data/processed/logicboxes_registrars_enriched_v2.csv"),
+]
+DEFAULT_OUTPUT_FILE = Path("data/processed/registrar_families.csv")
+
+# Words that say what a company does rather than who it is
+GENERIC_NAME_WORDS = {
+    'the', 'of', 'and', 'de', 'domain', 'domains', 'registrar', 'registrars', 'registry',
+    'registration', 'registrations', 'names', 'name', 'internet', 'web', 'online', 'hosting',
+    'host', 'services', 'service', 'solutions', 'technologies', 'technology', 'network',
+    'networks', 'group', 'holdings', 'international', 'global', 'com', 'net', 'www',
+}
+
+# Per-signal reliability: how strongly identical values imply one operator.
+# Infrastructure is weak on purpose, since gateway hosts are shared by design.
+SIGNAL_WEIGHTS = {
+    'name': 0.85,
+    'website': 0.9,
+    'email': 0.8,
+    'declared': 0.6,
+    'operator': 0.95,
+    'infrastructure': 0.3,
+}
+
+# The enrichment's ``duplicate`` column also carries values copied across
+# unrelated resellers of one gateway (who then share its RDAP host too), so a
+# declared parent only counts once the name, website or email agrees as well
+DECLARED_CORROBORATION = 0.5
+CORROBORATING_SIGNALS = ('name', 'website', 'email')
+
+# Gateway categories whose provider is the registrar's own operator, not a platform
+OPERATOR_CATEGORIES = {'REGISTRAR', 'SUBSIDIARY'}
+FAMILY_LIST_PREFIX = 'family:'
+
+MERSENNE_PRIME = (1 << 31) - 1
+
+
+def _website_domain(value) -> Optional[str]:
+    host = normalize_host(value)
+    if host and host.startswith('www.'):
+        host = host[4:]
+    return host
+
+
+def _email_domain(value) -> Optional[str]:
+    if not isinstance(value, str) or '@' not in value:
+        return None
+    return value.rsplit('@', 1)[1].strip().lower() or None
+
+
+def _name_shingles(name) -> Set[str]:
+    """Character trigrams of the distinctive words of each name alias."""
+    shingles = set()
+    for alias in name_aliases(name):
+        # Numbered shells ("DropCatch.com 445 LLC") differ only in their number
+        words = [word for word in alias.split()
+                 if word not in GENERIC_NAME_WORDS and not word.isdigit()] or alias.split()
+        text = f" {' '.join(words)} "
+        shingles.update(text[i:i + 3] for i in range(len(text) - 2))
+    return shingles
+
+
+class MinHashLSH:
+    """MinHash signatures with banded locality-sensitive hashing."""
+
+    def __init__(self, num_perm: int = 64, bands: int = 16, seed: int = 1):
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+
+    @property
+    def threshold(self) -> float:
+        """Approximate Jaccard similarity at which pairs become likely candidates."""
+        return (1 / self.bands) ** (1 / self.rows)
+
+    def signatures(self, token_sets: List[Set[str]]) -> np.ndarray:
+        """One MinHash row per token set; empty sets get an all-max row."""
+        empty = np.iinfo(np.uint64).max
+        result = np.full((len(token_sets), self.num_perm), empty, dtype=np.uint64)
+        for i, tokens in enumerate(token_sets):
+            if not tokens:
+                continue
+            hashes = np.fromiter((zlib.crc32(t.encode('utf-8')) for t in tokens),
+                                 dtype=np.uint64, count=len(tokens))
+            permuted = (np.outer(hashes, self._a) + self._b) % MERSENNE_PRIME
+            result[i] = permuted.min(axis=0)
+        return result
+
+    def candidate_pairs(self, signatures: np.ndarray, max_bucket_size: int = 50) -> Set[Tuple[int, int]]:
+        """
+        Row pairs sharing at least one LSH band.
+
+        Buckets larger than ``max_bucket_size`` are linked as a star around
+        their first member rather than all-pairs, which keeps connectivity
+        while bounding the number of pairs to score.
+        """
+        empty = np.iinfo(np.uint64).max
+        present = np.flatnonzero(signatures[:, 0] != empty)
+        pairs: Set[Tuple[int, int]] = set()
+        for band in range(self.bands):
+            buckets: Dict[bytes, List[int]] = defaultdict(list)
+            block = signatures[:, band * self.rows:(band + 1) * self.rows]
+            for row in present.tolist():
+                buckets[block[row].tobytes()].append(row)
+            for members in buckets.values():
+                if len(members) < 2:
+                    continue
+                if len(members) > max_bucket_size:
+                    pairs.update((members[0], other) for other in members[1:])
+                else:
+                    pairs.update(
+                        (members[i], members[j])
+                        for i in range(len(members)) for j in range(i + 1, len(members))
+                    )
+        return pairs
+
+
+class RegistrarFamilyResolver:
+    """Entity resolution of registrars into operator families."""
+
+    def __init__(self, threshold: float = 0.65, num_perm: int = 64, bands: int = 16,
+                 max_token_share: float = 0.02, signal_weights: Optional[Dict[str, float]] = None):
+        """
+        Args:
+            threshold: Minimum pair confidence for two registrars to be linked
+            num_perm: MinHash permutations per signal
+            bands: LSH bands per signal
+            max_token_share: Drop non-name tokens carried by more than this
+                share of registrars (gateway hosts, shared ASNs, a declared
+                parent copied across a reseller list)
+            signal_weights: Overrides for ``SIGNAL_WEIGHTS``
+        """
+        self.threshold = threshold
+        self.max_token_share = max_token_share
+        self.signal_weights = {**SIGNAL_WEIGHTS, **(signal_weights or {})}
+        self.lsh = MinHashLSH(num_perm=num_perm, bands=bands)
+
+    def _signal_tokens(self, df: pd.DataFrame) -> Dict[str, List[Set[str]]]:
+        """Token sets per signal, one per row."""
+        def column(name: str) -> pd.Series:
+            return df[name] if name in df.columns else pd.Series([None] * len(df), index=df.index)
+
+        def single(values: Iterable) -> List[Set[str]]:
+            return [{value} if value else set() for value in values]
+
+        signals = {
+            'name': [_name_shingles(name) for name in column('name')],
+            'website': single(_website_domain(v) for v in column('website')),
+            'email': [
+                {d for d in (_email_domain(column(c).iloc[i]) for c in ('email', 'abuse_email')) if d}
+                for i in range(len(df))
+            ],
+            'declared': single(v.strip().lower() if isinstance(v, str) and v.strip() else None
+                               for v in column('duplicate')),
+            'operator': [
+                {str(v).strip().lower() for v in (declared_operator, category in OPERATOR_CATEGORIES
+                                                   and provider) if isinstance(v, str) and v.strip()}
+                for declared_operator, category, provider in zip(column('operator'), column('category'),
+                                                                 column('gateway_provider'))
+            ],
+            'infrastructure': [
+                {f"{kind}:{str(value).strip().lower()}" for kind, value in
+                 (('host', normalize_host(host)), ('ip', ipv4), ('ip', ipv6), ('asn', asn))
+                 if isinstance(value, str) and value.strip()}
+                for host, ipv4, ipv6, asn in zip(column('rdap_url'), column('ipv4'),
+                                                 column('ipv6'), column('asn_v4_description'))
+            ],
+        }
+
+        # Shared-by-everyone values carry no identity, like stop words; known
+        # operators are exempt, since a large operator family is the point
+        limit = max(2, int(self.max_token_share * len(df)))
+        for signal in ('website', 'email', 'declared', 'infrastructure'):
+            counts = defaultdict(int)
+            for tokens in signals[signal]:
+                for token in tokens:
+                    counts[token] += 1
+            signals[signal] = [{t for t in tokens if counts[t] <= limit} for tokens in signals[signal]]
+        return signals
+
+    def _pair_confidence(self, signatures: Dict[str, np.ndarray], i: int, j: int) -> Tuple[float, Dict[str, float]]:
+        """Noisy-OR of per-signal similarity times reliability."""
+        empty = np.iinfo(np.uint64).max
+        evidence = {}
+        for signal, matrix in signatures.items():
+            if matrix[i, 0] == empty or matrix[j, 0] == empty:
+                continue
+            similarity = float(np.mean(matrix[i] == matrix[j]))
+            if similarity > 0:
+                evidence[signal] = round(similarity, 3)
+
+        if 'declared' in evidence and not any(
+            evidence.get(signal, 0.0) >= DECLARED_CORROBORATION for signal in CORROBORATING_SIGNALS
+        ):
+            del evidence['declared']
+
+        miss = 1.0
+        for signal, similarity in evidence.items():
+            miss *= 1.0 - self.signal_weights[signal] * similarity
+        return 1.0 - miss, evidence
+
+    def resolve(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Assign each registrar row to a family.
+
+        Returns:
+            ``df`` with family_id, family_name, family_size, match_confidence,
+            family_confidence and match_evidence columns added
+        """
+        df = df.reset_index(drop=True)
+        signals = self._signal_tokens(df)
+        signatures = {signal: self.lsh.signatures(tokens) for signal, tokens in signals.items()}
+
+        candidates: Set[Tuple[int, int]] = set()
+        for matrix in signatures.values():
+            candidates |= self.lsh.candidate_pairs(matrix)
+
+        parent = list(range(len(df)))
+
+        def find(x: int) -> int:
+            while parent[x] != x:
+                parent[x] = parent[parent[x]]
+                x = parent[x]
+            return x
+
+        best_link = np.zeros(len(df))
+        evidence: List[Dict[str, float]] = [{} for _ in range(len(df))]
+        links = []
+        for i, j in candidates:
+            confidence, pair_evidence = self._pair_confidence(signatures, i, j)
+            if confidence < self.threshold:
+                continue
+            links.append((find(i), find(j), confidence))
+            parent[find(i)] = find(j)
+            for row in (i, j):
+                if confidence > best_link[row]:
+                    best_link[row] = confidence
+                    evidence[row] = pair_evidence
+
+        roots = np.array([find(i) for i in range(len(df))])
+        family_confidence: Dict[int, List[float]] = defaultdict(list)
+        for _, j, confidence in links:
+            family_confidence[find(j)].append(confidence)
+
+        # Name each family after its largest member
+        sizes = pd.to_numeric(df.get('domain_count'), errors='coerce') if 'domain_count' in df.columns \
+            else pd.Series(0, index=df.index)
+        order = pd.DataFrame({'root': roots, 'size': sizes.fillna(-1)}).sort_values('size', ascending=False)
+        heads = order.drop_duplicates('root')
+        head_row = dict(zip(heads['root'], heads.index))
+
+        result = df.copy()
+        head_rows = np.array([head_row[root] for root in roots])
+        key = result['iana_id'] if 'iana_id' in result.columns else pd.Series(result.index)
+        result['family_id'] = key.to_numpy()[head_rows]
+        result['family_name'] = result['name'].to_numpy()[head_rows]
+        result['family_size'] = pd.Series(roots).map(pd.Series(roots).value_counts()).to_numpy()
+        result['match_confidence'] = np.where(result['family_size'] > 1, best_link.round(3), 1.0)
+        result['family_confidence'] = [
+            round(float(np.mean(family_confidence[root])), 3) if family_confidence.get(root) else 1.0
+            for root in roots
+        ]
+        result['match_evidence'] = [
+            ', '.join(f"{signal}={value}" for signal, value in ev.items()) for ev in evidence
+        ]
+        return result
+
+    @staticmethod
+    def rollup(families: pd.DataFrame) -> pd.DataFrame:
+        """Aggregate resolved registrars to one row per family."""
+        domain_count = pd.to_numeric(families.get('domain_count', 0), errors='coerce')
+        grouped = families.assign(domain_count=domain_count).groupby(
+            ['family_id', 'family_name'], dropna=False, sort=False
+        )
+        summary = grouped.agg(
+            registrars=('name', 'size'),
+            total_domains=('domain_count', 'sum'),
+            family_confidence=('family_confidence', 'first'),
+        )
+        if 'gateway_provider' in families.columns:
+            summary['gateway_providers'] = grouped['gateway_provider'].agg(
+                lambda values: ', '.join(sorted(set(values.dropna().astype(str))))
+            )
+        return summary.reset_index().sort_values('total_domains', ascending=False, ignore_index=True)
+
+
+def load_registrars(input_file: Path = DEFAULT_INPUT_FILE,
+                    enriched_files: Optional[List[Path]] = None,
+                    families: Optional[Dict[str, List[int]]] = None) -> pd.DataFrame:
+    """
+    Registrar table with website/email columns merged in from enriched
+    outputs and an ``operator`` column from the curated family lists.
+
+    Args:
+        families: Operator name -> IANA ids; defaults to the reference
+            store's ``family:<operator>`` lists
+    """
+    df = pd.read_csv(input_file)
+    for enriched_file in enriched_files if enriched_files is not None else DEFAULT_ENRICHED_FILES:
+        enriched_file = Path(enriched_file)
+        if not enriched_file.exists():
+            continue
+        extra = pd.read_csv(enriched_file)
+        columns = [c for c in ('website', 'email', 'abuse_email', 'duplicate') if c in extra.columns]
+        if not columns or 'iana_id' not in extra.columns:
+            continue
+        extra = extra[['iana_id'] + columns].dropna(subset=['iana_id']).drop_duplicates('iana_id')
+        df = df.merge(extra, on='iana_id', how='left', suffixes=('', '_enriched'))
+        for c in columns:
+            if f"{c}_enriched" in df.columns:
+                df[c] = df[c].combine_first(df.pop(f"{c}_enriched"))
+
+    if families is None:
+        families = {name[len(FAMILY_LIST_PREFIX):]: iana_ids for name, iana_ids
+                    in get_reference_store().lists(FAMILY_LIST_PREFIX).items()}
+    operators = {iana_id: operator for operator, iana_ids in families.items() for iana_id in iana_ids}
+    if operators:
+        operator = df['iana_id'].map(operators)
+        df['operator'] = df['operator'].combine_first(operator) if 'operator' in df.columns else operator
+    return df
+
+
+def main():
+    """Resolve registrar families and save them with a per-family rollup."""
+    parser = argparse.ArgumentParser(description="Group registrars into operator families")
+    parser.add_argument('--input', default=str(DEFAULT_INPUT_FILE))
+    parser.add_argument('--enriched', nargs='*', help="Enriched CSVs with website/email columns")
+    parser.add_argument('--output', default=str(DEFAULT_OUTPUT_FILE))
+    parser.add_argument('--threshold', type=float, default=0.65)
+    parser.add_argument('--top', type=int, default=15)
+    args = parser.parse_args()
+
+    enriched = [Path(p) for p in args.enriched] if args.enriched is not None else None
+    df = load_registrars(Path(args.input), enriched)
+    print(f"Resolving families for {len(df)} registrars...")
+
+    resolver = RegistrarFamilyResolver(threshold=args.threshold)
+    families = resolver.resolve(df)
+    rollup = resolver.rollup(families)
+
+    output_file = Path(args.output)
+    output_file.parent.mkdir(parents=True, exist_ok=True)
+    families.to_csv(output_file, index=False)
+    rollup_file = output_file.with_name(output_file.stem + "_rollup.csv")
+    rollup.to_csv(rollup_file, index=False)
+
+    multi = rollup[rollup['registrars'] > 1]
+    print(f"Found {len(multi)} families with more than one registrar")
+    for row in multi.head(args.top).itertuples(index=False):
+        print(f"  {str(row.family_name).strip()}: {row.registrars} registrars, "
+              f"{row.total_domains:,.0f} domains (confidence {row.family_confidence:.2f})")
+    print(f"Saved families to {output_file} and rollup to {rollup_file}")
+
+
+if __name__ == "__main__":
+    main()
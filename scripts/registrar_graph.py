@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+Registrar Infrastructure Graph
+
+Builds a graph linking registrars to the infrastructure they use (RDAP host,
+IP addresses, ASN and gateway provider) from all_gateway_registrars.csv.
+Nodes get integer ids and adjacency is stored as CSR arrays, saved as .npy
+files that are memory-mapped on load, so neighbourhood queries are a few
+array slices.
+
+Registrars connect directly to each infrastructure node, so registrars that
+share any infrastructure are exactly two hops apart.
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from url_normalizer import normalize_host
+
+DEFAULT_INPUT_FILE = Path("all_gateway_registrars.csv")
+DEFAULT_GRAPH_DIR = Path("data/processed/registrar_graph")
+
+NODE_TYPES = ['registrar', 'rdap_host', 'ip', 'asn', 'provider']
+
+
+class RegistrarGraph:
+    """CSR adjacency over registrar and infrastructure nodes."""
+
+    def __init__(self, indptr: np.ndarray, indices: np.ndarray, node_types: np.ndarray,
+                 keys: List[str], names: List[str]):
+        # Plain ndarray views slice faster than np.memmap while keeping the mapping
+        self.indptr = np.asarray(indptr)
+        self.indices = np.asarray(indices)
+        self.node_types = np.asarray(node_types)
+        self.keys = keys
+        self.names = names
+        self.key_index = {key: node_id for node_id, key in enumerate(keys)}
+        self.name_index = {}
+        for node_id, name in enumerate(names):
+            self.name_index.setdefault(name.lower(), node_id)
+
+    @classmethod
+    def from_dataframe(cls, df: pd.DataFrame) -> 'RegistrarGraph':
+        """Build the graph from a registrar table."""
+        keys: List[str] = []
+        names: List[str] = []
+        types: List[int] = []
+        key_index: Dict[str, int] = {}
+        edges: List[Tuple[int, int]] = []
+
+        def node(node_type: str, value, name: Optional[str] = None) -> int:
+            key = f"{node_type}:{value}"
+            if key not in key_index:
+                key_index[key] = len(keys)
+                keys.append(key)
+                names.append(name or str(value))
+                types.append(NODE_TYPES.index(node_type))
+            return key_index[key]
+
+        def clean(value) -> Optional[str]:
+            if pd.isna(value):
+                return None
+            value = str(value).strip()
+            return value or None
+
+        for row in df.itertuples(index=False):
+            if pd.isna(row.iana_id):
+                continue
+            registrar = node('registrar', int(row.iana_id), str(row.name))
+
+            attributes = [
+                ('rdap_host', normalize_host(row.rdap_url)),
+                ('ip', clean(row.ipv4)),
+                ('ip', clean(row.ipv6)),
+                ('asn', clean(row.asn_v4_description)),
+                ('provider', clean(row.gateway_provider))
+            ]
+            for node_type, value in attributes:
+                if value:
+                    edges.append((registrar, node(node_type, value.lower(), value)))
+
+        node_count = len(keys)
+        edge_array = np.array(edges, dtype=np.int32).reshape(-1, 2)
+        # Store both directions and drop duplicate edges
+        both = np.unique(np.vstack([edge_array, edge_array[:, ::-1]]), axis=0)
+
+        indptr = np.zeros(node_count + 1, dtype=np.int64)
+        np.add.at(indptr, both[:, 0] + 1, 1)
+        np.cumsum(indptr, out=indptr)
+        indices = both[:, 1].astype(np.int32)
+
+        return cls(indptr, indices, np.array(types, dtype=np.int8), keys, names)
+
+    def save(self, graph_dir: Path = DEFAULT_GRAPH_DIR):
+        """Persist the graph as .npy arrays plus a JSON node table."""
+        graph_dir = Path(graph_dir)
+        graph_dir.mkdir(parents=True, exist_ok=True)
+        np.save(graph_dir / "indptr.npy", self.indptr)
+        np.save(graph_dir / "indices.npy", self.indices)
+        np.save(graph_dir / "node_types.npy", self.node_types)
+        with open(graph_dir / "nodes.json", 'w', encoding='utf-8') as f:
+            json.dump({'node_types': NODE_TYPES, 'keys': self.keys, 'names': self.names}, f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, graph_dir: Path = DEFAULT_GRAPH_DIR) -> 'RegistrarGraph':
+        """Memory-map a saved graph."""
+        graph_dir = Path(graph_dir)
+        with open(graph_dir / "nodes.json", 'r', encoding='utf-8') as f:
+            nodes = json.load(f)
+        return cls(
+            np.load(graph_dir / "indptr.npy", mmap_mode='r'),
+            np.load(graph_dir / "indices.npy", mmap_mode='r'),
+            np.load(graph_dir / "node_types.npy", mmap_mode='r'),
+            nodes['keys'],
+            nodes['names']
+        )
+
+    @property
+    def node_count(self) -> int:
+        return len(self.keys)
+
+    @property
+    def edge_count(self) -> int:
+        return len(self.indices) // 2
+
+    def resolve(self, spec: str) -> Optional[int]:
+        """
+        Find a node from a key ("rdap_host:rdapserver.net"), registrar name,
+        IANA id or bare infrastructure value.
+        """
+        spec = spec.strip()
+        if spec in self.key_index:
+            return self.key_index[spec]
+        if spec.isdigit() and f"registrar:{spec}" in self.key_index:
+            return self.key_index[f"registrar:{spec}"]
+        if spec.lower() in self.name_index:
+            return self.name_index[spec.lower()]
+        for node_type in NODE_TYPES[1:]:
+            key = f"{node_type}:{spec.lower()}"
+            if key in self.key_index:
+                return self.key_index[key]
+        return None
+
+    def node_type(self, node_id: int) -> str:
+        return NODE_TYPES[self.node_types[node_id]]
+
+    def neighbours(self, node_id: int) -> np.ndarray:
+        """Direct neighbours of a node."""
+        return self.indices[self.indptr[node_id]:self.indptr[node_id + 1]]
+
+    def k_hop(self, node_id: int, hops: int, node_type: Optional[str] = None) -> Dict[int, int]:
+        """
+        Nodes within ``hops`` of ``node_id``, mapped to their hop distance.
+
+        Args:
+            node_id: Start node
+            hops: Maximum distance
+            node_type: Only return nodes of this type
+        """
+        distances = {node_id: 0}
+        frontier = [node_id]
+        for hop in range(1, hops + 1):
+            next_frontier = []
+            for current in frontier:
+                for neighbour in self.neighbours(current).tolist():
+                    if neighbour not in distances:
+                        distances[neighbour] = hop
+                        next_frontier.append(neighbour)
+            if not next_frontier:
+                break
+            frontier = next_frontier
+
+        del distances[node_id]
+        if node_type is not None:
+            wanted = NODE_TYPES.index(node_type)
+            distances = {n: d for n, d in distances.items() if self.node_types[n] == wanted}
+        return distances
+
+    def shared_neighbours(self, a: int, b: int) -> np.ndarray:
+        """Nodes adjacent to both ``a`` and ``b``."""
+        return np.intersect1d(self.neighbours(a), self.neighbours(b), assume_unique=True)
+
+    def related_registrars(self, registrar_id: int) -> List[Tuple[int, int]]:
+        """Registrars sharing infrastructure with ``registrar_id``, by shared node count."""
+        infrastructure = self.neighbours(registrar_id)
+        if len(infrastructure) == 0:
+            return []
+        reached = np.concatenate([self.neighbours(n) for n in infrastructure.tolist()])
+        reached = reached[reached != registrar_id]
+        related, counts = np.unique(reached, return_counts=True)
+        order = np.argsort(-counts, kind='stable')
+        return list(zip(related[order].tolist(), counts[order].tolist()))
+
+    def describe(self, node_id: int) -> str:
+        return f"{self.names[node_id]} [{self.keys[node_id]}]"
+
+
+def build_graph(input_file: Path = DEFAULT_INPUT_FILE, graph_dir: Path = DEFAULT_GRAPH_DIR) -> RegistrarGraph:
+    """Build and save the graph from a registrar CSV."""
+    print(f"Loading registrars from {input_file}...")
+    df = pd.read_csv(input_file)
+    graph = RegistrarGraph.from_dataframe(df)
+    graph.save(graph_dir)
+    print(f"Saved graph with {graph.node_count} nodes and {graph.edge_count} edges to {graph_dir}")
+    return graph
+
+
+def main():
+    """Main entry point for the script."""
+    parser = argparse.ArgumentParser(description="Registrar infrastructure graph")
+    parser.add_argument('--graph-dir', default=str(DEFAULT_GRAPH_DIR))
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    build = subparsers.add_parser('build', help="Build the graph from a registrar CSV")
+    build.add_argument('--input', default=str(DEFAULT_INPUT_FILE))
+
+    neighbours = subparsers.add_parser('neighbours', help="Nodes within k hops of a node")
+    neighbours.add_argument('node')
+    neighbours.add_argument('--hops', type=int, default=2)
+    neighbours.add_argument('--type', choices=NODE_TYPES)
+
+    related = subparsers.add_parser('related', help="Registrars sharing infrastructure with a registrar")
+    related.add_argument('registrar')
+
+    shared = subparsers.add_parser('shared', help="Neighbours shared by two nodes")
+    shared.add_argument('a')
+    shared.add_argument('b')
+
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        build_graph(Path(args.input), Path(args.graph_dir))
+        return
+
+    graph = RegistrarGraph.load(Path(args.graph_dir))
+
+    def resolve(spec: str) -> int:
+        node_id = graph.resolve(spec)
+        if node_id is None:
+            print(f"Error: no node matches '{spec}'")
+            sys.exit(1)
+        return node_id
+
+    if args.command == 'neighbours':
+        start = resolve(args.node)
+        found = graph.k_hop(start, args.hops, args.type)
+        print(f"{len(found)} nodes within {args.hops} hops of {graph.describe(start)}:")
+        for node_id, distance in sorted(found.items(), key=lambda x: (x[1], graph.names[x[0]])):
+            print(f"  {distance}  {graph.describe(node_id)}")
+    elif args.command == 'related':
+        start = resolve(args.registrar)
+        related_registrars = graph.related_registrars(start)
+        print(f"{len(related_registrars)} registrars share infrastructure with {graph.describe(start)}:")
+        for node_id, count in related_registrars:
+            via = ', '.join(graph.describe(n) for n in graph.shared_neighbours(start, node_id).tolist())
+            print(f"  {graph.describe(node_id)} via {via}")
+    else:
+        a, b = resolve(args.a), resolve(args.b)
+        common = graph.shared_neighbours(a, b)
+        print(f"{len(common)} neighbours shared by {graph.describe(a)} and {graph.describe(b)}:")
+        for node_id in common.tolist():
+            print(f"  {graph.describe(node_id)}")
+
+
+if __name__ == "__main__":
+    main()
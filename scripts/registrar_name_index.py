@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Registrar Name Resolver
+
+Normalises registrar names (legal suffixes, d/b/a aliases, punctuation,
+accents) and builds a trigram inverted index over them, so an arbitrary
+registrar name can be resolved to ranked IANA-id candidates without
+comparing it against every known registrar.
+"""
+
+import re
+import sys
+import unicodedata
+from collections import Counter
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Hashable, Iterable, List, Optional, Tuple
+
+import pandas as pd
+
+DEFAULT_REGISTRAR_FILE = Path("all_gateway_registrars.csv")
+
+# Legal-form suffixes stripped before matching, longest forms first
+LEGAL_SUFFIXES = [
+    r's\.?\s?a\.?\s+de\s+c\.?\s?v\.?', r'sdn\.?\s*bhd\.?', r'pvt\.?\s+ltd\.?', r'pty\.?\s+ltd\.?',
+    r'co\.?,?\s+ltd\.?', r'limited', r'ltd\.?', r'llc\.?', r'l\.l\.c\.?', r'inc\.?', r'incorporated',
+    r'corporation', r'corp\.?', r'company', r'co\.?', r'gmbh', r'ag', r'uab', r'as', r'a/s', r'ab',
+    r'oy', r'srl', r's\.r\.l\.?', r's\.?\s?l\.?', r's\.?\s?a\.?', r's\.?\s?a\.?\s?s\.?', r'b\.?\s?v\.?',
+    r'n\.?\s?v\.?', r'plc', r'llp', r'lp', r'kg', r'k\.?k\.?', r'sarl', r'sas', r'spa', r'bv', r'ooo',
+]
+LEGAL_SUFFIX_RE = re.compile(r'(?:[\s,]+(?:' + '|'.join(LEGAL_SUFFIXES) + r'))+\s*$', re.I)
+DBA_RE = re.compile(r'\s*,?\s*\b(?:d/b/a|dba|t/a|trading as)\b\.?\s*', re.I)
+NON_ALNUM_RE = re.compile(r'[^a-z0-9]+')
+
+# Industry words that say nothing about which registrar is meant; a name made
+# only of these (e.g. "Domain", "Web Services") never wins by word containment
+GENERIC_TOKENS = {
+    'a', 'an', 'and', 'the', 'of', 'for', 'de', 'com', 'net', 'org', 'online', 'web', 'www',
+    'domain', 'domains', 'name', 'names', 'registrar', 'registrars', 'registry', 'registration',
+    'internet', 'network', 'networks', 'host', 'hosting', 'hosts', 'server', 'servers', 'cloud',
+    'service', 'services', 'solution', 'solutions', 'technology', 'technologies', 'tech',
+    'systems', 'group', 'global', 'international', 'digital', 'data', 'media', 'it', 'info',
+    'company', 'holdings', 'enterprises', 'dba',
+}
+# Words in at least this share of the indexed names are too common to identify one
+COMMON_TOKEN_SHARE = 0.02
+COMMON_TOKEN_MIN_NAMES = 5
+
+
+@lru_cache(maxsize=65536)
+def normalize_registrar_name(name: str) -> str:
+    """
+    Reduce a registrar name to lowercase ASCII words without its legal form.
+
+    >>> normalize_registrar_name('Tecnocrática Centro de Datos, S.L.')
+    'tecnocratica centro de datos'
+    >>> normalize_registrar_name('Hostinger, UAB')
+    'hostinger'
+    """
+    if not isinstance(name, str):
+        return ''
+    name = unicodedata.normalize('NFKD', name).encode('ascii', 'ignore').decode('ascii')
+    name = name.strip()
+    previous = None
+    while previous != name:
+        previous = name
+        name = LEGAL_SUFFIX_RE.sub('', name).strip()
+    return NON_ALNUM_RE.sub(' ', name.lower()).strip()
+
+
+def name_aliases(name: str) -> List[str]:
+    """Normalised forms of a name: the full legal name plus any d/b/a names."""
+    if not isinstance(name, str):
+        return []
+    parts = [part for part in DBA_RE.split(name) if part.strip()]
+    aliases = []
+    for candidate in [name] + parts:
+        normalized = normalize_registrar_name(candidate)
+        if normalized and normalized not in aliases:
+            aliases.append(normalized)
+    return aliases
+
+
+def _trigrams(text: str) -> set:
+    padded = f" {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class RegistrarNameIndex:
+    """Trigram and token inverted index from normalised names to keys."""
+
+    def __init__(self, entries: Iterable[Tuple[Hashable, str]]):
+        """
+        Args:
+            entries: (key, name) pairs, where key is usually the IANA id
+        """
+        self.keys: List[Hashable] = []
+        self.names: List[str] = []
+        self._alias_entry: List[int] = []
+        self._alias_trigrams: List[set] = []
+        self._alias_tokens: List[set] = []
+        self._exact: Dict[str, List[int]] = {}
+        self._trigram_postings: Dict[str, List[int]] = {}
+        token_names = Counter()
+
+        for key, name in entries:
+            entry = len(self.keys)
+            self.keys.append(key)
+            self.names.append(name)
+            aliases = name_aliases(name)
+            token_names.update({token for alias in aliases for token in alias.split()})
+            for alias in aliases:
+                alias_id = len(self._alias_entry)
+                self._alias_entry.append(entry)
+                trigrams = _trigrams(alias)
+                self._alias_trigrams.append(trigrams)
+                self._alias_tokens.append(set(alias.split()))
+                self._exact.setdefault(alias, []).append(alias_id)
+                for trigram in trigrams:
+                    self._trigram_postings.setdefault(trigram, []).append(alias_id)
+
+        common = max(COMMON_TOKEN_MIN_NAMES, COMMON_TOKEN_SHARE * len(self.keys))
+        self._common_tokens = {token for token, count in token_names.items() if count >= common}
+
+    def _distinctive(self, tokens: set) -> bool:
+        """Whether a set of name words contains one that can identify a registrar."""
+        return any(len(token) > 1 and token not in GENERIC_TOKENS and token not in self._common_tokens
+                   for token in tokens)
+
+    @classmethod
+    def from_csv(cls, csv_file: Path = DEFAULT_REGISTRAR_FILE) -> 'RegistrarNameIndex':
+        """Index the registrar table by IANA id."""
+        df = pd.read_csv(csv_file, usecols=['iana_id', 'name']).dropna()
+        return cls(zip(df['iana_id'].astype(int), df['name']))
+
+    def resolve(self, name: str, limit: int = 5, min_score: float = 0.5) -> List[Dict]:
+        """
+        Rank index keys by similarity to ``name``.
+
+        Returns:
+            Up to ``limit`` dictionaries with key, name and score (0-1)
+        """
+        best: Dict[int, float] = {}
+
+        for alias in name_aliases(name):
+            for alias_id in self._exact.get(alias, []):
+                best[self._alias_entry[alias_id]] = 1.0
+
+            query_tokens = set(alias.split())
+            if not self._distinctive(query_tokens):
+                continue  # "Domain" or "Web Services" only matches a registrar of that exact name
+            query_trigrams = _trigrams(alias)
+            shared = Counter()
+            for trigram in query_trigrams:
+                shared.update(self._trigram_postings.get(trigram, ()))
+
+            for alias_id, count in shared.items():
+                entry = self._alias_entry[alias_id]
+                if best.get(entry) == 1.0:
+                    continue
+                score = 2.0 * count / (len(query_trigrams) + len(self._alias_trigrams[alias_id]))
+                # Whole-word containment either way, e.g. "Key-Systems" vs "Key-Systems GmbH & Co",
+                # as long as the contained words are distinctive (not just "Domain" or "Web")
+                tokens = self._alias_tokens[alias_id]
+                contained = (query_tokens if query_tokens <= tokens else tokens if tokens <= query_tokens
+                             else None)
+                if tokens and contained and self._distinctive(contained):
+                    score = max(score, 0.9)
+                if score > best.get(entry, 0.0):
+                    best[entry] = score
+
+        ranked = sorted(
+            ((entry, score) for entry, score in best.items() if score >= min_score),
+            key=lambda x: (-x[1], x[0])
+        )[:limit]
+        return [
+            {'key': self.keys[entry], 'name': self.names[entry], 'score': round(score, 4)}
+            for entry, score in ranked
+        ]
+
+    def best_match(self, name: str, min_score: float = 0.5) -> Optional[Dict]:
+        """Return the top candidate for ``name``, if any clears ``min_score``."""
+        matches = self.resolve(name, limit=1, min_score=min_score)
+        return matches[0] if matches else None
+
+    def join(self, names: pd.Series, min_score: float = 0.75) -> pd.DataFrame:
+        """
+        Resolve a column of external registrar names to index keys.
+
+        Each distinct name is resolved once; returns a DataFrame aligned with
+        ``names`` with matched_key, matched_name and match_score columns.
+        """
+        codes, uniques = pd.factorize(names, sort=False)
+        matches = [self.best_match(name, min_score) or {} for name in uniques] + [{}]
+        matched = pd.DataFrame({
+            'matched_key': pd.Series([m.get('key') for m in matches], dtype=object),
+            'matched_name': [m.get('name') for m in matches],
+            'match_score': [m.get('score') for m in matches],
+        }).take(codes)
+        matched.index = names.index
+        return matched
+
+
+def main():
+    """Resolve registrar names given on the command line against the registrar table."""
+    if len(sys.argv) < 2:
+        print("Usage: python scripts/registrar_name_index.py \"<registrar name>\" [...]")
+        sys.exit(1)
+
+    index = RegistrarNameIndex.from_csv()
+    for name in sys.argv[1:]:
+        print(f"{name}:")
+        for match in index.resolve(name):
+            print(f"  {match['key']:>6}  {match['score']:.2f}  {match['name']}")
+
+
+if __name__ == "__main__":
+    main()
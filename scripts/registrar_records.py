@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Pre-Joined Registrar Records
+
+Joins the registrars of the gateway table and of the LogicBoxes
+website/WHOIS/RDAP service enrichment with all of their columns once, keyed
+and sorted by IANA id, instead of each consumer merging the tables again
+by name or id. The result is stored as the canonical table
+registrar_records for column reads, and as an NDJSON file with a binary
+offset index (IANA id, byte offset, length per record, sorted by id) so a
+single registrar's full record is found by binary search in the index and
+read with one seek.
+"""
+
+import argparse
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from artifact_store import ArtifactStore
+from content_publisher import write_if_changed
+from json_stream import JSONStreamWriter, decode_line
+from provider_aggregates import PROVIDER_RENAMES, core_provider_series
+
+# Resolved from the repository root, since callers run from different directories
+REPO_ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_RECORDS_FILE = REPO_ROOT / "data" / "processed" / "registrar_records.ndjson"
+
+SOURCE_TABLES = ['gateway_registrars', 'logicboxes_registrars_v2']
+INDEX_DTYPE = np.dtype([('iana_id', '<u4'), ('offset', '<u8'), ('length', '<u4')])
+
+
+def index_file(records_file: Path) -> Path:
+    return records_file.with_suffix('.idx')
+
+
+def join_registrars(store: ArtifactStore) -> pd.DataFrame:
+    """
+    Gateway registrars and enriched registrars in one table, sorted by IANA id.
+
+    Registrars in both tables take the gateway table's values and the
+    enrichment's extra columns; registrars only the enrichment knows (e.g.
+    LogicBoxes resellers behind their own RDAP host) keep the enrichment's
+    values. ``core_gateway`` marks the providers the published analysis
+    covers, which enrichment-only registrars are not counted in, and
+    ``enriched`` the registrars the enrichment matched.
+    """
+    registrars = store.frame('gateway_registrars').dropna(subset=['iana_id'])
+    registrars = registrars.assign(iana_id=registrars['iana_id'].astype('int64'))
+    # Non-core providers keep their name and are only flagged
+    registrars['core_gateway'] = core_provider_series(registrars['gateway_provider']).notna()
+    registrars['gateway_provider'] = registrars['gateway_provider'].replace(PROVIDER_RENAMES)
+
+    enriched = store.frame('logicboxes_registrars_v2').dropna(subset=['iana_id']).drop_duplicates('iana_id')
+    enriched = enriched.assign(iana_id=enriched['iana_id'].astype('int64'), enriched=True)
+
+    records = registrars.merge(enriched, on='iana_id', how='outer', suffixes=('', '_enriched'),
+                               indicator=True, validate='one_to_one')
+    # The registrar table's own columns win over the enrichment's copies
+    enrichment_only = records.pop('_merge').eq('right_only')
+    for column in registrars.columns.intersection(enriched.columns).drop('iana_id'):
+        records[column] = records[column].mask(enrichment_only, records.pop(f'{column}_enriched'))
+    records['core_gateway'] = records['core_gateway'].eq(True)
+    records['enriched'] = records['enriched'].eq(True)
+    return records.sort_values('iana_id').reset_index(drop=True)
+
+
+def write_record_file(records: pd.DataFrame, records_file: Path = DEFAULT_RECORDS_FILE) -> int:
+    """Write the records as NDJSON in IANA id order plus their offset index."""
+    index = np.empty(len(records), dtype=INDEX_DTYPE)
+    with JSONStreamWriter(records_file, format='ndjson') as writer:
+        for position, row in enumerate(records.itertuples(index=False, name=None)):
+            record = dict(zip(records.columns, row))
+            offset = writer.bytes
+            length = writer.write(record) - 1  # without the newline
+            index[position] = (record['iana_id'], offset, length)
+    write_if_changed(index_file(records_file), index.tobytes())
+    return len(index)
+
+
+def build_registrar_records(store: Optional[ArtifactStore] = None,
+                            records_file: Path = DEFAULT_RECORDS_FILE) -> pd.DataFrame:
+    """Join the registrar tables and write the registrar_records table and record file."""
+    store = store or ArtifactStore()
+    records = join_registrars(store)
+    store.write('registrar_records', records, source='registrar_records')
+    write_record_file(records, records_file)
+    return records
+
+
+def load_registrar_records(store: Optional[ArtifactStore] = None, columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """The pre-joined table, rebuilt first if missing or older than its sources."""
+    store = store or ArtifactStore()
+    if store.is_outdated('registrar_records', SOURCE_TABLES):
+        build_registrar_records(store)
+    return store.frame('registrar_records', columns)
+
+
+class RegistrarRecordFile:
+    """Random access to the record file by IANA id."""
+
+    def __init__(self, records_file: Path = DEFAULT_RECORDS_FILE):
+        self.records_file = Path(records_file)
+        self.index = np.fromfile(index_file(self.records_file), dtype=INDEX_DTYPE)
+        self._file = open(self.records_file, 'rb')
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def get(self, iana_id: int) -> Optional[Dict]:
+        """One registrar's full record: a binary search in the index and one seek."""
+        position = int(np.searchsorted(self.index['iana_id'], iana_id))
+        if position == len(self.index) or self.index['iana_id'][position] != iana_id:
+            return None
+        self._file.seek(int(self.index['offset'][position]))
+        return decode_line(self._file.read(int(self.index['length'][position])))
+
+    def get_many(self, iana_ids: Iterable[int]) -> Dict[int, Dict]:
+        """Records for several ids, read in file order."""
+        found = {}
+        for iana_id in sorted(set(iana_ids)):
+            record = self.get(iana_id)
+            if record is not None:
+                found[iana_id] = record
+        return found
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self) -> 'RegistrarRecordFile':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def main():
+    """Build the pre-joined registrar records or look registrars up by IANA id."""
+    parser = argparse.ArgumentParser(description="Pre-joined registrar records indexed by IANA id")
+    parser.add_argument('--records', default=str(DEFAULT_RECORDS_FILE))
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    subparsers.add_parser('build', help="Join the registrar tables and write the record file")
+    get = subparsers.add_parser('get', help="Print registrars' full records")
+    get.add_argument('iana_ids', nargs='+', type=int)
+
+    args = parser.parse_args()
+    records_file = Path(args.records)
+
+    if args.command == 'build':
+        records = build_registrar_records(records_file=records_file)
+        print(f"Joined {len(records)} registrars ({int(records['enriched'].sum())} enriched) "
+              f"with {len(records.columns)} columns")
+        print(f"Record file: {records_file} ({records_file.stat().st_size:,} bytes), index: {index_file(records_file)}")
+    else:
+        with RegistrarRecordFile(records_file) as record_file:
+            for iana_id in args.iana_ids:
+                record = record_file.get(iana_id)
+                if record is None:
+                    print(f"{iana_id}: not found")
+                    continue
+                print(f"{iana_id}:")
+                for key, value in record.items():
+                    if value is not None:
+                        print(f"  {key}: {value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Registrar Rollup Cube
+
+Materialises every group-by combination of gateway provider, category,
+country, RDAP service and RDAP host over the registrar table: registrar
+counts, registrars with a known domain count, and domain totals. The rows
+are scanned once into the finest grouping; each of the 32 coarser groupings
+is rolled up from that instead of from the rows. A ``grouping`` bitmask
+marks which dimensions a cell aggregates over (as in SQL GROUPING SETS), so
+a null dimension value in a cell that keeps that dimension still means
+"missing". Summaries - provider totals, RDAP service distributions,
+countries, per-category counts - become lookups on the cube.
+"""
+
+import argparse
+from typing import Dict, Iterable, Optional, Sequence, Tuple
+
+import pandas as pd
+
+from artifact_store import ArtifactStore
+from registrar_records import load_registrar_records
+
+DIMENSIONS = ['gateway_provider', 'category', 'country', 'rdap_service', 'rdap_host']
+MEASURES = ['registrars', 'registrars_with_domains', 'domains']
+
+# Cube dimension -> registrar table column, for tables that name them differently
+DEFAULT_COLUMNS = {'rdap_host': 'rdap_url'}
+
+# Canonical tables the stored cube is built from
+SOURCE_TABLES = ['gateway_registrars', 'logicboxes_registrars_v2', 'registrar_records']
+
+
+class RollupCube:
+    """All group-by combinations of the registrar dimensions."""
+
+    def __init__(self, cells: pd.DataFrame, dimensions: Sequence[str] = DIMENSIONS):
+        self.cells = cells
+        self.dimensions = list(dimensions)
+        self._cuboids = {grouping: cuboid for grouping, cuboid in cells.groupby('grouping')}
+        self._lookup: Dict[Tuple, Dict] = {}
+        for row in cells.to_dict('records'):
+            values = tuple(None if pd.isna(row[dim]) else row[dim] for dim in self.dimensions)
+            self._lookup[(row['grouping'],) + values] = {measure: row[measure] for measure in MEASURES}
+
+    @classmethod
+    def build(cls, df: pd.DataFrame, columns: Optional[Dict[str, str]] = None,
+              domain_column: str = 'domain_count') -> 'RollupCube':
+        """
+        Build the cube from a registrar table.
+
+        Args:
+            df: Registrar rows
+            columns: Cube dimension -> column name overrides; dimensions
+                without a column are treated as missing for every row
+            domain_column: Column holding each registrar's domain count
+        """
+        columns = {**{dim: dim for dim in DIMENSIONS}, **DEFAULT_COLUMNS, **(columns or {})}
+        base = pd.DataFrame({
+            dim: df[column].astype(object) if column in df.columns else pd.Series(None, index=df.index, dtype=object)
+            for dim, column in columns.items()
+        })
+        domains = pd.to_numeric(df[domain_column], errors='coerce') if domain_column in df.columns \
+            else pd.Series(float('nan'), index=df.index)
+        base['registrars'] = 1
+        base['registrars_with_domains'] = domains.notna().astype(int)
+        base['domains'] = domains.fillna(0)
+
+        # The only pass over the rows: the finest grouping
+        finest = base.groupby(DIMENSIONS, dropna=False, sort=False)[MEASURES].sum().reset_index()
+
+        cuboids = []
+        for grouping in range(2 ** len(DIMENSIONS)):
+            kept = [dim for bit, dim in enumerate(DIMENSIONS) if not grouping & (1 << bit)]
+            if kept:
+                cuboid = finest.groupby(kept, dropna=False, sort=False)[MEASURES].sum().reset_index()
+            else:
+                cuboid = finest[MEASURES].sum().to_frame().T
+            for dim in DIMENSIONS:
+                if dim not in kept:
+                    cuboid[dim] = None
+            cuboid['grouping'] = grouping
+            cuboids.append(cuboid[DIMENSIONS + ['grouping'] + MEASURES])
+
+        cells = pd.concat(cuboids, ignore_index=True)
+        cells[DIMENSIONS] = cells[DIMENSIONS].astype(object).where(cells[DIMENSIONS].notna(), None)
+        cells[['registrars', 'registrars_with_domains']] = cells[['registrars', 'registrars_with_domains']].astype(int)
+        return cls(cells)
+
+    def _grouping(self, kept: Iterable[str]) -> int:
+        kept = set(kept)
+        unknown = kept - set(self.dimensions)
+        if unknown:
+            raise ValueError(f"Unknown cube dimensions: {sorted(unknown)}")
+        return sum(1 << bit for bit, dim in enumerate(self.dimensions) if dim not in kept)
+
+    def cell(self, **filters) -> Dict:
+        """Measures for one combination of dimension values (others rolled up)."""
+        key = (self._grouping(filters),) + tuple(filters.get(dim) for dim in self.dimensions)
+        return self._lookup.get(key, {measure: 0 for measure in MEASURES})
+
+    def slice(self, by: Sequence[str] = (), **filters) -> pd.DataFrame:
+        """
+        Measures grouped by ``by`` over the cells matching ``filters``.
+
+        Filter values match exactly; None matches a missing value.
+        """
+        cells = self._cuboids.get(self._grouping(list(by) + list(filters)), self.cells.iloc[0:0])
+        for dim, value in filters.items():
+            cells = cells[cells[dim].isna()] if value is None else cells[cells[dim] == value]
+        return cells[list(by) + MEASURES].reset_index(drop=True)
+
+    def distribution(self, dimension: str, measure: str = 'registrars', **filters) -> Dict:
+        """Known values of a dimension -> measure, largest first (like ``value_counts``)."""
+        sliced = self.slice([dimension], **filters)
+        sliced = sliced[sliced[dimension].notna()].sort_values(measure, ascending=False, kind='stable')
+        return dict(zip(sliced[dimension], sliced[measure]))
+
+    def to_columns(self) -> Dict:
+        """Compact columnar form with dictionary-encoded dimensions (-1 for null)."""
+        dictionaries, columns = {}, {}
+        for dim in self.dimensions:
+            codes, uniques = pd.factorize(self.cells[dim])
+            dictionaries[dim] = uniques.tolist()
+            columns[dim] = codes.tolist()
+        columns['grouping'] = self.cells['grouping'].tolist()
+        for measure in MEASURES:
+            columns[measure] = self.cells[measure].tolist()
+        return {'dimensions': self.dimensions, 'measures': MEASURES, 'dictionaries': dictionaries,
+                'columns': columns}
+
+
+def registrar_table(store: ArtifactStore) -> pd.DataFrame:
+    """Gateway registrars with their enrichment (RDAP service), from the pre-joined records."""
+    return load_registrar_records(store)
+
+
+def build_cube(store: Optional[ArtifactStore] = None) -> RollupCube:
+    """Build the cube from the canonical tables and store it as the rollup_cube table."""
+    store = store or ArtifactStore()
+    cube = RollupCube.build(registrar_table(store))
+    store.write('rollup_cube', cube.cells, source='rollup_cube')
+    return cube
+
+
+def load_cube(store: Optional[ArtifactStore] = None) -> RollupCube:
+    """The stored cube, rebuilt first if missing or older than its source tables."""
+    store = store or ArtifactStore()
+    if store.is_outdated('rollup_cube', SOURCE_TABLES):
+        return build_cube(store)
+    return RollupCube(store.frame('rollup_cube'))
+
+
+def main():
+    """Build the cube or print a slice of it."""
+    parser = argparse.ArgumentParser(description="Registrar rollup cube")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    subparsers.add_parser('build', help="Build the cube from the canonical registrar tables")
+
+    query = subparsers.add_parser('slice', help="Print measures grouped by dimensions")
+    query.add_argument('--by', nargs='*', default=[], choices=DIMENSIONS)
+    query.add_argument('--where', nargs='*', default=[], metavar='DIMENSION=VALUE')
+
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        cube = build_cube()
+        print(f"Built rollup cube: {len(cube.cells)} cells over {len(DIMENSIONS)} dimensions")
+        total = cube.cell()
+        print(f"  {total['registrars']} registrars, {total['domains']:,.0f} domains")
+    else:
+        filters = dict(condition.split('=', 1) for condition in args.where)
+        print(load_cube().slice(args.by, **filters).sort_values('domains', ascending=False).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
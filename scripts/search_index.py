@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Registrar Search Index
+
+Builds a compact trigram index for the dashboard's search box. The tables
+search by case-insensitive substring over a fixed set of fields, so the
+index keeps, for every three-character sequence of those lowercased field
+values, the delta-encoded ids of the rows containing it. A query of three
+or more characters is answered by intersecting the postings of its
+trigrams, which yields every row that can contain it; the candidates are
+then checked with the same substring test the tables use, so the indexed
+and the scanned search return the same rows. Shorter queries have no
+trigram and fall back to the scan.
+"""
+
+import argparse
+import json
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Set
+
+# Fields the dashboard tables search (mirrored in their components)
+SEARCH_FIELDS = ['name', 'iana_id', 'rdap_url', 'gateway_provider', 'website', 'notes', 'whois_server']
+INDEX_VERSION = 2
+GRAM = 3
+
+
+def field_text(value) -> Optional[str]:
+    """A field value as the dashboard compares it: its lowercased string, None if missing."""
+    if value is None or value != value:
+        return None
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value).lower()
+
+
+def grams(text: str) -> Set[str]:
+    return {text[i:i + GRAM] for i in range(len(text) - GRAM + 1)}
+
+
+def matches(record: Dict, query: str, fields: List[str] = SEARCH_FIELDS) -> bool:
+    """The tables' search test: ``query`` is a case-insensitive substring of a field."""
+    query = query.lower()
+    return any(query in text for text in map(field_text, (record.get(field) for field in fields)) if text)
+
+
+class SearchIndex:
+    """Trigram inverted index over the searched fields."""
+
+    def __init__(self, postings: Dict[str, List[int]], rows: int, fields: List[str]):
+        self.postings = postings
+        self.rows = rows
+        self.fields = fields
+
+    @classmethod
+    def build(cls, records: Iterable[Dict], fields: List[str] = SEARCH_FIELDS) -> 'SearchIndex':
+        """Index records; row ids are positions in ``records``."""
+        index: Dict[str, Set[int]] = defaultdict(set)
+        rows = 0
+        for row_id, record in enumerate(records):
+            rows += 1
+            for field in fields:
+                text = field_text(record.get(field))
+                if text:
+                    for gram in grams(text):
+                        index[gram].add(row_id)
+        return cls({gram: sorted(index[gram]) for gram in sorted(index)}, rows, list(fields))
+
+    def to_dict(self) -> Dict:
+        """Compact form: postings are delta-encoded."""
+        return {
+            'version': INDEX_VERSION,
+            'gram': GRAM,
+            'rows': self.rows,
+            'fields': self.fields,
+            'postings': {
+                gram: [ids[0]] + [ids[i] - ids[i - 1] for i in range(1, len(ids))]
+                for gram, ids in self.postings.items()
+            },
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'SearchIndex':
+        postings = {}
+        for gram, deltas in data['postings'].items():
+            ids, total = [], 0
+            for delta in deltas:
+                total += delta
+                ids.append(total)
+            postings[gram] = ids
+        return cls(postings, data['rows'], data['fields'])
+
+    def candidates(self, query: str) -> Optional[List[int]]:
+        """
+        Rows that may contain ``query``, in row order (a superset of the
+        matches); None if the query is too short to use the index.
+        """
+        query_grams = grams(query.lower())
+        if not query_grams:
+            return None
+        # Narrowest posting first keeps the intersection small
+        postings = sorted((self.postings.get(gram, []) for gram in query_grams), key=len)
+        result = set(postings[0])
+        for ids in postings[1:]:
+            result.intersection_update(ids)
+        return sorted(result)
+
+    def lookup(self, query: str, records: List[Dict]) -> List[int]:
+        """Row ids of ``records`` matching ``query``, in row order."""
+        rows = self.candidates(query)
+        if rows is None:
+            rows = range(self.rows)
+        return [row_id for row_id in rows if matches(records[row_id], query, self.fields)]
+
+
+def main():
+    """Build an index for a JSON registrar file and optionally run a query."""
+    parser = argparse.ArgumentParser(description="Build a registrar search index")
+    parser.add_argument('input', help="JSON array of registrar records")
+    parser.add_argument('--output', help="Write the compact index here")
+    parser.add_argument('--query', help="Print the records matching a query")
+    args = parser.parse_args()
+
+    with open(args.input, 'r', encoding='utf-8') as f:
+        records = json.load(f)
+    index = SearchIndex.build(records)
+    data = json.dumps(index.to_dict(), separators=(',', ':'))
+    print(f"Indexed {index.rows} records: {len(index.postings)} trigrams, {len(data):,} bytes")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(data)
+        print(f"Index saved to {args.output}")
+    if args.query:
+        for row_id in index.lookup(args.query, records):
+            print(f"  {records[row_id].get('iana_id')}  {records[row_id].get('name')}")
+
+
+if __name__ == "__main__":
+    main()
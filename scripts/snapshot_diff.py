@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Registrar Snapshot Diff
+
+Compares two snapshots of the registrar table (e.g. last month's and this
+month's all_gateway_registrars.csv) and reports what changed. The snapshots
+are hash-joined on IANA id in one vectorised outer merge, so the diff is
+linear in the number of registrars. Every changed field becomes a typed
+event - new, removed, provider_change, host_change, count_delta - and the
+moves are aggregated into flow matrices (registrars and domains from each
+gateway provider or RDAP host to each other one, with "(new)" and
+"(removed)" as the outside of the table).
+"""
+
+import argparse
+import json
+from pathlib import Path
+from typing import Dict, Union
+
+import numpy as np
+import pandas as pd
+
+from json_stream import encode_record, write_records
+from url_normalizer import normalize_host_series
+
+KEY = 'iana_id'
+NEW = '(new)'
+REMOVED = '(removed)'
+EVENT_COLUMNS = ['event', KEY, 'name', 'field', 'before', 'after', 'delta']
+
+# Event type -> the snapshot column it compares
+FIELD_EVENTS = {
+    'provider_change': 'gateway_provider',
+    'host_change': 'rdap_host',
+    'count_delta': 'domain_count',
+}
+
+
+def load_snapshot(source: Union[str, Path, pd.DataFrame]) -> pd.DataFrame:
+    """
+    A snapshot as a frame with one row per IANA id and the compared columns
+    (gateway_provider, rdap_host, domain_count, name), from a JSON/CSV file
+    or an existing DataFrame.
+    """
+    if isinstance(source, pd.DataFrame):
+        df = source.copy()
+    elif Path(source).suffix == '.json':
+        with open(source, 'r', encoding='utf-8') as f:
+            df = pd.DataFrame(json.load(f))
+    else:
+        df = pd.read_csv(source)
+
+    df = df.dropna(subset=[KEY])
+    df[KEY] = df[KEY].astype(int)
+    df = df.drop_duplicates(KEY)
+
+    snapshot = pd.DataFrame({KEY: df[KEY]})
+    snapshot['name'] = df['name'] if 'name' in df.columns else None
+    snapshot['gateway_provider'] = df['gateway_provider'] if 'gateway_provider' in df.columns else None
+    snapshot['rdap_host'] = normalize_host_series(df['rdap_url']) if 'rdap_url' in df.columns else None
+    snapshot['domain_count'] = pd.to_numeric(df['domain_count'], errors='coerce') if 'domain_count' in df.columns \
+        else float('nan')
+    return snapshot.reset_index(drop=True)
+
+
+def _differs(before: pd.Series, after: pd.Series) -> pd.Series:
+    """Element-wise inequality where two missing values count as equal."""
+    return ~((before == after) | (before.isna() & after.isna()))
+
+
+class SnapshotDiff:
+    """Change events and flows between two registrar snapshots."""
+
+    def __init__(self, before: pd.DataFrame, after: pd.DataFrame, min_count_delta: float = 0):
+        """
+        Args:
+            before: Earlier snapshot (see ``load_snapshot``)
+            after: Later snapshot
+            min_count_delta: Domain count changes of at most this size are
+                not reported as count_delta events
+        """
+        self.min_count_delta = min_count_delta
+        # The hash join: one outer merge on IANA id
+        self.joined = before.merge(after, on=KEY, how='outer', suffixes=('_before', '_after'),
+                                   indicator=True, validate='one_to_one')
+        self.joined['name'] = self.joined['name_after'].combine_first(self.joined['name_before'])
+        self.events = self._events()
+
+    def _events(self) -> pd.DataFrame:
+        joined = self.joined
+        parts = []
+
+        def add(event: str, rows: pd.DataFrame, field, before, after, delta):
+            values = {'event': event, KEY: rows[KEY], 'name': rows['name'], 'field': field,
+                      'before': before, 'after': after, 'delta': delta}
+            parts.append({column: np.asarray(value, dtype=object) if isinstance(value, pd.Series)
+                          else np.full(len(rows), value, dtype=object) for column, value in values.items()})
+
+        added = joined[joined['_merge'] == 'right_only']
+        add('new', added, None, None, added['gateway_provider_after'], added['domain_count_after'])
+        removed = joined[joined['_merge'] == 'left_only']
+        add('removed', removed, None, removed['gateway_provider_before'], None, -removed['domain_count_before'])
+
+        both = joined[joined['_merge'] == 'both']
+        for event, field in FIELD_EVENTS.items():
+            before, after = both[f'{field}_before'], both[f'{field}_after']
+            changed = _differs(before, after)
+            delta = None
+            if field == 'domain_count':
+                delta = after - before
+                changed &= ~(delta.abs() <= self.min_count_delta)
+                delta = delta[changed]
+            add(event, both[changed], field, before[changed], after[changed], delta)
+
+        events = pd.DataFrame({column: np.concatenate([part[column] for part in parts]) for column in EVENT_COLUMNS})
+        events[KEY] = events[KEY].astype(int)
+        events = events.where(events.notna(), None)
+        return events.sort_values([KEY, 'event'], kind='stable').reset_index(drop=True)
+
+    def summary(self) -> Dict[str, int]:
+        """Number of events of each type."""
+        counts = self.events['event'].value_counts()
+        return {event: int(counts.get(event, 0)) for event in ['new', 'removed', *FIELD_EVENTS]}
+
+    def flows(self, field: str = 'gateway_provider', measure: str = 'registrars',
+              include_unchanged: bool = True) -> pd.DataFrame:
+        """
+        Flow matrix: rows are the ``field`` value before, columns after.
+
+        Args:
+            field: 'gateway_provider' or 'rdap_host'
+            measure: 'registrars', or 'domains' (the later count, or the
+                earlier one for removed registrars)
+            include_unchanged: Keep the diagonal of registrars that did not move
+        """
+        joined = self.joined
+        source = joined[f'{field}_before'].where(joined['_merge'] != 'right_only', NEW).fillna('(none)')
+        target = joined[f'{field}_after'].where(joined['_merge'] != 'left_only', REMOVED).fillna('(none)')
+        weight = pd.Series(1, index=joined.index)
+        if measure == 'domains':
+            weight = joined['domain_count_after'].combine_first(joined['domain_count_before']).fillna(0)
+        flows = pd.DataFrame({'from': source, 'to': target, 'weight': weight})
+        if not include_unchanged:
+            flows = flows[flows['from'] != flows['to']]
+        return flows.pivot_table(index='from', columns='to', values='weight', aggfunc='sum', fill_value=0)
+
+    def moves(self, field: str = 'gateway_provider') -> pd.DataFrame:
+        """Off-diagonal flows as (from, to, registrars, domains) rows, largest first."""
+        registrars = self.flows(field, include_unchanged=False).stack()
+        domains = self.flows(field, 'domains', include_unchanged=False).stack()
+        moves = pd.DataFrame({'registrars': registrars, 'domains': domains}).reset_index()
+        moves.columns = ['from', 'to', 'registrars', 'domains']
+        return moves[moves['registrars'] > 0].sort_values('domains', ascending=False).reset_index(drop=True)
+
+    def report(self) -> Dict:
+        """Summary and flows in JSON form."""
+        return {
+            'registrars_before': int((self.joined['_merge'] != 'right_only').sum()),
+            'registrars_after': int((self.joined['_merge'] != 'left_only').sum()),
+            'events': self.summary(),
+            'provider_moves': self.moves('gateway_provider').to_dict('records'),
+            'host_moves': self.moves('rdap_host').to_dict('records'),
+        }
+
+
+def diff_snapshots(before, after, min_count_delta: float = 0) -> SnapshotDiff:
+    """Diff two snapshots given as files or DataFrames."""
+    return SnapshotDiff(load_snapshot(before), load_snapshot(after), min_count_delta)
+
+
+def main():
+    """Diff two registrar snapshot files."""
+    parser = argparse.ArgumentParser(description="Diff two registrar snapshots")
+    parser.add_argument('before', help="Earlier snapshot (JSON or CSV)")
+    parser.add_argument('after', help="Later snapshot (JSON or CSV)")
+    parser.add_argument('--min-count-delta', type=float, default=0,
+                        help="Ignore domain count changes of at most this size")
+    parser.add_argument('--events', help="Write change events here as NDJSON")
+    parser.add_argument('--report', help="Write the summary and flows here as JSON")
+    args = parser.parse_args()
+
+    diff = diff_snapshots(args.before, args.after, args.min_count_delta)
+    report = diff.report()
+
+    print(f"Registrars: {report['registrars_before']} -> {report['registrars_after']}")
+    for event, count in report['events'].items():
+        print(f"  {event}: {count}")
+    for title, key in (("Provider moves", 'provider_moves'), ("RDAP host moves", 'host_moves')):
+        if report[key]:
+            print(f"\n{title}:")
+            for move in report[key][:15]:
+                print(f"  {move['from']} -> {move['to']}: {move['registrars']} registrars, "
+                      f"{move['domains']:,.0f} domains")
+
+    if args.events:
+        events = diff.events
+        count = write_records(Path(args.events), (dict(zip(events.columns, row))
+                                                  for row in events.itertuples(index=False, name=None)),
+                              format='ndjson')
+        print(f"\nWrote {count} events to {args.events}")
+    if args.report:
+        Path(args.report).write_bytes(encode_record(report, indent=2))
+        print(f"Wrote report to {args.report}")
+
+
+if __name__ == "__main__":
+    main()
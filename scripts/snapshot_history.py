@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+Registrar Snapshot History
+
+Keeps every analysis run instead of overwriting the last one. Each snapshot
+of the registrar table (IANA id, name, gateway provider, RDAP host, domain
+count) is appended as its own Hive-style partition,
+data/history/snapshot_date=YYYY-MM-DD/part-0.parquet, and is never
+rewritten. Queries go through a pyarrow dataset, so a date-range filter
+opens only the matching partitions and only the requested columns are
+read. On top of that: per-provider trends, rolling market share against
+the market total recorded with each snapshot, and the top domain-count
+movers between two dates.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+from datetime import date
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from url_normalizer import normalize_host_series
+
+# Resolved from the repository root, since callers run from different directories
+REPO_ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_HISTORY_DIR = REPO_ROOT / "data" / "history"
+MANIFEST_NAME = "_manifest.json"  # underscore prefix keeps it out of the dataset
+
+PARTITION = 'snapshot_date'
+SCHEMA = pa.schema([
+    ('iana_id', pa.int64()),
+    ('name', pa.string()),
+    ('gateway_provider', pa.string()),
+    ('rdap_host', pa.string()),
+    ('domain_count', pa.float64()),
+])
+PARTITIONING = ds.partitioning(pa.schema([(PARTITION, pa.string())]), flavor='hive')
+
+# Provider names as published (the registrar table still uses the RDAP host label)
+PROVIDER_ALIASES = {'RDAP Server': 'LogicBoxes'}
+
+
+class SnapshotHistory:
+    """Append-only, date-partitioned Parquet history of registrar snapshots."""
+
+    def __init__(self, history_dir: Path = DEFAULT_HISTORY_DIR):
+        self.history_dir = Path(history_dir)
+        self.manifest_file = self.history_dir / MANIFEST_NAME
+        self.manifest = self._load_manifest()
+
+    def _load_manifest(self) -> Dict:
+        if self.manifest_file.exists():
+            with open(self.manifest_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        return {'snapshots': {}}
+
+    def _save_manifest(self):
+        tmp = self.manifest_file.with_name(f".{self.manifest_file.name}.tmp")
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(self.manifest, f, indent=2)
+        os.replace(tmp, self.manifest_file)
+
+    def partition_dir(self, snapshot_date: str) -> Path:
+        return self.history_dir / f"{PARTITION}={snapshot_date}"
+
+    def snapshots(self) -> List[str]:
+        """Recorded snapshot dates, oldest first."""
+        return sorted(self.manifest['snapshots'])
+
+    def append(self, df: pd.DataFrame, snapshot_date: Optional[str] = None,
+               market_domains: Optional[float] = None, replace: bool = False) -> Dict:
+        """
+        Record one snapshot of the registrar table.
+
+        Args:
+            df: Registrar rows (iana_id, name, gateway_provider, rdap_url or
+                rdap_host, domain_count)
+            snapshot_date: ISO date of the snapshot (today by default)
+            market_domains: Total domains in the market at that date, for
+                market share; gateway domains are used when unknown
+            replace: Allow overwriting an existing snapshot with different
+                content (a correction); history is otherwise append-only
+
+        Returns:
+            The snapshot's manifest entry
+        """
+        snapshot_date = snapshot_date or date.today().isoformat()
+        date.fromisoformat(snapshot_date)  # reject anything that is not YYYY-MM-DD
+
+        rows = df.dropna(subset=['iana_id'])
+        hosts = rows['rdap_host'] if 'rdap_host' in rows.columns else normalize_host_series(rows['rdap_url'])
+        frame = pd.DataFrame({
+            'iana_id': rows['iana_id'].astype('int64'),
+            'name': rows['name'].astype(object),
+            'gateway_provider': rows['gateway_provider'].replace(PROVIDER_ALIASES).astype(object),
+            'rdap_host': hosts.astype(object),
+            'domain_count': pd.to_numeric(rows['domain_count'], errors='coerce').astype('float64'),
+        }).drop_duplicates('iana_id').sort_values('iana_id')
+        frame = frame.where(frame.notna(), None)
+        table = pa.Table.from_pandas(frame, schema=SCHEMA, preserve_index=False)
+
+        buffer = pa.BufferOutputStream()
+        pq.write_table(table, buffer)
+        content = buffer.getvalue().to_pybytes()
+        digest = hashlib.sha256(content).hexdigest()
+
+        current = self.manifest['snapshots'].get(snapshot_date)
+        if current and current['sha256'] == digest:
+            return current
+        if current and not replace:
+            raise ValueError(f"Snapshot {snapshot_date} already recorded with different content; "
+                             f"pass replace=True to correct it")
+
+        path = self.partition_dir(snapshot_date) / "part-0.parquet"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f".{path.name}.tmp")
+        with open(tmp, 'wb') as f:
+            f.write(content)
+        os.replace(tmp, path)
+
+        entry = {
+            'rows': table.num_rows,
+            'sha256': digest,
+            'gateway_domains': float(frame['domain_count'].sum()),
+            'market_domains': market_domains,
+        }
+        self.manifest['snapshots'][snapshot_date] = entry
+        self._save_manifest()
+        return entry
+
+    def dataset(self) -> ds.Dataset:
+        return ds.dataset(self.history_dir, format='parquet', partitioning=PARTITIONING)
+
+    def read(self, columns: Optional[List[str]] = None, start: Optional[str] = None, end: Optional[str] = None,
+             providers: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        Snapshot rows with their snapshot_date, reading only the partitions
+        between ``start`` and ``end`` (inclusive ISO dates) and only ``columns``.
+        """
+        if not self.manifest['snapshots']:
+            return pd.DataFrame(columns=[PARTITION] + (columns or SCHEMA.names))
+        condition = None
+        for clause in ((ds.field(PARTITION) >= start) if start else None,
+                       (ds.field(PARTITION) <= end) if end else None,
+                       ds.field('gateway_provider').isin(providers) if providers else None):
+            if clause is not None:
+                condition = clause if condition is None else condition & clause
+        table = self.dataset().to_table(columns=[PARTITION] + (columns or SCHEMA.names), filter=condition)
+        return table.to_pandas()
+
+    def trend(self, by: str = 'gateway_provider', measure: str = 'domains',
+              start: Optional[str] = None, end: Optional[str] = None) -> pd.DataFrame:
+        """Snapshot date x ``by`` table of domain totals (or registrar counts)."""
+        columns = [by] + (['domain_count'] if measure == 'domains' else ['iana_id'])
+        rows = self.read(columns, start, end)
+        values = 'domain_count' if measure == 'domains' else 'iana_id'
+        aggfunc = 'sum' if measure == 'domains' else 'count'
+        return rows.pivot_table(index=PARTITION, columns=by, values=values, aggfunc=aggfunc, fill_value=0)
+
+    def market_share(self, window: int = 3, start: Optional[str] = None, end: Optional[str] = None) -> pd.DataFrame:
+        """
+        Provider share of the market (percent) per snapshot, smoothed by a
+        rolling mean over ``window`` snapshots.
+        """
+        domains = self.trend('gateway_provider', 'domains', start, end)
+        totals = pd.Series({
+            snapshot: entry['market_domains'] or entry['gateway_domains']
+            for snapshot, entry in self.manifest['snapshots'].items()
+        })
+        share = domains.div(totals.reindex(domains.index), axis=0) * 100
+        return share.rolling(window, min_periods=1).mean()
+
+    def top_movers(self, start: str, end: str, n: int = 10) -> pd.DataFrame:
+        """Registrars with the largest domain count change between two snapshots."""
+        before = self.read(['iana_id', 'domain_count'], start, start)
+        after = self.read(['iana_id', 'name', 'gateway_provider', 'domain_count'], end, end)
+        joined = after.drop(columns=PARTITION).merge(before.drop(columns=PARTITION), on='iana_id', how='outer',
+                                                     suffixes=('', '_before'))
+        joined['change'] = joined['domain_count'].fillna(0) - joined['domain_count_before'].fillna(0)
+        joined = joined[joined['change'] != 0]
+        order = joined['change'].abs().sort_values(ascending=False).index[:n]
+        return joined.loc[order, ['iana_id', 'name', 'gateway_provider', 'domain_count_before',
+                                  'domain_count', 'change']].reset_index(drop=True)
+
+
+def main():
+    """Record snapshots or query the history."""
+    parser = argparse.ArgumentParser(description="Append-only registrar snapshot history")
+    parser.add_argument('--history', default=str(DEFAULT_HISTORY_DIR))
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    append = subparsers.add_parser('append', help="Record a registrar CSV/JSON file as a snapshot")
+    append.add_argument('file')
+    append.add_argument('--date', help="Snapshot date (YYYY-MM-DD, default today)")
+    append.add_argument('--market-domains', type=float)
+    append.add_argument('--replace', action='store_true', help="Correct an existing snapshot")
+
+    subparsers.add_parser('list', help="List recorded snapshots")
+
+    share = subparsers.add_parser('share', help="Rolling market share per gateway provider")
+    share.add_argument('--window', type=int, default=3)
+    share.add_argument('--start')
+    share.add_argument('--end')
+
+    movers = subparsers.add_parser('movers', help="Top domain count movers between two snapshots")
+    movers.add_argument('start')
+    movers.add_argument('end')
+    movers.add_argument('-n', type=int, default=10)
+
+    args = parser.parse_args()
+    history = SnapshotHistory(Path(args.history))
+
+    if args.command == 'append':
+        if args.file.endswith('.json'):
+            with open(args.file, 'r', encoding='utf-8') as f:
+                df = pd.DataFrame(json.load(f))
+        else:
+            df = pd.read_csv(args.file)
+        entry = history.append(df, args.date, args.market_domains, args.replace)
+        print(f"Recorded {entry['rows']} registrars ({entry['gateway_domains']:,.0f} domains)")
+    elif args.command == 'list':
+        for snapshot in history.snapshots():
+            entry = history.manifest['snapshots'][snapshot]
+            print(f"  {snapshot}: {entry['rows']} registrars, {entry['gateway_domains']:,.0f} gateway domains")
+    elif args.command == 'share':
+        print(history.market_share(args.window, args.start, args.end).round(2).to_string())
+    else:
+        print(history.top_movers(args.start, args.end, args.n).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+RDAP URL and Host Normalisation
+
+The ``rdap_url`` column mixes bare hosts ("rdapserver.net"), hosts with
+paths ("rdap.example.com/rdap/") and full URLs. ``urlparse(x).netloc`` is
+empty for the scheme-less ones, which silently groups them under ''. These
+helpers canonicalise every form, memoised per distinct string, with column
+variants that parse each unique value only once.
+"""
+
+import sys
+from functools import lru_cache
+from typing import Optional
+from urllib.parse import urlsplit
+
+import pandas as pd
+
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+
+def _split(value) -> Optional[tuple]:
+    """Split a raw value into (scheme, host, port, path), or None if empty."""
+    if not isinstance(value, str):
+        if value is None or pd.isna(value):
+            return None
+        value = str(value)
+
+    value = value.strip()
+    if not value:
+        return None
+
+    # Scheme-less values parse as a path unless we mark them as network locations
+    if '://' not in value:
+        value = '//' + value.lstrip('/')
+
+    try:
+        parts = urlsplit(value)
+        port = parts.port
+    except ValueError:
+        return None
+
+    host = parts.hostname
+    if not host:
+        return None
+
+    host = host.rstrip('.')
+    try:
+        host = host.encode('idna').decode('ascii')
+    except UnicodeError:
+        pass
+
+    scheme = (parts.scheme or 'https').lower()
+    if port == DEFAULT_PORTS.get(scheme):
+        port = None
+
+    return scheme, host.lower(), port, parts.path
+
+
+@lru_cache(maxsize=65536)
+def normalize_host(value) -> Optional[str]:
+    """
+    Return the lowercase ASCII hostname of an RDAP URL or bare host.
+
+    >>> normalize_host('rdapserver.net')
+    'rdapserver.net'
+    >>> normalize_host('HTTPS://Opensrs.RDAP.Tucows.com:443/rdap/')
+    'opensrs.rdap.tucows.com'
+    """
+    parts = _split(value)
+    return parts[1] if parts else None
+
+
+@lru_cache(maxsize=65536)
+def normalize_url(value) -> Optional[str]:
+    """
+    Return a canonical RDAP base URL: scheme, host, non-default port and a
+    path ending in '/'. Scheme-less values are assumed to be HTTPS.
+
+    >>> normalize_url('rdap.example.com:8443/rdap')
+    'https://rdap.example.com:8443/rdap/'
+    """
+    parts = _split(value)
+    if parts is None:
+        return None
+    scheme, host, port, path = parts
+    netloc = f"[{host}]" if ':' in host else host
+    netloc = f"{netloc}:{port}" if port else netloc
+    path = '/' + path.strip('/') + '/' if path.strip('/') else '/'
+    return f"{scheme}://{netloc}{path}"
+
+
+def _map_unique(values: pd.Series, func) -> pd.Series:
+    """Apply ``func`` once per distinct value and broadcast back over the column."""
+    codes, uniques = pd.factorize(values, sort=False)
+    mapped = pd.Series([func(value) for value in uniques] + [None], dtype=object).take(codes)
+    mapped.index = values.index
+    return mapped
+
+
+def normalize_host_series(values: pd.Series) -> pd.Series:
+    """Vectorised ``normalize_host`` over a column."""
+    return _map_unique(values, normalize_host)
+
+
+def normalize_url_series(values: pd.Series) -> pd.Series:
+    """Vectorised ``normalize_url`` over a column."""
+    return _map_unique(values, normalize_url)
+
+
+def main():
+    """Normalise the values given on the command line."""
+    for value in sys.argv[1:]:
+        print(f"{value}: host={normalize_host(value)} url={normalize_url(value)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+"""
+Website Candidate Verification
+
+Checks the websites inferred from registrar names (``website_source:
+name_pattern``) against the network. Candidate hosts are deduplicated,
+resolved concurrently through a caching async resolver and probed with HEAD
+requests over one pooled HTTP client. Redirects are followed to a canonical
+URL and each candidate's confidence is upgraded or downgraded by the result.
+"""
+
+import argparse
+import asyncio
+import json
+import socket
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import aiohttp
+from aiohttp.abc import AbstractResolver
+
+from url_normalizer import normalize_host
+
+DEFAULT_INPUT_FILE = Path("data/processed/logicboxes_registrars_enriched_v2.json")
+
+VERIFY_HEADERS = {
+    'User-Agent': 'rdap-registry-analysis/1.0 (website verification)'
+}
+
+CONFIDENCE_LEVELS = ['low', 'medium', 'high']
+
+
+class CachingResolver(AbstractResolver):
+    """
+    Async DNS resolver with a TTL cache, negative caching and in-flight
+    de-duplication, so each host is looked up once however many requests
+    need it.
+    """
+
+    def __init__(self, resolver: Optional[AbstractResolver] = None, ttl: float = 300.0,
+                 negative_ttl: float = 60.0, overrides: Optional[Dict[str, Tuple[str, Optional[int]]]] = None):
+        """
+        Args:
+            resolver: Underlying resolver (defaults to aiohttp's threaded resolver)
+            ttl: Seconds to keep successful answers
+            negative_ttl: Seconds to keep failed lookups
+            overrides: Static host -> (address, port) answers, e.g. for local stand-ins
+        """
+        self._resolver = resolver or aiohttp.ThreadedResolver()
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.overrides = {host.lower(): answer for host, answer in (overrides or {}).items()}
+        self._cache: Dict[str, Tuple[float, object]] = {}
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.stats = Counter()
+
+    async def resolve(self, host: str, port: int = 0, family: int = socket.AF_INET) -> List[Dict]:
+        host = host.lower()
+        override = self.overrides.get(host)
+        if override is not None:
+            address, override_port = override
+            self.stats['override'] += 1
+            return [{
+                'hostname': host, 'host': address, 'port': override_port or port,
+                'family': socket.AF_INET6 if ':' in address else socket.AF_INET,
+                'proto': 0, 'flags': socket.AI_NUMERICHOST
+            }]
+
+        # One cached answer per host serves every address family
+        key = host
+        loop = asyncio.get_running_loop()
+        cached = self._cache.get(key)
+        if cached is not None and cached[0] > loop.time():
+            self.stats['cache_hit'] += 1
+            answer = cached[1]
+        else:
+            future = self._inflight.get(key)
+            if future is None:
+                self.stats['lookup'] += 1
+                future = loop.create_future()
+                self._inflight[key] = future
+                try:
+                    addresses = await self._resolver.resolve(host, 0, socket.AF_UNSPEC)
+                    self._cache[key] = (loop.time() + self.ttl, addresses)
+                    future.set_result(addresses)
+                except OSError as e:
+                    self._cache[key] = (loop.time() + self.negative_ttl, e)
+                    future.set_result(e)
+                except BaseException:
+                    future.cancel()
+                    raise
+                finally:
+                    del self._inflight[key]
+            else:
+                self.stats['coalesced'] += 1
+            answer = await asyncio.shield(future)
+
+        if isinstance(answer, OSError):
+            raise answer
+        addresses = [
+            {**address, 'port': port} for address in answer
+            if family == socket.AF_UNSPEC or address['family'] == family
+        ]
+        if not addresses:
+            raise OSError(f"No address of family {family} for {host}")
+        return addresses
+
+    async def close(self):
+        await self._resolver.close()
+
+
+def adjust_confidence(current: Optional[str], verification: str) -> str:
+    """Raise or lower a candidate's confidence level by its verification result."""
+    level = CONFIDENCE_LEVELS.index(current) if current in CONFIDENCE_LEVELS else 1
+    if verification == 'reachable':
+        level = len(CONFIDENCE_LEVELS) - 1
+    elif verification in ('no_dns', 'unreachable'):
+        level = 0
+    elif verification == 'http_error':
+        # The host exists and answers, so at most 'medium' but never lower:
+        # many sites refuse automated HEAD/GET requests with a 403 or 5xx
+        level = min(level, 1)
+    elif verification == 'redirected_offsite':
+        level = min(level, 1)
+    return CONFIDENCE_LEVELS[level]
+
+
+class WebsiteVerifier:
+    """Concurrent DNS + HTTP verification of candidate websites."""
+
+    def __init__(self, concurrency: int = 200, timeout: float = 10.0, max_redirects: int = 5,
+                 resolver: Optional[CachingResolver] = None, schemes: Tuple[str, ...] = ('https', 'http')):
+        self.concurrency = concurrency
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.max_redirects = max_redirects
+        self.resolver = resolver or CachingResolver()
+        self.schemes = schemes
+        self.stats = Counter()
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+
+    async def verify(self, urls: Iterable[str]) -> Dict[str, Dict]:
+        """
+        Verify candidate URLs.
+
+        Returns:
+            Dictionary mapping each input URL to its host's verification result
+            (verification, status, final_url)
+        """
+        hosts: Dict[str, List[str]] = {}
+        for url in urls:
+            host = normalize_host(url)
+            if host:
+                hosts.setdefault(host, []).append(url)
+
+        self._slots = asyncio.Semaphore(self.concurrency)
+        connector = aiohttp.TCPConnector(limit=self.concurrency, limit_per_host=2,
+                                         resolver=self.resolver, use_dns_cache=False)
+        results: Dict[str, Dict] = {}
+        try:
+            async with aiohttp.ClientSession(connector=connector, headers=VERIFY_HEADERS,
+                                             timeout=self.timeout) as session:
+                self._session = session
+                probes = await asyncio.gather(*(self._probe(host) for host in hosts))
+        finally:
+            self._session = None
+
+        for host, result in zip(hosts, probes):
+            self.stats[result['verification']] += 1
+            for url in hosts[host]:
+                results[url] = result
+        return results
+
+    async def _probe(self, host: str) -> Dict:
+        """Resolve a host, then HEAD it over each scheme until one answers."""
+        result = {'host': host, 'verification': 'unreachable', 'status': None, 'final_url': None}
+        async with self._slots:
+            try:
+                await self.resolver.resolve(host, 443, socket.AF_UNSPEC)
+            except OSError:
+                result['verification'] = 'no_dns'
+                return result
+
+            for scheme in self.schemes:
+                try:
+                    status, final_url = await self._head(f"{scheme}://{host}/")
+                except (aiohttp.ClientError, asyncio.TimeoutError, OSError):
+                    continue
+                result['status'] = status
+                result['final_url'] = final_url
+                if status >= 400:
+                    result['verification'] = 'http_error'
+                elif not self._same_site(host, normalize_host(final_url)):
+                    result['verification'] = 'redirected_offsite'
+                else:
+                    result['verification'] = 'reachable'
+                break
+        return result
+
+    async def _head(self, url: str) -> Tuple[int, str]:
+        """HEAD a URL following redirects, falling back to GET where HEAD is refused."""
+        kwargs = {'allow_redirects': True, 'max_redirects': self.max_redirects}
+        async with self._session.head(url, **kwargs) as response:
+            status, final = response.status, response.url
+        if status in (405, 501):
+            async with self._session.get(url, **kwargs) as response:
+                status, final = response.status, response.url
+        return status, str(final.origin()) + final.path.rstrip('/')
+
+    @staticmethod
+    def _same_site(host: str, final_host: Optional[str]) -> bool:
+        """True if a redirect stayed on the candidate host or its www/bare twin."""
+        if not final_host:
+            return False
+        strip = lambda h: h[4:] if h.startswith('www.') else h
+        return strip(host) == strip(final_host)
+
+    async def verify_records(self, records: List[Dict], sources: Optional[Tuple[str, ...]] = ('name_pattern',)) -> Counter:
+        """
+        Verify the websites of registrar records in place.
+
+        Args:
+            records: Registrar dictionaries with website/website_source fields
+            sources: Only verify websites from these sources (None for all)
+        """
+        selected = [
+            record for record in records
+            if record.get('website') and (sources is None or record.get('website_source') in sources)
+        ]
+        results = await self.verify(record['website'] for record in selected)
+
+        for record in selected:
+            result = results.get(record['website'])
+            if result is None:
+                continue
+            record['website_verification'] = result['verification']
+            record['website_status'] = result['status']
+            record['website_confidence'] = adjust_confidence(record.get('website_confidence'),
+                                                             result['verification'])
+            if result['verification'] == 'reachable' and result['final_url'] != record['website']:
+                record['website_candidate'] = record['website']
+                record['website'] = result['final_url']
+        return self.stats
+
+
+def main():
+    """Verify inferred websites in an enriched registrar file."""
+    parser = argparse.ArgumentParser(description="Verify inferred registrar websites")
+    parser.add_argument('input', nargs='?', default=str(DEFAULT_INPUT_FILE))
+    parser.add_argument('--output', help="Defaults to updating the input file")
+    parser.add_argument('--all', action='store_true', help="Verify every website, not only name_pattern guesses")
+    parser.add_argument('--concurrency', type=int, default=200)
+    parser.add_argument('--timeout', type=float, default=10.0)
+    args = parser.parse_args()
+
+    input_path = Path(args.input)
+    print(f"Loading data from {input_path}...")
+    with open(input_path, 'r') as f:
+        data = json.load(f)
+
+    verifier = WebsiteVerifier(concurrency=args.concurrency, timeout=args.timeout)
+    stats = asyncio.run(verifier.verify_records(data, None if args.all else ('name_pattern',)))
+
+    output_path = Path(args.output) if args.output else input_path
+    with open(output_path, 'w') as f:
+        json.dump(data, f, indent=2)
+
+    print("\nVerification Summary:")
+    for verification, count in stats.most_common():
+        print(f"  {verification}: {count} hosts")
+    print(f"DNS lookups: {verifier.resolver.stats['lookup']} "
+          f"(cache hits {verifier.resolver.stats['cache_hit']}, coalesced {verifier.resolver.stats['coalesced']})")
+    print(f"\nVerified data saved to {output_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,7 +5,11 @@ Simple and Robust RDAP Gateway Analysis
 import pandas as pd
 import json
 from collections import Counter
-from urllib.parse import urlparse
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent / "scripts"))
+from url_normalizer import normalize_host_series
 
 def identify_gateway_provider(rdap_url):
     """Identify gateway provider from RDAP URL patterns"""
@@ -59,9 +63,7 @@ def main():
     df['Gateway'] = df['rdap_url'].apply(identify_gateway_provider)
     
     # Extract RDAP domains
-    df['RDAP_Domain'] = df['rdap_url'].apply(
-        lambda x: urlparse(str(x)).netloc.lower() if pd.notna(x) else None
-    )
+    df['RDAP_Domain'] = normalize_host_series(df['rdap_url'])
     
     print("\n" + "="*80)
     print("GATEWAY PROVIDER ANALYSIS")
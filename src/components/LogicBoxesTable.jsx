@@ -1,10 +1,12 @@
-import React, { useState, useMemo, useEffect } from 'react';
+import React, { useState, useMemo } from 'react';
 import { Search, Download, SortAsc, SortDesc, X } from 'lucide-react';
+import useDatasetBundle from '../hooks/useDatasetBundle';
+import { searchRecords } from '../utils/searchIndex';
+
+// Fields the search box matches (the published index covers the same ones)
+const SEARCH_FIELDS = ['name', 'iana_id', 'rdap_url', 'website', 'whois_server', 'status', 'notes', 'website_source'];
 
 const LogicBoxesTable = () => {
-  const [data, setData] = useState([]);
-  const [loading, setLoading] = useState(true);
-  const [error, setError] = useState(null);
   const [searchTerm, setSearchTerm] = useState('');
   const [sortConfig, setSortConfig] = useState({ key: 'domain_count', direction: 'desc' });
   const [filters, setFilters] = useState({
@@ -15,43 +17,16 @@ const LogicBoxesTable = () => {
   const [currentPage, setCurrentPage] = useState(1);
   const [pageSize, setPageSize] = useState(20);
 
-  // Load LogicBoxes data
-  useEffect(() => {
-    const loadData = async () => {
-      try {
-        const response = await fetch('/data/processed/logicboxes_registrars_enriched_v2.json');
-        if (!response.ok) {
-          throw new Error(`Failed to load LogicBoxes data: ${response.status} ${response.statusText}`);
-        }
-        const registrars = await response.json();
-        setData(registrars);
-      } catch (err) {
-        console.error('Error loading data:', err);
-        setError(err.message);
-      } finally {
-        setLoading(false);
-      }
-    };
-
-    loadData();
-  }, []);
+  // Load the LogicBoxes bundle, first page first
+  const { data, loading, index, error } = useDatasetBundle('logicboxes_registrars');
 
   // Filter and search data
   const filteredData = useMemo(() => {
     let filtered = data;
 
-    // Apply search filter
+    // Apply search filter: narrowed by the index once it is loaded, a scan until then
     if (searchTerm) {
-      filtered = filtered.filter(registrar =>
-        registrar.name.toLowerCase().includes(searchTerm.toLowerCase()) ||
-        registrar.iana_id.toString().includes(searchTerm) ||
-        (registrar.rdap_url && registrar.rdap_url.toLowerCase().includes(searchTerm.toLowerCase())) ||
-        (registrar.website && registrar.website.toLowerCase().includes(searchTerm.toLowerCase())) ||
-        (registrar.whois_server && registrar.whois_server.toLowerCase().includes(searchTerm.toLowerCase())) ||
-        (registrar.status && registrar.status.toLowerCase().includes(searchTerm.toLowerCase())) ||
-        (registrar.notes && registrar.notes.toLowerCase().includes(searchTerm.toLowerCase())) ||
-        (registrar.website_source && registrar.website_source.toLowerCase().includes(searchTerm.toLowerCase()))
-      );
+      filtered = searchRecords(filtered, index, SEARCH_FIELDS, searchTerm);
     }
 
     // Apply RDAP service filter
@@ -83,7 +58,7 @@ const LogicBoxesTable = () => {
     }
 
     return filtered;
-  }, [data, searchTerm, filters]);
+  }, [data, index, searchTerm, filters]);
 
   // Sort data
   const sortedData = useMemo(() => {
@@ -1,10 +1,12 @@
-import React, { useState, useMemo, useEffect } from 'react';
+import React, { useState, useMemo } from 'react';
 import { Search, Download, SortAsc, SortDesc, X } from 'lucide-react';
+import useDatasetBundle from '../hooks/useDatasetBundle';
+import { searchRecords } from '../utils/searchIndex';
+
+// Fields the search box matches (the published index covers the same ones)
+const SEARCH_FIELDS = ['name', 'iana_id', 'rdap_url', 'gateway_provider', 'website', 'notes', 'whois_server'];
 
 const RegistryGatewayUsers = () => {
-  const [data, setData] = useState([]);
-  const [loading, setLoading] = useState(true);
-  const [error, setError] = useState(null);
   const [searchTerm, setSearchTerm] = useState('');
   const [sortConfig, setSortConfig] = useState({ key: 'domain_count', direction: 'desc' });
   const [filters, setFilters] = useState({
@@ -16,74 +18,16 @@ const RegistryGatewayUsers = () => {
   const [currentPage, setCurrentPage] = useState(1);
   const [pageSize, setPageSize] = useState(50);
 
-  // Load all gateway registrars data
-  useEffect(() => {
-    const loadData = async () => {
-      try {
-        // Load both data sources
-        const [gatewayResponse, logicboxesResponse] = await Promise.all([
-          fetch('/data/processed/all_gateway_registrars.json'),
-          fetch('/data/processed/logicboxes_registrars_enriched_v2.json')
-        ]);
-
-        if (!gatewayResponse.ok) {
-          throw new Error(`Failed to load gateway registrars: ${gatewayResponse.status} ${gatewayResponse.statusText}`);
-        }
-        if (!logicboxesResponse.ok) {
-          throw new Error(`Failed to load LogicBoxes enriched data: ${logicboxesResponse.status} ${logicboxesResponse.statusText}`);
-        }
-
-        const gatewayRegistrars = await gatewayResponse.json();
-        const logicboxesEnriched = await logicboxesResponse.json();
-
-        // Create a map of LogicBoxes enriched data by IANA ID
-        const enrichedMap = new Map(logicboxesEnriched.map(reg => [reg.iana_id, reg]));
-
-        // Merge the enriched data with gateway registrars
-        const mergedData = gatewayRegistrars.map(registrar => {
-          if (registrar.gateway_provider === 'LogicBoxes' && enrichedMap.has(registrar.iana_id)) {
-            const enriched = enrichedMap.get(registrar.iana_id);
-            return {
-              ...registrar,
-              website: enriched.website || registrar.website,
-              website_source: enriched.website_source,
-              website_confidence: enriched.website_confidence,
-              notes: enriched.notes,
-              whois_server: enriched.whois_server || registrar.whois_server,
-              status: enriched.status || registrar.status,
-              rdap_service: enriched.rdap_service || registrar.rdap_service
-            };
-          }
-          return registrar;
-        });
-
-        setData(mergedData);
-      } catch (err) {
-        console.error('Error loading data:', err);
-        setError(err.message);
-      } finally {
-        setLoading(false);
-      }
-    };
-
-    loadData();
-  }, []);
+  // Load the pre-merged registrar bundle, first page first
+  const { data, loading, index, error } = useDatasetBundle('registry_gateway_users');
 
   // Filter and search data
   const filteredData = useMemo(() => {
     let filtered = data;
 
-    // Apply search filter
+    // Apply search filter: narrowed by the index once it is loaded, a scan until then
     if (searchTerm) {
-      filtered = filtered.filter(registrar =>
-        registrar.name.toLowerCase().includes(searchTerm.toLowerCase()) ||
-        registrar.iana_id.toString().includes(searchTerm) ||
-        (registrar.rdap_url && registrar.rdap_url.toLowerCase().includes(searchTerm.toLowerCase())) ||
-        (registrar.gateway_provider && registrar.gateway_provider.toLowerCase().includes(searchTerm.toLowerCase())) ||
-        (registrar.website && registrar.website.toLowerCase().includes(searchTerm.toLowerCase())) ||
-        (registrar.notes && registrar.notes.toLowerCase().includes(searchTerm.toLowerCase())) ||
-        (registrar.whois_server && registrar.whois_server.toLowerCase().includes(searchTerm.toLowerCase()))
-      );
+      filtered = searchRecords(filtered, index, SEARCH_FIELDS, searchTerm);
     }
 
     // Apply gateway provider filter
@@ -124,7 +68,7 @@ const RegistryGatewayUsers = () => {
     }
 
     return filtered;
-  }, [data, searchTerm, filters]);
+  }, [data, index, searchTerm, filters]);
 
   // Sort data
   const sortedData = useMemo(() => {
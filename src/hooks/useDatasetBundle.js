@@ -0,0 +1,70 @@
+import { useState, useEffect } from 'react';
+import { decodeIndex } from '../utils/searchIndex';
+
+const BUNDLE_BASE = '/data/bundles';
+
+const fetchJson = async (path) => {
+  const response = await fetch(`${BUNDLE_BASE}/${path}`);
+  if (!response.ok) {
+    throw new Error(`Failed to load ${path}: ${response.status} ${response.statusText}`);
+  }
+  return response.json();
+};
+
+// Loads a sharded dataset published by scripts/publish_dashboard.py. The first
+// page shard (largest registrars first) is shown as soon as it arrives; the
+// remaining pages are fetched in parallel and appended, followed by the
+// dataset's search index.
+const useDatasetBundle = (dataset) => {
+  const [data, setData] = useState([]);
+  const [loading, setLoading] = useState(true);
+  const [complete, setComplete] = useState(false);
+  const [index, setIndex] = useState(null);
+  const [error, setError] = useState(null);
+
+  useEffect(() => {
+    let cancelled = false;
+
+    const loadData = async () => {
+      try {
+        const manifest = await fetchJson('manifest.json');
+        const bundle = manifest.datasets[dataset];
+        if (!bundle) {
+          throw new Error(`Dataset ${dataset} is not in the bundle manifest`);
+        }
+
+        const [firstPage, ...otherPages] = bundle.pages;
+        const firstRows = firstPage ? await fetchJson(firstPage.file) : [];
+        if (cancelled) return;
+        setData(firstRows);
+        setLoading(false);
+
+        const otherRows = await Promise.all(otherPages.map(page => fetchJson(page.file)));
+        if (cancelled) return;
+        setData(firstRows.concat(...otherRows));
+        setComplete(true);
+
+        // Search index row ids are positions in the concatenated pages
+        if (bundle.search) {
+          const searchData = await fetchJson(bundle.search.file);
+          if (cancelled) return;
+          setIndex(decodeIndex(searchData));
+        }
+      } catch (err) {
+        console.error('Error loading data:', err);
+        if (!cancelled) setError(err.message);
+      } finally {
+        if (!cancelled) setLoading(false);
+      }
+    };
+
+    loadData();
+    return () => {
+      cancelled = true;
+    };
+  }, [dataset]);
+
+  return { data, loading, complete, index, error };
+};
+
+export default useDatasetBundle;
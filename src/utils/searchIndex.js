@@ -0,0 +1,49 @@
+// Query side of the trigram search index built by scripts/search_index.py.
+// The index narrows a query to the rows containing all of its three-character
+// sequences; matchesSearch then applies the tables' own test (case-insensitive
+// substring of a field), so indexed and scanned search return the same rows.
+
+// The tables' search test; fields are the ones the index covers
+export const matchesSearch = (record, fields, query) => {
+  const term = query.toLowerCase();
+  return fields.some(field => {
+    const value = record[field];
+    return value !== null && value !== undefined && String(value).toLowerCase().includes(term);
+  });
+};
+
+// Expand delta-encoded postings into row ids
+export const decodeIndex = (data) => {
+  const postings = {};
+  Object.entries(data.postings).forEach(([gram, deltas]) => {
+    let total = 0;
+    postings[gram] = deltas.map(delta => (total += delta));
+  });
+  return { rows: data.rows, gram: data.gram, fields: data.fields, postings };
+};
+
+// Row ids that may contain the query, in row order; null if the query is
+// shorter than a trigram and the caller has to scan
+const candidates = (index, query) => {
+  const chars = Array.from(query.toLowerCase());
+  if (chars.length < index.gram) return null;
+  const grams = new Set();
+  for (let i = 0; i + index.gram <= chars.length; i++) {
+    grams.add(chars.slice(i, i + index.gram).join(''));
+  }
+
+  // Narrowest posting first keeps the intersection small
+  const [first, ...rest] = [...grams]
+    .map(gram => index.postings[gram] || [])
+    .sort((a, b) => a.length - b.length)
+    .map(ids => new Set(ids));
+  return [...first].filter(id => rest.every(ids => ids.has(id))).sort((a, b) => a - b);
+};
+
+// Records matching the query: through the index when it can narrow the
+// query, otherwise by scanning every record
+export const searchRecords = (records, index, fields, query) => {
+  const ids = index ? candidates(index, query) : null;
+  const pool = ids ? ids.map(id => records[id]) : records;
+  return pool.filter(record => matchesSearch(record, fields, query));
+};
@@ -0,0 +1,6 @@
+"""Make the modules in scripts/ importable, as the top-level scripts do."""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
@@ -0,0 +1,52 @@
+"""
+Content-hashed publishing: artifacts a run no longer publishes are retired.
+"""
+
+import json
+
+from content_publisher import ContentPublisher, dump_json
+
+
+def publish_run(root, shards):
+    """One publish of the given shard names under bundles/."""
+    publisher = ContentPublisher(root, keep_versions=1)
+    files = {name: publisher.publish(f"bundles/{name}", dump_json(content), stable=False)['file']
+             for name, content in shards.items()}
+    publisher.retire_unpublished('bundles/')
+    publisher.save()
+    return publisher, files
+
+
+def test_unpublished_shard_is_retired_and_deleted_a_publish_later(tmp_path):
+    _, files = publish_run(tmp_path, {'a.json': [1], 'b.json': [2]})
+
+    publisher, _ = publish_run(tmp_path, {'a.json': [1, 1]})
+    manifest = json.loads((tmp_path / 'publish-manifest.json').read_text())
+    assert publisher.retired == ['bundles/b.json']
+    assert list(manifest['files']) == ['bundles/a.json']
+    assert (tmp_path / files['b.json']).exists()  # an older manifest may still refer to it
+
+    publish_run(tmp_path, {'a.json': [1, 1, 1]})
+    manifest = json.loads((tmp_path / 'publish-manifest.json').read_text())
+    assert manifest['retired'] == {}
+    assert not (tmp_path / files['b.json']).exists()
+
+
+def test_retired_shard_published_again_is_current(tmp_path):
+    publish_run(tmp_path, {'a.json': [1], 'b.json': [2]})
+    publish_run(tmp_path, {'a.json': [1, 1]})
+
+    publisher, files = publish_run(tmp_path, {'a.json': [1, 1], 'b.json': [2]})
+    assert publisher.changed == ['bundles/b.json']
+    assert publisher.manifest['retired'] == {}
+    assert (tmp_path / files['b.json']).exists()
+
+
+def test_names_outside_the_prefix_are_kept(tmp_path):
+    publisher = ContentPublisher(tmp_path)
+    publisher.publish('processed/summary.json', dump_json({'total': 1}))
+    publisher.save()
+
+    publisher, _ = publish_run(tmp_path, {'a.json': [1]})
+    assert publisher.retired == []
+    assert 'processed/summary.json' in publisher.manifest['files']
@@ -0,0 +1,79 @@
+"""
+The ICANN enrichment source against a local stand-in lookup API: rate-limit
+and server errors are reported as errors, never cached as empty answers.
+"""
+
+import asyncio
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from enrichment_federation import ICANNSource
+
+ICANN_RESPONSE = {'name': 'Stand-in Registrar', 'url': 'https://registrar.test', 'email': 'info@registrar.test'}
+
+
+async def run_lookups(handler, iana_ids, **kwargs):
+    """Look up each IANA id twice; returns the statuses and requests per id."""
+    requests = []
+
+    async def handle(request):
+        requests.append(int(request.match_info['iana_id']))
+        return await handler(request, requests)
+
+    app = web.Application()
+    app.router.add_get('/api/registrar/{iana_id}', handle)
+    server = TestServer(app, host='127.0.0.1')
+    await server.start_server()
+    source = ICANNSource(api_base=str(server.make_url('/api/registrar/')), rate=0, **kwargs)
+    await source.open()
+    try:
+        statuses = []
+        for iana_id in iana_ids:
+            for _ in range(2):
+                status, data, _ = await source.lookup({'iana_id': iana_id})
+                statuses.append((status, data))
+    finally:
+        await source.close()
+        await server.close()
+    return statuses, requests, source.stats
+
+
+def test_server_error_is_an_uncached_error():
+    async def handler(request, requests):
+        return web.Response(status=503)
+
+    statuses, requests, stats = asyncio.run(run_lookups(handler, [1]))
+    assert statuses == [('error', None), ('error', None)]
+    assert requests == [1, 1]
+    assert stats['empty'] == 0 and stats['error:ClientResponseError'] == 2
+
+
+def test_rate_limit_is_retried_after_backing_off():
+    async def handler(request, requests):
+        if len(requests) == 1:
+            return web.Response(status=429, headers={'Retry-After': '0'})
+        return web.json_response(ICANN_RESPONSE)
+
+    statuses, requests, _ = asyncio.run(run_lookups(handler, [2]))
+    assert [status for status, _ in statuses] == ['ok', 'cached']
+    assert statuses[0][1]['website'] == 'https://registrar.test'
+    assert requests == [2, 2]
+
+
+def test_persistent_rate_limit_is_an_error():
+    async def handler(request, requests):
+        return web.Response(status=429, headers={'Retry-After': '0'})
+
+    statuses, requests, _ = asyncio.run(run_lookups(handler, [3], max_retries=1))
+    assert statuses == [('error', None), ('error', None)]
+    assert requests == [3, 3, 3, 3]
+
+
+def test_unknown_registrar_is_cached_as_empty():
+    async def handler(request, requests):
+        return web.Response(status=404)
+
+    statuses, requests, _ = asyncio.run(run_lookups(handler, [4]))
+    assert statuses == [('empty', None), ('cached', None)]
+    assert requests == [4]
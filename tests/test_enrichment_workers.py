@@ -0,0 +1,87 @@
+"""
+Work queue leases and the shared rate limiter of the sharded enrichment.
+"""
+
+import asyncio
+import json
+import time
+
+import pandas as pd
+
+from enrichment_workers import SharedRateLimiter, WorkQueue, merge_shards
+from json_stream import encode_record
+
+
+def expire_leases(queue):
+    queue.conn.execute("UPDATE batches SET lease_expires = ? WHERE state = 'leased'", (time.time() - 1,))
+
+
+def test_expired_lease_is_handed_to_another_worker(tmp_path):
+    queue = WorkQueue(tmp_path / 'queue.db', max_attempts=2)
+    queue.enqueue([{'iana_id': 1}, {'iana_id': 2}], batch_size=2)
+    first = queue.lease('crashed')
+    expire_leases(queue)
+
+    again = queue.lease('other')
+    assert again['batch_id'] == first['batch_id']
+    assert not queue.complete(first['batch_id'], 'crashed')
+    assert queue.complete(again['batch_id'], 'other')
+    assert queue.progress() == {'done': 1}
+
+
+def test_lease_expired_on_last_attempt_fails_the_batch(tmp_path):
+    queue = WorkQueue(tmp_path / 'queue.db', max_attempts=2)
+    queue.enqueue([{'iana_id': 1}], batch_size=1)
+    for worker in ('first', 'second'):
+        assert queue.lease(worker) is not None
+        expire_leases(queue)
+
+    assert queue.lease('third') is None
+    assert queue.progress() == {'failed': 1}
+    row = queue.conn.execute("SELECT attempts, error FROM batches").fetchone()
+    assert (row['attempts'], row['error']) == (2, 'lease expired')
+
+
+def test_failed_batch_is_retried_until_max_attempts(tmp_path):
+    queue = WorkQueue(tmp_path / 'queue.db', max_attempts=2)
+    queue.enqueue([{'iana_id': 1}], batch_size=1)
+    for worker in ('first', 'second'):
+        batch = queue.lease(worker)
+        queue.fail(batch['batch_id'], worker, 'ValueError: bad')
+
+    assert queue.lease('third') is None
+    assert queue.progress() == {'failed': 1}
+
+
+def test_back_off_delays_every_process_sharing_the_queue(tmp_path):
+    async def scenario():
+        limiter = SharedRateLimiter(tmp_path / 'queue.db', 'icann', rate=100.0)
+        other = SharedRateLimiter(tmp_path / 'queue.db', 'icann', rate=100.0)
+        await limiter.wait_for_slot()
+        await limiter.back_off(0.3)
+        started = time.time()
+        await other.wait_for_slot()
+        return time.time() - started
+
+    assert asyncio.run(scenario()) >= 0.25
+
+
+def test_merge_keeps_the_latest_record_per_registrar(tmp_path):
+    shards = {
+        'shard-a.ndjson': [{'iana_id': 9, 'website': 'old', 'worker': 'a', 'finished_at': 1.0},
+                           {'iana_id': 2, 'website': 'two', 'worker': 'a', 'finished_at': 1.0}],
+        'shard-b.ndjson': [{'iana_id': 9, 'website': 'new', 'email': 'x@nine.test', 'worker': 'b',
+                            'finished_at': 2.0}],
+    }
+    for name, records in shards.items():
+        (tmp_path / name).write_bytes(b''.join(encode_record(r) + b'\n' for r in records))
+    with open(tmp_path / 'shard-b.ndjson', 'ab') as f:
+        f.write(b'{"iana_id": 3, "webs')
+
+    output = tmp_path / 'merged.json'
+    assert merge_shards(tmp_path, output) == 2
+    assert json.loads(output.read_text()) == [{'iana_id': 2, 'website': 'two'},
+                                               {'iana_id': 9, 'website': 'new', 'email': 'x@nine.test'}]
+    merged = pd.read_csv(output.with_suffix('.csv'))
+    assert list(merged.columns) == ['iana_id', 'website', 'email']
+    assert list(merged['website']) == ['two', 'new']
@@ -0,0 +1,45 @@
+"""
+Streaming JSON writers: output is the same bytes whichever backend encodes it.
+"""
+
+import json
+
+import numpy as np
+import pytest
+
+from json_stream import BACKENDS, encode_record, iter_ndjson, write_records
+
+RECORDS = [
+    {'iana_id': 1, 'name': 'Registrar 1e5', 'domains': 1e20, 'share': 1.5e-05, 'ratio': 0.00003},
+    {'iana_id': 2, 'name': 'Résumé', 'domains': 12345.5, 'share': float('nan'),
+     'contact': {'score': float('inf'), 'tiny': 1e-9, 'rank': np.int64(3)}},
+    {'iana_id': 3, 'name': 'Big', 'domains': np.float64(2.5e17), 'handles': [2 ** 70, 0.0001, -1e16]},
+]
+
+
+@pytest.mark.skipif(len(BACKENDS) < 2, reason="orjson is not installed")
+@pytest.mark.parametrize('indent', [None, 2])
+def test_backends_write_the_same_bytes(indent):
+    for record in RECORDS:
+        assert encode_record(record, indent, 'orjson') == encode_record(record, indent, 'json')
+
+
+def test_non_finite_floats_are_null_at_any_depth():
+    record = json.loads(encode_record(RECORDS[1], backend='json'))
+    assert record['share'] is None
+    assert record['contact'] == {'score': None, 'tiny': 1e-9, 'rank': 3}
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_array_matches_json_dump(tmp_path, backend):
+    path = tmp_path / 'records.json'
+    assert write_records(path, iter(RECORDS[:1]), indent=2, backend=backend) == 1
+    assert path.read_text(encoding='utf-8') == json.dumps(RECORDS[:1], indent=2, ensure_ascii=False)
+
+
+def test_ndjson_round_trip_skips_a_torn_last_line(tmp_path):
+    path = tmp_path / 'records.ndjson'
+    write_records(path, RECORDS, format='ndjson')
+    with open(path, 'ab') as f:
+        f.write(b'{"iana_id": 4, "na')
+    assert [record['iana_id'] for record in iter_ndjson(path)] == [1, 2, 3]
@@ -0,0 +1,46 @@
+"""
+Delta updates of the gateway provider aggregates.
+"""
+
+import pandas as pd
+import pytest
+
+from provider_aggregates import ProviderAggregates
+
+ANALYSIS = {
+    'dataset_summary': {'total_domains': 1000},
+    'gateway_providers': {'Tucows': {'registrar_count': 1, 'total_domains': 300}},
+}
+
+
+@pytest.fixture
+def aggregates(tmp_path):
+    aggregates = ProviderAggregates(tmp_path / 'aggregates.db')
+    registrars = pd.DataFrame({'iana_id': [69], 'gateway_provider': ['Tucows'], 'domain_count': [300]})
+    aggregates.seed(ANALYSIS, registrars)
+    yield aggregates
+    aggregates.close()
+
+
+def test_indexed_registrar_applies_its_delta(aggregates):
+    aggregates.update_registrar(69, 350)
+    assert aggregates.market_domains == 1050
+    assert aggregates.provider_totals()['Tucows']['total_domains'] == 350
+
+
+def test_unindexed_registrar_needs_its_previous_count(aggregates):
+    with pytest.raises(ValueError):
+        aggregates.update_registrar(146, 510)
+    assert aggregates.market_domains == 1000
+
+    aggregates.update_registrar(146, 510, previous_count=500)
+    assert aggregates.market_domains == 1010
+    assert aggregates.gateway_analysis()['total_self_hosted_domains'] == 710
+
+
+def test_unindexed_registrar_joining_a_gateway_moves_its_domains(aggregates):
+    aggregates.update_registrar(146, 500, provider='Tucows', previous_count=500)
+    assert aggregates.market_domains == 1000
+    assert aggregates.provider_totals()['Tucows'] == {
+        'registrar_count': 2, 'total_domains': 800, 'market_share_percent': 80.0,
+    }
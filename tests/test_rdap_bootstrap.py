@@ -0,0 +1,46 @@
+"""
+Routing domain names through the RDAP bootstrap trie.
+"""
+
+import json
+
+import pytest
+
+from rdap_bootstrap import RDAPBootstrap
+
+
+@pytest.fixture
+def bootstrap(tmp_path):
+    path = tmp_path / 'dns.json'
+    path.write_text(json.dumps({
+        'version': '1.0',
+        'publication': '2024-01-01T00:00:00Z',
+        'services': [
+            [['com', 'net'], ['http://rdap.verisign.test/com/v1', 'https://rdap.verisign.test/com/v1/']],
+            [['uk'], ['https://rdap.nominet.test/uk/']],
+            [['co.uk'], ['https://rdap.nominet.test/co.uk/']],
+        ],
+    }))
+    return RDAPBootstrap(path)
+
+
+def test_routes_by_longest_suffix(bootstrap):
+    assert bootstrap.base_url('example.com') == 'https://rdap.verisign.test/com/v1/'
+    assert bootstrap.base_url('Example.CO.UK.') == 'https://rdap.nominet.test/co.uk/'
+    assert bootstrap.base_url('example.org.uk') == 'https://rdap.nominet.test/uk/'
+    assert bootstrap.base_url('example.org') is None
+
+
+def test_domain_url_uses_normalised_name(bootstrap):
+    assert bootstrap.domain_url('Example.COM.') == 'https://rdap.verisign.test/com/v1/domain/example.com'
+
+
+@pytest.mark.parametrize('name', ['', '.', '.com', 'foo..com', 'example.com..', ' . '])
+def test_malformed_names_are_unrouted(bootstrap, name):
+    assert bootstrap.base_url(name) is None
+    assert bootstrap.domain_url(name) is None
+
+
+def test_tld_summary_lists_every_entry(bootstrap):
+    summary = bootstrap.tld_summary()
+    assert list(summary['entry']) == ['co.uk', 'com', 'net', 'uk']
@@ -0,0 +1,236 @@
+"""
+Bulk RDAP lookups against local stand-in registry and registrar servers:
+per-host rate limits, 429 back-off, per-host isolation and NDJSON output.
+"""
+
+import asyncio
+import json
+import time
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from rdap_bootstrap import RDAPBootstrap
+from rdap_bulk_lookup import BulkRDAPLookup
+
+IANA_ID = 1068
+
+
+def registry_response(domain, registrar_base):
+    return {
+        'objectClassName': 'domain',
+        'ldhName': domain,
+        'entities': [{
+            'objectClassName': 'entity',
+            'roles': ['registrar'],
+            'publicIds': [{'type': 'IANA Registrar ID', 'identifier': str(IANA_ID)}],
+            'vcardArray': ['vcard', [['version', {}, 'text', '4.0'], ['fn', {}, 'text', 'Stand-in Registrar']]],
+        }],
+        'links': [{'rel': 'related', 'href': f"{registrar_base}/domain/{domain}"}],
+    }
+
+
+REGISTRAR_RESPONSE = {
+    'objectClassName': 'domain',
+    'entities': [{
+        'objectClassName': 'entity',
+        'roles': ['registrar'],
+        'publicIds': [{'type': 'IANA Registrar ID', 'identifier': str(IANA_ID)}],
+        'vcardArray': ['vcard', [
+            ['version', {}, 'text', '4.0'],
+            ['fn', {}, 'text', 'Stand-in Registrar'],
+            ['email', {}, 'text', 'support@registrar.test'],
+        ]],
+        'entities': [{
+            'roles': ['abuse'],
+            'vcardArray': ['vcard', [['email', {}, 'text', 'abuse@registrar.test']]],
+        }],
+    }],
+}
+
+
+class StandIn:
+    """A local RDAP server recording when each request arrived."""
+
+    def __init__(self, handler):
+        self.requests = []
+        self._handler = handler
+        app = web.Application()
+        app.router.add_get('/domain/{name}', self._handle)
+        self.server = TestServer(app, host='127.0.0.1')
+
+    async def _handle(self, request):
+        self.requests.append((request.match_info['name'], time.monotonic()))
+        return await self._handler(request)
+
+    @property
+    def base(self):
+        return str(self.server.make_url('')).rstrip('/')
+
+    async def __aenter__(self):
+        await self.server.start_server()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.server.close()
+
+
+def write_bootstrap(path, services):
+    """A bootstrap file routing each TLD to a stand-in registry."""
+    path.write_text(json.dumps({
+        'version': '1.0',
+        'services': [[[tld], [f"{base}/"]] for tld, base in services.items()],
+    }))
+    return RDAPBootstrap(path)
+
+
+def read_ndjson(path):
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+async def json_response(data, **kwargs):
+    return web.json_response(data, content_type='application/rdap+json', **kwargs)
+
+
+def test_requests_to_one_host_respect_its_rate(tmp_path):
+    rate = 20.0
+
+    async def registry(request):
+        return await json_response(registry_response(request.match_info['name'], 'http://unused.test'))
+
+    async def scenario():
+        async with StandIn(registry) as server:
+            bootstrap = write_bootstrap(tmp_path / 'dns.json', {'test': server.base})
+            lookup = BulkRDAPLookup(bootstrap, tmp_path / 'out.ndjson', per_host_concurrency=4,
+                                    per_host_rate=rate, follow_registrar=False)
+            stats = await lookup.run(f"domain{i}.test" for i in range(10))
+            return stats, server.requests
+
+    stats, requests = asyncio.run(scenario())
+    assert stats['completed'] == 10
+    times = sorted(arrived for _, arrived in requests)
+    gaps = [later - earlier for earlier, later in zip(times, times[1:])]
+    # Four workers share the host's slots, so requests never bunch up
+    assert min(gaps) >= 0.8 / rate
+    assert times[-1] - times[0] >= 0.9 * 9 / rate
+
+
+def test_429_backs_off_for_retry_after_then_succeeds(tmp_path):
+    attempts = []
+
+    async def registry(request):
+        attempts.append(request.match_info['name'])
+        if len(attempts) == 1:
+            return web.Response(status=429, headers={'Retry-After': '1'})
+        return await json_response(registry_response(request.match_info['name'], 'http://unused.test'))
+
+    async def scenario():
+        async with StandIn(registry) as server:
+            bootstrap = write_bootstrap(tmp_path / 'dns.json', {'test': server.base})
+            lookup = BulkRDAPLookup(bootstrap, tmp_path / 'out.ndjson', per_host_rate=0,
+                                    follow_registrar=False)
+            await lookup.run(['example.test'])
+            return server.requests
+
+    requests = asyncio.run(scenario())
+    assert len(requests) == 2
+    assert requests[1][1] - requests[0][1] >= 0.95
+    [record] = read_ndjson(tmp_path / 'out.ndjson')
+    assert record['registry_status'] == 200
+    assert record['error'] is None
+
+
+def test_429_on_every_attempt_is_reported(tmp_path):
+    async def registry(request):
+        return web.Response(status=429, headers={'Retry-After': '0'})
+
+    async def scenario():
+        async with StandIn(registry) as server:
+            bootstrap = write_bootstrap(tmp_path / 'dns.json', {'test': server.base})
+            lookup = BulkRDAPLookup(bootstrap, tmp_path / 'out.ndjson', per_host_rate=0, max_retries=2,
+                                    follow_registrar=False)
+            stats = await lookup.run(['example.test'])
+            return stats, server.requests
+
+    stats, requests = asyncio.run(scenario())
+    assert len(requests) == 3
+    assert stats['errors'] == 1
+    [record] = read_ndjson(tmp_path / 'out.ndjson')
+    assert record['registry_status'] == 429
+    assert record['error'] == 'HTTP 429'
+
+
+def test_slow_host_does_not_hold_up_other_hosts(tmp_path):
+    async def slow(request):
+        await asyncio.sleep(0.5)
+        return await json_response(registry_response(request.match_info['name'], 'http://unused.test'))
+
+    async def fast(request):
+        return await json_response(registry_response(request.match_info['name'], 'http://unused.test'))
+
+    async def scenario():
+        async with StandIn(slow) as slow_server, StandIn(fast) as fast_server:
+            bootstrap = write_bootstrap(tmp_path / 'dns.json', {'slow': slow_server.base, 'test': fast_server.base})
+            lookup = BulkRDAPLookup(bootstrap, tmp_path / 'out.ndjson', per_host_concurrency=1,
+                                    per_host_rate=0, follow_registrar=False)
+            await lookup.run(['a.slow', 'b.slow', 'a.test', 'b.test', 'c.test'])
+
+    asyncio.run(scenario())
+    order = [record['domain'] for record in read_ndjson(tmp_path / 'out.ndjson')]
+    assert order[:3] == ['a.test', 'b.test', 'c.test']
+
+
+def test_results_stream_to_ndjson(tmp_path):
+    async def registrar(request):
+        return await json_response(REGISTRAR_RESPONSE)
+
+    async def scenario():
+        async with StandIn(registrar) as registrar_server:
+            async def registry(request):
+                return await json_response(registry_response(request.match_info['name'], registrar_server.base))
+
+            async with StandIn(registry) as registry_server:
+                bootstrap = write_bootstrap(tmp_path / 'dns.json', {'test': registry_server.base})
+                lookup = BulkRDAPLookup(bootstrap, tmp_path / 'out.ndjson', per_host_rate=0)
+                stats = await lookup.run(['one.test', 'Two.Test.', 'unrouted.invalid'])
+                return stats, registrar_server.base
+
+    stats, registrar_base = asyncio.run(scenario())
+    assert stats['submitted'] == 3
+    assert stats['completed'] == 2
+    assert stats['errors'] == 1
+
+    records = {record['domain']: record for record in read_ndjson(tmp_path / 'out.ndjson')}
+    assert set(records) == {'one.test', 'two.test', 'unrouted.invalid'}
+    assert records['unrouted.invalid']['error'] == 'No registry RDAP service in bootstrap'
+
+    record = records['two.test']
+    assert record['error'] is None
+    assert record['registry_status'] == 200
+    assert record['registrar_status'] == 200
+    assert record['registrar_iana_id'] == IANA_ID
+    assert record['registrar_name'] == 'Stand-in Registrar'
+    assert record['registrar_url'] == f"{registrar_base}/domain/two.test"
+    assert record['registrar_host'] == registrar_base.split('://', 1)[1]
+    assert record['registrar_contact']['email'] == 'support@registrar.test'
+    assert record['registrar_contact']['abuse_email'] == 'abuse@registrar.test'
+    assert record['fetched_at']
+
+
+def test_unroutable_input_line_fails_alone(tmp_path):
+    class BrokenBootstrap:
+        def domain_url(self, domain):
+            if domain == 'bad.test':
+                raise ValueError("malformed name")
+            return None
+
+    async def scenario():
+        lookup = BulkRDAPLookup(BrokenBootstrap(), tmp_path / 'out.ndjson', per_host_rate=0)
+        return await lookup.run(['bad.test', 'foo..com', 'other.test'])
+
+    stats = asyncio.run(scenario())
+    assert stats['submitted'] == 3
+    assert stats['errors'] == 3
+    records = {record['domain']: record for record in read_ndjson(tmp_path / 'out.ndjson')}
+    assert records['bad.test']['error'] == 'ValueError: malformed name'
+    assert records['other.test']['error'] == 'No registry RDAP service in bootstrap'
@@ -0,0 +1,66 @@
+"""
+Grouping registrars into operator families, on rows from the real registrar tables.
+"""
+
+import pandas as pd
+import pytest
+
+from registrar_families import RegistrarFamilyResolver, load_registrars
+
+MONIKER = '228 Moniker Online Services LLC'
+UK2 = '84 UK-2 Limited'
+COLUMNS = ['iana_id', 'name', 'domain_count', 'rdap_url', 'gateway_provider', 'category', 'website', 'duplicate']
+ROWS = [
+    (69, 'Tucows Domains Inc.', 15000000, 'opensrs.rdap.tucows.com', 'Tucows', 'REGISTRAR', None, None),
+    (48, 'eNom, LLC', 600000, 'enom.rdap.tucows.com', 'Tucows', 'SUBSIDIARY', None, None),
+    (85, 'EPAG Domainservices GmbH', 100000, 'epag.rdap.tucows.com', 'Tucows', 'SUBSIDIARY', None, None),
+    (269, 'Key-Systems GmbH', 1800000, 'rdap.rrpproxy.net', 'RRPProxy/CentralNic', 'REGISTRAR',
+     'https://www.key-systems.net', MONIKER),
+    (1345, 'Key-Systems, LLC', 70000, 'rdap.rrpproxy.net', 'RRPProxy/CentralNic', 'SUBSIDIARY',
+     'https://www.key-systems.net', MONIKER),
+    (1728, 'IP Twins SAS', 11340, 'rdap.rrpproxy.net', 'RRPProxy/CentralNic', 'GATEWAY',
+     'https://www.iptwins.com', MONIKER),
+    (2911, 'Nakazawa Trading Co.,Ltd.', 5921, 'rdap.rrpproxy.net', 'RRPProxy/CentralNic', 'GATEWAY',
+     'https://www.nakazawatradingco.com', MONIKER),
+    (3243, 'Sky Clear Co., Ltd.', 277, 'rdap.rrpproxy.net', 'RRPProxy/CentralNic', 'GATEWAY',
+     'https://www.skyclearco.com', MONIKER),
+    (3244, 'Dai Nippon Joho System Co., Ltd.', 275, 'rdap.rrpproxy.net', 'RRPProxy/CentralNic', 'GATEWAY',
+     'https://www.dainipponjohosystemco.com', MONIKER),
+    (3242, 'WingNames Co., Ltd.', 269, 'rdap.rrpproxy.net', 'RRPProxy/CentralNic', 'GATEWAY',
+     'https://www.wingnamesco.com', MONIKER),
+    (303, 'PDR Ltd. d/b/a PublicDomainRegistry.com', 4845099, 'rdapserver.net', 'RDAP Server', None,
+     'https://publicdomainregistry.com', UK2),
+    (1085, 'Click Registrar, LLC dba publicdomainregistry.com', 1067, 'rdapserver.net', 'RDAP Server', None,
+     'https://www.publicdomainregistry.com', UK2),
+    (955, 'Launchpad.com Inc.', 729662, 'rdapserver.net', 'RDAP Server', None, 'https://launchpad.com', UK2),
+    (1495, 'BigRock Solutions Ltd.', 276454, 'rdapserver.net', 'RDAP Server', None,
+     'https://www.bigrock.com', UK2),
+]
+NEWFOLD = [303, 1085, 955, 1495]
+
+
+@pytest.fixture
+def families(tmp_path):
+    path = tmp_path / 'registrars.csv'
+    pd.DataFrame(ROWS, columns=COLUMNS).to_csv(path, index=False)
+    df = load_registrars(path, enriched_files=[], families={'Newfold Digital (PDR)': NEWFOLD})
+    resolved = RegistrarFamilyResolver().resolve(df)
+    return dict(zip(resolved['iana_id'], resolved['family_id']))
+
+
+def members(families, iana_id):
+    return sorted(key for key, family in families.items() if family == families[iana_id])
+
+
+def test_shared_declared_parent_and_rdap_host_do_not_merge_resellers(families):
+    assert members(families, 269) == [269, 1345]
+    for iana_id in (1728, 2911, 3243, 3244, 3242):
+        assert members(families, iana_id) == [iana_id]
+
+
+def test_gateway_operator_groups_its_brands(families):
+    assert members(families, 69) == [48, 69, 85]
+
+
+def test_curated_family_list_groups_unlinked_brands(families):
+    assert members(families, 303) == sorted(NEWFOLD)
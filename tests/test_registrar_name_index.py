@@ -0,0 +1,54 @@
+"""
+Resolving registrar names to IANA ids.
+"""
+
+import pandas as pd
+import pytest
+
+from registrar_name_index import RegistrarNameIndex, normalize_registrar_name
+
+REGISTRARS = [
+    (69, 'Tucows Domains Inc.'),
+    (269, 'Key-Systems GmbH'),
+    (303, 'PDR Ltd. d/b/a PublicDomainRegistry.com'),
+    (886, 'Domain.com, LLC'),
+    (413, 'Domain Pro, LLC'),
+    (2, 'Network Solutions, LLC'),
+    (1750, 'Authentic Web Inc.'),
+    (1636, 'Hostinger, UAB'),
+]
+
+
+@pytest.fixture
+def index():
+    return RegistrarNameIndex(REGISTRARS)
+
+
+def test_normalises_legal_forms_and_accents():
+    assert normalize_registrar_name('Tecnocrática Centro de Datos, S.L.') == 'tecnocratica centro de datos'
+    assert normalize_registrar_name('Key-Systems GmbH & Co. KG') == 'key systems gmbh'
+
+
+def test_dba_alias_resolves_exactly(index):
+    assert index.best_match('PublicDomainRegistry.com')['key'] == 303
+    assert index.best_match('PDR Ltd')['score'] == 1.0
+
+
+def test_distinctive_words_contained_in_a_name_match(index):
+    assert index.best_match('Tucows') == {'key': 69, 'name': 'Tucows Domains Inc.', 'score': 0.9}
+    assert index.best_match('Key-Systems GmbH & Co. KG')['key'] == 269
+
+
+@pytest.mark.parametrize('name', ['Domain', 'Network', 'Web', 'Web Services', 'Domains Inc.'])
+def test_generic_words_alone_do_not_join(index, name):
+    assert index.best_match(name, min_score=0.75) is None
+
+
+def test_generic_name_still_matches_exactly(index):
+    assert index.best_match('Network Solutions LLC')['key'] == 2
+
+
+def test_join_resolves_each_distinct_name_once(index):
+    names = pd.Series(['Tucows', 'Domain', 'Hostinger UAB', 'Tucows', None])
+    joined = index.join(names)
+    assert list(joined['matched_key']) == [69, None, 1636, 69, None]
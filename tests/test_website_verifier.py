@@ -0,0 +1,197 @@
+"""
+Website verification against a local stand-in resolver and HTTP server:
+DNS caching, reachability, redirects and the confidence each result gives.
+"""
+
+import asyncio
+import socket
+
+from aiohttp import web
+from aiohttp.abc import AbstractResolver
+from aiohttp.test_utils import TestServer
+
+from website_verifier import CachingResolver, WebsiteVerifier, adjust_confidence
+
+
+class StandInResolver(AbstractResolver):
+    """Answers from a fixed table, counting the lookups that reach it."""
+
+    def __init__(self, answers, delay=0.0):
+        self.answers = answers
+        self.delay = delay
+        self.lookups = []
+
+    async def resolve(self, host, port=0, family=socket.AF_INET):
+        self.lookups.append(host)
+        await asyncio.sleep(self.delay)
+        if host not in self.answers:
+            raise OSError(f"Stand-in has no answer for {host}")
+        return [{'hostname': host, 'host': self.answers[host], 'port': port, 'family': socket.AF_INET,
+                 'proto': 0, 'flags': socket.AI_NUMERICHOST}]
+
+    async def close(self):
+        pass
+
+
+def free_port():
+    """A local port nothing listens on."""
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+async def stand_in_site(request):
+    """Every candidate site, picked by the Host header (the resolver routes them all here)."""
+    host = request.host.split(':')[0]
+    if host == 'site.test':
+        return web.Response()
+    if host == 'old.test':
+        raise web.HTTPMovedPermanently("http://www.old.test/home")
+    if host == 'www.old.test' and request.path == '/home':
+        return web.Response()
+    if host == 'parked.test':
+        raise web.HTTPFound("http://parking.test/")
+    if host == 'parking.test':
+        return web.Response()
+    if host == 'nohead.test':
+        if request.method == 'HEAD':
+            raise web.HTTPMethodNotAllowed('HEAD', ['GET'])
+        return web.Response()
+    if host == 'broken.test':
+        raise web.HTTPServiceUnavailable()
+    raise web.HTTPNotFound()
+
+
+def verify_records(records):
+    """Verify records with every site routed to the stand-in server."""
+    async def scenario():
+        app = web.Application()
+        app.router.add_route('*', '/{path:.*}', stand_in_site)
+        server = TestServer(app, host='127.0.0.1')
+        await server.start_server()
+        try:
+            sites = ['site.test', 'old.test', 'www.old.test', 'parked.test', 'parking.test',
+                     'nohead.test', 'broken.test']
+            overrides = {host: ('127.0.0.1', server.port) for host in sites}
+            overrides['closed.test'] = ('127.0.0.1', free_port())
+            resolver = CachingResolver(StandInResolver({}), overrides=overrides)
+            verifier = WebsiteVerifier(timeout=5.0, resolver=resolver, schemes=('http',))
+            return await verifier.verify_records(records)
+        finally:
+            await server.close()
+
+    return asyncio.run(scenario())
+
+
+def record(website, confidence='medium', source='name_pattern'):
+    return {'website': website, 'website_source': source, 'website_confidence': confidence}
+
+
+def test_resolver_caches_and_coalesces_lookups():
+    async def scenario():
+        stand_in = StandInResolver({'one.test': '192.0.2.1'}, delay=0.05)
+        resolver = CachingResolver(stand_in)
+        answers = await asyncio.gather(*(resolver.resolve('one.test', 443) for _ in range(5)))
+        again = await resolver.resolve('ONE.test', 80)
+        return stand_in, resolver, answers, again
+
+    stand_in, resolver, answers, again = asyncio.run(scenario())
+    assert stand_in.lookups == ['one.test']
+    assert resolver.stats['coalesced'] == 4
+    assert resolver.stats['cache_hit'] == 1
+    assert all(answer[0]['host'] == '192.0.2.1' and answer[0]['port'] == 443 for answer in answers)
+    assert again[0]['port'] == 80
+
+
+def test_resolver_caches_failures():
+    async def scenario():
+        stand_in = StandInResolver({})
+        resolver = CachingResolver(stand_in)
+        failures = 0
+        for _ in range(3):
+            try:
+                await resolver.resolve('missing.test')
+            except OSError:
+                failures += 1
+        return stand_in, failures
+
+    stand_in, failures = asyncio.run(scenario())
+    assert failures == 3
+    assert stand_in.lookups == ['missing.test']
+
+
+def test_host_without_dns_is_low_confidence():
+    async def scenario():
+        stand_in = StandInResolver({})
+        verifier = WebsiteVerifier(resolver=CachingResolver(stand_in), schemes=('http',))
+        records = [record('https://missing.test'), record('missing.test/about')]
+        stats = await verifier.verify_records(records)
+        return stand_in, stats, records
+
+    stand_in, stats, records = asyncio.run(scenario())
+    assert stand_in.lookups == ['missing.test']
+    assert stats['no_dns'] == 1
+    assert [r['website_verification'] for r in records] == ['no_dns', 'no_dns']
+    assert [r['website_confidence'] for r in records] == ['low', 'low']
+
+
+def test_reachable_site_becomes_high_confidence():
+    records = [record('http://site.test', confidence='low')]
+    stats = verify_records(records)
+    assert stats['reachable'] == 1
+    assert records[0]['website_status'] == 200
+    assert records[0]['website_confidence'] == 'high'
+
+
+def test_redirect_on_site_updates_the_website():
+    records = [record('old.test')]
+    verify_records(records)
+    assert records[0]['website_verification'] == 'reachable'
+    assert records[0]['website'] == "http://www.old.test/home"
+    assert records[0]['website_candidate'] == 'old.test'
+
+
+def test_offsite_redirect_caps_confidence():
+    records = [record('parked.test', confidence='high')]
+    verify_records(records)
+    assert records[0]['website_verification'] == 'redirected_offsite'
+    assert records[0]['website_confidence'] == 'medium'
+    assert records[0]['website'] == 'parked.test'
+
+
+def test_refused_head_falls_back_to_get():
+    records = [record('nohead.test')]
+    verify_records(records)
+    assert records[0]['website_verification'] == 'reachable'
+    assert records[0]['website_status'] == 200
+
+
+def test_http_error_caps_confidence_at_medium():
+    records = [record('broken.test', confidence='high')]
+    verify_records(records)
+    assert records[0]['website_verification'] == 'http_error'
+    assert records[0]['website_status'] == 503
+    assert records[0]['website_confidence'] == 'medium'
+
+
+def test_closed_port_is_unreachable():
+    records = [record('closed.test')]
+    verify_records(records)
+    assert records[0]['website_verification'] == 'unreachable'
+    assert records[0]['website_confidence'] == 'low'
+
+
+def test_only_selected_sources_are_verified():
+    records = [record('site.test'), record('broken.test', source='icann')]
+    stats = verify_records(records)
+    assert stats == {'reachable': 1}
+    assert 'website_verification' not in records[1]
+
+
+def test_adjust_confidence():
+    assert adjust_confidence(None, 'reachable') == 'high'
+    assert adjust_confidence('high', 'unreachable') == 'low'
+    assert adjust_confidence('high', 'http_error') == 'medium'
+    assert adjust_confidence('medium', 'http_error') == 'medium'
+    assert adjust_confidence('low', 'http_error') == 'low'
+    assert adjust_confidence('low', 'redirected_offsite') == 'low'
@@ -5,12 +5,27 @@ Update gateway analysis data to:
 2. Remove "NameBright" and "Network Solutions" 
 3. Keep only core gateway providers: LogicBoxes, RRPProxy/CentralNic, and Tucows
 4. Recalculate all statistics and market shares
+
+Totals are maintained incrementally by scripts/provider_aggregates.py, so a
+rerun only touches what a new rule or count change affects.
 """
 
+import hashlib
 import json
-from datetime import datetime
+import sys
+from datetime import date, datetime
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).resolve().parent / "scripts"))
+from artifact_store import ArtifactStore
+from content_publisher import ContentPublisher
+from provider_aggregates import ProviderAggregates, core_provider_series
+from publish_dashboard import DashboardPublisher
+from registrar_records import build_registrar_records
+from rollup_cube import build_cube
+from snapshot_diff import diff_snapshots
+from snapshot_history import SnapshotHistory
+
 def load_json(filepath):
     """Load JSON data from file"""
     with open(filepath, 'r', encoding='utf-8') as f:
@@ -21,143 +36,138 @@ def save_json(data, filepath):
     with open(filepath, 'w', encoding='utf-8') as f:
         json.dump(data, f, indent=2, ensure_ascii=False)
 
-def update_comprehensive_analysis():
+def file_hash(filepath):
+    """SHA-256 of a file's content"""
+    return hashlib.sha256(Path(filepath).read_bytes()).hexdigest()
+
+def load_aggregates():
+    """Provider aggregates with the core reclassification rules applied"""
+    
+    # Re-seed whenever the analysis is not the one the state last wrote,
+    # e.g. when a new month's comprehensive analysis replaces it
+    aggregates = ProviderAggregates()
+    source = file_hash("comprehensive_gateway_analysis.json")
+    if not aggregates.is_seeded_from(source):
+        aggregates.seed(load_json("comprehensive_gateway_analysis.json"), ArtifactStore().frame('gateway_registrars'),
+                        source)
+        print("Seeded provider aggregates from comprehensive_gateway_analysis.json")
+    
+    # Each rule touches only the reclassified provider's rows; providers
+    # already counted as core or self-hosted produce no rule
+    for provider, target in aggregates.core_reclassifications().items():
+        moved = aggregates.reclassify(provider, target)
+        if moved:
+            print(f"Reclassified {moved} {provider} registrars as {target or 'self-hosted'}")
+    return aggregates
+
+def update_comprehensive_analysis(aggregates):
     """Update the comprehensive gateway analysis"""
     
-    # Load the current data
     filepath = Path("comprehensive_gateway_analysis.json")
     data = load_json(filepath)
     
-    # Keep only the three core gateway providers
-    core_providers = {
-        "Tucows": data["gateway_providers"]["Tucows"],
-        "RRPProxy/CentralNic": data["gateway_providers"]["RRPProxy/CentralNic"],
-        "LogicBoxes": data["gateway_providers"]["RDAP Server (Potential Gateway)"].copy()
-    }
-    
-    # Update LogicBoxes data (rename from RDAP Server)
-    core_providers["LogicBoxes"]["gateway_provider"] = "LogicBoxes"
-    
-    # Recalculate totals for gateway providers only
-    total_gateway_domains = sum(provider["total_domains"] for provider in core_providers.values())
-    total_gateway_registrars = sum(provider["registrar_count"] for provider in core_providers.values())
-    
-    # Calculate new market shares (as percentage of total market, not just gateway market)
-    total_market_domains = data["dataset_summary"]["total_domains"]
-    
-    for provider_name, provider_data in core_providers.items():
-        provider_data["market_share_percent"] = (provider_data["total_domains"] / total_market_domains) * 100
-    
-    # Update the main data structure
-    data["gateway_providers"] = core_providers
-    
-    # Update gateway analysis totals
-    data["gateway_analysis"] = {
-        "total_gateway_domains": total_gateway_domains,
-        "total_self_hosted_domains": total_market_domains - total_gateway_domains,
-        "gateway_market_share_percent": (total_gateway_domains / total_market_domains) * 100,
-        "self_hosted_market_share_percent": ((total_market_domains - total_gateway_domains) / total_market_domains) * 100
-    }
-    
-    # Filter top_rdap_urls to only include our core providers
-    core_rdap_urls = []
-    for url_data in data["top_rdap_urls"]:
-        if url_data["is_gateway"]:
-            provider = url_data["gateway_provider"]
-            if provider == "RDAP Server (Potential Gateway)":
-                url_data["gateway_provider"] = "LogicBoxes"
-                core_rdap_urls.append(url_data)
-            elif provider in ["Tucows", "RRPProxy/CentralNic"]:
-                core_rdap_urls.append(url_data)
-        else:
-            # Keep non-gateway URLs for reference
-            core_rdap_urls.append(url_data)
-    
-    data["top_rdap_urls"] = core_rdap_urls
-    
-    # Update analysis date
-    data["analysis_date"] = datetime.now().isoformat()
-    
-    # Save updated data
-    save_json(data, filepath)
-    print(f"Updated {filepath}")
+    # Patch provider totals, market shares and gateway vs self-hosted totals
+    if aggregates.apply_to_analysis(data):
+        data["analysis_date"] = datetime.now().isoformat()
+        save_json(data, filepath)
+        print(f"Updated {filepath}")
+    else:
+        print(f"{filepath} unchanged")
+    aggregates.set_source(file_hash(filepath))
     
     return data
 
-def update_provider_summary():
+def update_provider_summary(aggregates):
     """Update the gateway provider summary"""
     
-    # Load current data
     filepath = Path("gateway_provider_summary.json")
-    data = load_json(filepath)
+    data = aggregates.provider_summary()
+    if data != load_json(filepath):
+        save_json(data, filepath)
+        print(f"Updated {filepath}")
+    else:
+        print(f"{filepath} unchanged")
     
-    # Filter to keep only core providers and rename RDAP Server to LogicBoxes
-    core_data = []
-    for item in data:
-        provider = item["gateway_provider"]
-        if provider == "Tucows":
-            core_data.append(item)
-        elif provider == "RRPProxy/CentralNic":
-            core_data.append(item)
-        elif provider == "RDAP Server":
-            item["gateway_provider"] = "LogicBoxes"
-            core_data.append(item)
-    
-    # Save updated data
-    save_json(core_data, filepath)
-    print(f"Updated {filepath}")
-    
-    return core_data
+    return data
 
 def update_all_gateway_registrars():
     """Update the all gateway registrars file"""
     
-    # Load current data
-    filepath = Path("all_gateway_registrars.json")
-    data = load_json(filepath)
+    # Read the canonical registrar table (the JSON file is a view of the result)
+    store = ArtifactStore()
+    df = store.frame('gateway_registrars')
     
     # Filter to keep only registrars from core providers
-    core_registrars = []
-    for registrar in data:
-        provider = registrar["gateway_provider"]
-        if provider == "Tucows":
-            core_registrars.append(registrar)
-        elif provider == "RRPProxy/CentralNic":
-            core_registrars.append(registrar)
-        elif provider == "RDAP Server":
-            registrar["gateway_provider"] = "LogicBoxes"
-            core_registrars.append(registrar)
-    
-    # Save updated data
-    save_json(core_registrars, filepath)
-    print(f"Updated {filepath} - kept {len(core_registrars)} registrars from core providers")
-    
-    return core_registrars
+    core = df.assign(gateway_provider=core_provider_series(df["gateway_provider"]))
+    core = core[core["gateway_provider"].notna()]
+    
+    # Report registrars that appeared, left or moved since the last run
+    if store.has('core_gateway_registrars'):
+        diff = diff_snapshots(store.frame('core_gateway_registrars'), core)
+        changes = ', '.join(f"{count} {event}" for event, count in diff.summary().items() if count)
+        print(f"Changes since last run: {changes or 'none'}")
+    
+    # Save the canonical table and refresh its JSON views
+    store.write('core_gateway_registrars', core, source='update_gateway_analysis')
+    for view in store.materialise_views('core_gateway_registrars'):
+        print(f"Updated {view.relative_to(store.root)} - kept {len(core)} registrars from core providers")
+    
+    # Refresh the pre-joined registrar records and the group-by rollup read from them
+    records = build_registrar_records(store)
+    print(f"Updated registrar records - {len(records)} registrars indexed by IANA id")
+    cube = build_cube(store)
+    print(f"Updated rollup cube - {len(cube.cells)} cells")
+    
+    return store.records('core_gateway_registrars')
+
+def record_snapshot(comprehensive_data):
+    """Append this run's registrar table to the snapshot history"""
+    
+    # Dated by the run, not the analysis (which only changes with the totals);
+    # a second run the same day replaces that day's snapshot with its newer data
+    snapshot_date = date.today().isoformat()
+    history = SnapshotHistory()
+    existed = snapshot_date in history.snapshots()
+    entry = history.append(ArtifactStore().frame('gateway_registrars'), snapshot_date,
+                           market_domains=comprehensive_data["dataset_summary"]["total_domains"],
+                           replace=True)
+    print(f"{'Updated' if existed else 'Recorded'} snapshot {snapshot_date} - {entry['rows']} registrars "
+          f"({len(history.snapshots())} snapshots in history)")
 
 def update_public_files():
-    """Update files in the public/data/processed directory"""
+    """Publish changed files to public/data/processed under content-hashed names"""
     
     public_dir = Path("public/data/processed")
     if not public_dir.exists():
         print(f"Public directory {public_dir} does not exist, skipping...")
         return
     
-    # Copy updated files to public directory
-    files_to_copy = [
-        "comprehensive_gateway_analysis.json",
-        "gateway_provider_summary.json", 
-        "all_gateway_registrars.json"
+    publisher = ContentPublisher()
+    
+    # Analysis files are copied in; the registrar files are already written
+    # there as views of the canonical tables and only need hashed copies
+    files_to_publish = [
+        Path("comprehensive_gateway_analysis.json"),
+        Path("gateway_provider_summary.json"),
+        public_dir / "all_gateway_registrars.json",
+        public_dir / "logicboxes_registrars_enriched_v2.json"
     ]
     
-    for filename in files_to_copy:
-        source = Path(filename)
-        dest = public_dir / filename
-        
+    for source in files_to_publish:
         if source.exists():
-            # Load and save to ensure consistent formatting
-            data = load_json(source)
-            save_json(data, dest)
-            print(f"Updated {dest}")
+            publisher.publish_file(source, f"processed/{source.name}")
+    publisher.retire_unpublished("processed/")
+    
+    # Sharded bundles the dashboard tables load from
+    DashboardPublisher(publisher).publish()
+    
+    changed = publisher.save()
+    for name in changed:
+        print(f"Updated public/data/{name} -> {publisher.manifest['files'][name]['file']}")
+    for name in publisher.retired:
+        print(f"Retired public/data/{name}")
+    print(f"{len(changed)} public files changed, {len(publisher.retired)} retired, "
+          f"{publisher.stats['unchanged']} unchanged")
 
 def print_summary(comprehensive_data, provider_summary, registrars_data):
     """Print a summary of the updated data"""
@@ -188,13 +198,17 @@ def main():
     
     try:
         # Update all files
-        comprehensive_data = update_comprehensive_analysis()
-        provider_summary = update_provider_summary()
+        aggregates = load_aggregates()
+        comprehensive_data = update_comprehensive_analysis(aggregates)
+        provider_summary = update_provider_summary(aggregates)
         registrars_data = update_all_gateway_registrars()
         
         # Update public files
         update_public_files()
         
+        # Recorded once the run's outputs are published
+        record_snapshot(comprehensive_data)
+        
         # Print summary
         print_summary(comprehensive_data, provider_summary, registrars_data)
         
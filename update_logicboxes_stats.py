@@ -4,8 +4,20 @@ Update the LogicBoxes summary stats to reflect the new filtered data
 """
 
 import json
+import sys
 from pathlib import Path
 
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent / "scripts"))
+from content_publisher import write_if_changed
+from rollup_cube import RollupCube
+
+RDAP_SERVICE_LABELS = {
+    'rdapserver.net': 'LogicBoxes Core (rdapserver.net)',
+    'rdap.rrpproxy.net': 'RRPProxy/CentralNic Gateway (rrpproxy.net)',
+}
+
 def update_logicboxes_stats():
     """Update the LogicBoxes summary stats file"""
     
@@ -16,15 +28,16 @@ def update_logicboxes_stats():
     # Filter only LogicBoxes registrars
     logicboxes_registrars = [r for r in all_registrars if r['gateway_provider'] == 'LogicBoxes']
     
-    # Calculate stats
-    total_registrars = len(logicboxes_registrars)
+    # Totals and the RDAP host split come from one rollup of the table
+    cube = RollupCube.build(pd.DataFrame(all_registrars))
+    totals = cube.cell(gateway_provider='LogicBoxes')
+    total_registrars = totals['registrars']
+    total_domains = int(totals['domains'])
+    avg_domains = total_domains / totals['registrars_with_domains'] if totals['registrars_with_domains'] else 0
     
     # Filter out registrars with null domain counts
     registrars_with_domains = [r for r in logicboxes_registrars if r['domain_count'] is not None]
     
-    total_domains = sum(r['domain_count'] for r in registrars_with_domains)
-    avg_domains = total_domains / len(registrars_with_domains) if registrars_with_domains else 0
-    
     # Calculate median
     domain_counts = sorted([r['domain_count'] for r in registrars_with_domains])
     median_domains = domain_counts[len(domain_counts) // 2] if domain_counts else 0
@@ -41,16 +54,9 @@ def update_logicboxes_stats():
     
     # Count RDAP service distribution
     rdap_distribution = {}
-    for r in logicboxes_registrars:
-        url = r['rdap_url']
-        if url == 'rdapserver.net':
-            key = 'LogicBoxes Core (rdapserver.net)'
-        elif url == 'rdap.rrpproxy.net':
-            key = 'RRPProxy/CentralNic Gateway (rrpproxy.net)'
-        else:
-            key = f'Other ({url})'
-        
-        rdap_distribution[key] = rdap_distribution.get(key, 0) + 1
+    for url, count in cube.distribution('rdap_host', gateway_provider='LogicBoxes').items():
+        key = RDAP_SERVICE_LABELS.get(url, f'Other ({url})')
+        rdap_distribution[key] = rdap_distribution.get(key, 0) + int(count)
     
     # Create updated stats
     updated_stats = {
@@ -67,10 +73,10 @@ def update_logicboxes_stats():
     
     # Save updated stats
     stats_file = Path('data/processed/logicboxes_summary_stats.json')
-    with open(stats_file, 'w') as f:
-        json.dump(updated_stats, f, indent=2)
-    
-    print(f"Updated {stats_file}")
+    if write_if_changed(stats_file, json.dumps(updated_stats, indent=2).encode('utf-8')):
+        print(f"Updated {stats_file}")
+    else:
+        print(f"{stats_file} unchanged")
     print(f"LogicBoxes registrars: {total_registrars}")
     print(f"Total domains: {total_domains:,}")
     print(f"Average domains per registrar: {avg_domains:,.1f}")